@@ -23,6 +23,8 @@ from auth import (
     AboutContent,
     ChefSpecialty,
 )
+from menu_catalog import bump_menu_version
+from recommendation import invalidate_recommendations
 
 
 # ==================== Custom Base View Classes ====================
@@ -122,6 +124,8 @@ class MenuItemModelView(SecureModelView):
                    'description']
     column_searchable_list = ['name', 'category', 'description']
     column_filters = ['category', 'rating']
+    # Change stamp for the catalog probe, set on save
+    form_excluded_columns = ['updated_at']
 
     column_labels = {
         'id': 'ID',
@@ -142,6 +146,16 @@ class MenuItemModelView(SecureModelView):
 
     page_size = 20
 
+    def after_model_change(self, form, model, is_created):
+        """Invalidate the in-memory menu catalog after create / edit"""
+        bump_menu_version()
+        invalidate_recommendations()
+
+    def after_model_delete(self, model):
+        """Invalidate the in-memory menu catalog after delete"""
+        bump_menu_version()
+        invalidate_recommendations()
+
 
 class ReviewModelView(SecureModelView):
     """Review Management View"""
@@ -1,4 +1,5 @@
 import logging
+from datetime import datetime
 
 from flask import render_template, request, redirect, url_for, session
 from werkzeug.security import generate_password_hash, check_password_hash
@@ -13,6 +14,7 @@ from sqlalchemy import (
     Numeric,
     DateTime,
     ForeignKey,
+    Index,
     text,
 )
 from sqlalchemy.orm import sessionmaker, scoped_session, declarative_base
@@ -79,6 +81,36 @@ class MenuItem(Base):
     image_url = Column(String(200))
     category = Column(String(50))
     rating = Column(Float)
+    # Last change (catalog change detection, see menu_catalog.py); set
+    # by the database on MySQL (sql/Menu_Items_Updated_At.sql)
+    updated_at = Column(
+        DateTime, default=datetime.utcnow, onupdate=datetime.utcnow
+    )
+
+    # Composite indexes for the SQL menu engine (menu_sql.py):
+    # category filter + price range / sort, category filter + rating sort,
+    # and unfiltered price / rating sorts (see sql/Menu_Items_Indexes.sql);
+    # MAX(updated_at) for the catalog probe; FULLTEXT word-prefix search
+    # on MySQL (name and description together for the filter, each alone
+    # for relevance)
+    __table_args__ = (
+        Index("ix_menu_items_category_price", "category", "price"),
+        Index("ix_menu_items_category_rating", "category", "rating"),
+        Index("ix_menu_items_price", "price"),
+        Index("ix_menu_items_rating", "rating"),
+        Index("ix_menu_items_updated_at", "updated_at"),
+        Index(
+            "ft_menu_items_name_description", "name", "description",
+            mysql_prefix="FULLTEXT",
+        ).ddl_if(dialect="mysql"),
+        Index(
+            "ft_menu_items_name", "name", mysql_prefix="FULLTEXT"
+        ).ddl_if(dialect="mysql"),
+        Index(
+            "ft_menu_items_description", "description",
+            mysql_prefix="FULLTEXT",
+        ).ddl_if(dialect="mysql"),
+    )
 
 
 class Review(Base):
@@ -144,6 +176,13 @@ class Order(Base):
     total_amount = Column(Numeric(10, 2), nullable=False)
     status = Column(String(20))
 
+    # Per-user lookups by date: order history pages (keyset on
+    # (date, id)) and precomputed recommendation freshness,
+    # see sql/Orders_Indexes.sql
+    __table_args__ = (
+        Index("ix_orders_user_date_id", "user_id", "date", "id"),
+    )
+
 
 class OrderItem(Base):
     """
@@ -162,6 +201,187 @@ class OrderItem(Base):
     price_at_purchase = Column(Numeric(10, 2), nullable=False)
 
 
+class OrderIdempotencyKey(Base):
+    """
+    ORM mapping to order_idempotency_keys table: the order created for a
+    client's Idempotency-Key, so a retried POST /api/orders returns it
+    instead of placing a second order.
+
+    request_hash identifies the cart sent with the key (a key reused for
+    a different cart is rejected).
+    """
+
+    __tablename__ = "order_idempotency_keys"
+
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    idempotency_key = Column(String(255), primary_key=True)
+    request_hash = Column(String(64), nullable=False)
+    order_id = Column(
+        Integer, ForeignKey("orders.id", ondelete="CASCADE"),
+        nullable=False
+    )
+    created_at = Column(DateTime, nullable=False)
+
+
+class ItemCooccurrence(Base):
+    """
+    ORM mapping to item_cooccurrence table (see sql/Item_Cooccurrence.sql),
+    the item-to-item co-purchase index used by recommendation.py.
+
+    user_count = number of distinct users who bought both items.
+    Stored in both directions, (a, b) and (b, a), so the neighbours of
+    an item are one primary key range scan.
+    """
+
+    __tablename__ = "item_cooccurrence"
+
+    item_id = Column(
+        Integer, ForeignKey("menu_items.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    other_item_id = Column(
+        Integer, ForeignKey("menu_items.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    user_count = Column(Integer, nullable=False, default=0)
+
+
+class ItemSales(Base):
+    """
+    ORM mapping to item_sales table (see sql/Item_Sales.sql),
+    materialized units sold per menu item for popular items.
+
+    Equal to SUM(order_items.quantity) per menu_item_id; updated with
+    every order and reconciled by recommendation_jobs.py rebuild-sales.
+    """
+
+    __tablename__ = "item_sales"
+
+    menu_item_id = Column(
+        Integer, ForeignKey("menu_items.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    units_sold = Column(Integer, nullable=False, default=0)
+
+    # Top-k read: ORDER BY units_sold DESC LIMIT k
+    __table_args__ = (
+        Index("ix_item_sales_units_sold", "units_sold"),
+    )
+
+
+class RecommendationGeneration(Base):
+    """
+    ORM mapping to recommendation_generations table
+    (see sql/User_Recommendations.sql): one row per batch precompute run.
+
+    status: "building" while rows are written, then "complete";
+    readers only use the newest complete generation.
+    """
+
+    __tablename__ = "recommendation_generations"
+
+    id = Column(Integer, primary_key=True)
+    started_at = Column(DateTime, nullable=False)
+    finished_at = Column(DateTime)
+    status = Column(String(20), nullable=False)
+    top_k = Column(Integer, nullable=False)
+    user_count = Column(Integer, nullable=False, default=0)
+
+
+class UserRecommendation(Base):
+    """
+    ORM mapping to user_recommendations table: precomputed
+    "Recommended for You" candidates, position 0 = best.
+    """
+
+    __tablename__ = "user_recommendations"
+
+    generation_id = Column(
+        Integer,
+        ForeignKey("recommendation_generations.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    position = Column(Integer, primary_key=True)
+    menu_item_id = Column(
+        Integer, ForeignKey("menu_items.id", ondelete="CASCADE"),
+        nullable=False
+    )
+    score = Column(Float, nullable=False)
+
+
+class ItemPairCount(Base):
+    """
+    ORM mapping to item_pair_counts table (see sql/Item_Pairings.sql):
+    number of orders containing both items, maintained incrementally by
+    the pairings miner (recommendation_pairings.py).
+
+    Stored once per pair with item_id <= other_item_id; the diagonal
+    (item_id == other_item_id) counts orders containing the item.
+    """
+
+    __tablename__ = "item_pair_counts"
+
+    item_id = Column(
+        Integer, ForeignKey("menu_items.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    other_item_id = Column(
+        Integer, ForeignKey("menu_items.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    order_count = Column(Integer, nullable=False, default=0)
+
+
+class PairingRun(Base):
+    """
+    ORM mapping to pairing_runs table: one row per mining run.
+
+    last_order_id is the watermark of orders already counted into
+    item_pair_counts; order_count is the total number of orders counted.
+    """
+
+    __tablename__ = "pairing_runs"
+
+    id = Column(Integer, primary_key=True)
+    started_at = Column(DateTime, nullable=False)
+    finished_at = Column(DateTime, nullable=False)
+    last_order_id = Column(Integer, nullable=False)
+    order_count = Column(Integer, nullable=False)
+    rule_count = Column(Integer, nullable=False, default=0)
+
+
+class ItemPairing(Base):
+    """
+    ORM mapping to item_pairings table: "frequently bought together"
+    rules item_id -> other_item_id of a run, position 0 = best.
+    """
+
+    __tablename__ = "item_pairings"
+
+    run_id = Column(
+        Integer, ForeignKey("pairing_runs.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    item_id = Column(
+        Integer, ForeignKey("menu_items.id", ondelete="CASCADE"),
+        primary_key=True
+    )
+    position = Column(Integer, primary_key=True)
+    other_item_id = Column(
+        Integer, ForeignKey("menu_items.id", ondelete="CASCADE"),
+        nullable=False
+    )
+    support = Column(Float, nullable=False)
+    confidence = Column(Float, nullable=False)
+    lift = Column(Float, nullable=False)
+
+
 class Address(Base):
     """
     ORM mapping to existing addresses table (does not auto-create).
@@ -0,0 +1,372 @@
+"""
+Benchmark suite: menu_utils stages and the /api/menu route at catalog scale.
+
+For every catalog size a synthetic catalog is generated
+(benchmarks/synthetic.py: skewed categories, duplicate prices) and
+timed at two levels:
+
+1. Stages (pure Python, menu_utils.py):
+   filter_menu_items, quick_sort, get_unique_categories, get_price_range,
+   filter_and_sort_menu on a plain list and on a MenuIndex, MenuIndex
+   build, facet counting
+2. Route: GET /api/menu through the Flask test client, against an
+   in-memory SQLite database holding the same catalog, for both
+   MENU_QUERY_ENGINE values:
+   - cold: catalog snapshot rebuilt (memory engine only)
+   - miss: response cache miss (new query each run)
+   - hit: response cache hit
+   - revalidate: If-None-Match with the current ETag (304)
+
+Results are written as JSON (one record per size / stage with best,
+median and mean seconds), so runs of two versions can be compared:
+
+Usage:
+    python benchmarks/bench_menu.py --output before.json
+    python benchmarks/bench_menu.py --sizes 1000,10000,100000,1000000
+    python benchmarks/bench_menu.py --no-route --repeat 3
+    python benchmarks/bench_menu.py --compare before.json after.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from itertools import count
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from menu_utils import (  # noqa: E402
+    MenuIndex,
+    filter_and_sort_menu,
+    filter_menu_items,
+    get_price_range,
+    get_unique_categories,
+    quick_sort,
+)
+from synthetic import generate_items, generate_rows  # noqa: E402
+
+PAGE_SIZE = 12
+INSERT_CHUNK = 10000
+
+
+# ==============================================================================
+# Measurement
+# ==============================================================================
+
+
+def measure(func, repeat, setup=None):
+    """
+    Run func `repeat` times (setup, if given, runs untimed before each).
+
+    Returns:
+        (timing dict, result of the last run)
+    """
+    times = []
+    result = None
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return {
+        "best": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.fmean(times),
+        "runs": len(times),
+    }, result
+
+
+def record(results, size, stage, timing, count_=None):
+    entry = {"size": size, "stage": stage, **timing}
+    if count_ is not None:
+        entry["result_count"] = count_
+    results.append(entry)
+    print(f"{size:>9} {stage:<40} {timing['best'] * 1000:>10.2f} ms",
+          file=sys.stderr)
+
+
+# ==============================================================================
+# Stage benchmarks
+# ==============================================================================
+
+
+def bench_stages(results, size, items, repeat):
+    filters = {
+        "category": {"category": "Dessert"},
+        "price_range": {"min_price": 15.0, "max_price": 20.0},
+        "search": {"search_query": "grilled"},
+    }
+    for name, kwargs in filters.items():
+        timing, rows = measure(
+            lambda: filter_menu_items(items, **kwargs), repeat
+        )
+        record(results, size, f"filter_menu_items.{name}", timing, len(rows))
+
+    for sort_by, reverse in (("price", False), ("rating", True)):
+        direction = "desc" if reverse else "asc"
+        timing, rows = measure(
+            lambda: quick_sort(items, sort_by=sort_by, reverse=reverse),
+            repeat
+        )
+        record(results, size, f"quick_sort.{sort_by}_{direction}",
+               timing, len(rows))
+
+    timing, categories = measure(lambda: get_unique_categories(items), repeat)
+    record(results, size, "get_unique_categories", timing, len(categories))
+    timing, _ = measure(lambda: get_price_range(items), repeat)
+    record(results, size, "get_price_range", timing)
+
+    page_args = dict(
+        category="Main Course", min_price=10.0, max_price=40.0,
+        sort_by="rating", sort_order="desc", limit=PAGE_SIZE,
+    )
+    timing, result = measure(
+        lambda: filter_and_sort_menu(items, **page_args), repeat
+    )
+    record(results, size, "filter_and_sort_menu.list.page",
+           timing, result["total"])
+    timing, result = measure(
+        lambda: filter_and_sort_menu(
+            items, sort_by="price", sort_order="asc"
+        ),
+        repeat
+    )
+    record(results, size, "filter_and_sort_menu.list.all",
+           timing, result["total"])
+
+    timing, index = measure(lambda: MenuIndex(items), repeat)
+    record(results, size, "MenuIndex.build", timing)
+    # Sort permutations are built on first use (the catalog builds them
+    # eagerly); time them separately from the index page query
+    timing, _ = measure(
+        lambda: [index.sorted_rows(s, r)
+                 for s in ("price", "rating") for r in (False, True)],
+        1
+    )
+    record(results, size, "MenuIndex.sort_orders", timing)
+
+    timing, result = measure(
+        lambda: filter_and_sort_menu(index, **page_args), repeat
+    )
+    record(results, size, "filter_and_sort_menu.index.page",
+           timing, result["total"])
+    timing, result = measure(
+        lambda: filter_and_sort_menu(
+            index, search_query="sauce17", sort_by="relevance",
+            limit=PAGE_SIZE
+        ),
+        repeat
+    )
+    record(results, size, "filter_and_sort_menu.index.search",
+           timing, result["total"])
+    # Facets are memoized per index: clear before each run to time
+    # the counting pass itself
+    timing, result = measure(
+        lambda: filter_and_sort_menu(index, facets=True, **page_args),
+        repeat,
+        setup=index._facet_cache.clear
+    )
+    record(results, size, "filter_and_sort_menu.index.facets",
+           timing, result["total"])
+
+
+# ==============================================================================
+# Route benchmarks (Flask test client + in-memory SQLite)
+# ==============================================================================
+
+
+class RouteHarness:
+    """
+    Flask apps for both menu engines, bound to one in-memory SQLite
+    database that is refilled for every catalog size.
+    """
+
+    def __init__(self, log_dir):
+        # Logs go to a temporary directory, not the repository
+        os.environ["LOG_DIR"] = log_dir
+
+        from sqlalchemy import create_engine
+        from sqlalchemy.pool import StaticPool
+
+        import auth
+
+        self.auth = auth
+        self.engine = create_engine(
+            "sqlite://",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        # Point the application's engine / sessions at SQLite
+        auth.engine = self.engine
+        auth.SessionLocal.configure(bind=self.engine)
+        auth.MenuItem.__table__.create(self.engine)
+
+        from flask_app import create_app
+
+        self.clients = {}
+        for menu_engine in ("memory", "sql"):
+            os.environ["MENU_QUERY_ENGINE"] = menu_engine
+            app = create_app()
+            app.config["TESTING"] = True
+            self.clients[menu_engine] = app.test_client()
+        os.environ.pop("MENU_QUERY_ENGINE", None)
+
+    def load(self, rows):
+        from sqlalchemy import delete, insert
+
+        table = self.auth.MenuItem.__table__
+        with self.engine.begin() as conn:
+            conn.execute(delete(table))
+            for start in range(0, len(rows), INSERT_CHUNK):
+                conn.execute(insert(table), rows[start:start + INSERT_CHUNK])
+
+
+def bench_route(results, size, harness, repeat):
+    from menu_catalog import menu_catalog_cache
+
+    url = (f"/api/menu?category=Main%20Course&sort_by=rating"
+           f"&sort_order=desc&limit={PAGE_SIZE}")
+
+    for menu_engine, client in harness.clients.items():
+        prefix = f"route.{menu_engine}"
+
+        def get(path=url, headers=None):
+            response = client.get(path, headers=headers)
+            if response.status_code not in (200, 304):
+                raise SystemExit(
+                    f"{path} returned {response.status_code}"
+                )
+            return response
+
+        if menu_engine == "memory":
+            # Snapshot rebuild + query (first request after a menu edit)
+            timing, response = measure(
+                get, max(1, min(repeat, 3)),
+                setup=menu_catalog_cache.bump_version
+            )
+            record(results, size, f"{prefix}.cold", timing,
+                   response.get_json()["total"])
+
+        # Distinct max_price per run: response cache miss, snapshot hit
+        runs = count()
+        timing, response = measure(
+            lambda: get(f"{url}&max_price={40 + next(runs) / 100:.2f}"),
+            repeat
+        )
+        record(results, size, f"{prefix}.miss", timing,
+               response.get_json()["total"])
+
+        response = get()
+        timing, _ = measure(get, repeat)
+        record(results, size, f"{prefix}.hit", timing)
+
+        etag = response.headers["ETag"]
+        timing, response = measure(
+            lambda: get(headers={"If-None-Match": etag}), repeat
+        )
+        if response.status_code != 304:
+            raise SystemExit("Expected 304 on revalidation")
+        record(results, size, f"{prefix}.revalidate", timing)
+
+
+# ==============================================================================
+# Runner
+# ==============================================================================
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes, repeat, route):
+    results = []
+    with tempfile.TemporaryDirectory() as log_dir:
+        harness = RouteHarness(log_dir) if route else None
+        for size in sizes:
+            items = generate_items(size)
+            bench_stages(results, size, items, repeat)
+            if harness is not None:
+                harness.load(generate_rows(size))
+                bench_route(results, size, harness, repeat)
+
+    return {
+        "meta": {
+            "benchmark": "bench_menu",
+            "revision": git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sizes": sizes,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(before_path, after_path):
+    """
+    Print best-time ratios (after / before) for stages in both files.
+    """
+    with open(before_path, encoding="utf-8") as f:
+        before = json.load(f)
+    with open(after_path, encoding="utf-8") as f:
+        after = json.load(f)
+    old = {(r["size"], r["stage"]): r["best"] for r in before["results"]}
+
+    print(f"{'size':>9} {'stage':<40} {'before ms':>10} {'after ms':>10} "
+          f"{'ratio':>7}")
+    for entry in after["results"]:
+        key = (entry["size"], entry["stage"])
+        if key not in old:
+            continue
+        ratio = entry["best"] / old[key] if old[key] else float("inf")
+        print(f"{key[0]:>9} {key[1]:<40} {old[key] * 1000:>10.2f} "
+              f"{entry['best'] * 1000:>10.2f} {ratio:>6.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="1000,10000,100000",
+                        help="comma-separated catalog sizes (up to 1000000)")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="runs per measurement")
+    parser.add_argument("--no-route", action="store_true",
+                        help="skip the Flask / SQLite route benchmarks")
+    parser.add_argument("--output",
+                        help="write JSON here instead of stdout")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"),
+                        help="compare two JSON result files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    report = run(
+        [int(s) for s in args.sizes.split(",")], args.repeat,
+        route=not args.no_route
+    )
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
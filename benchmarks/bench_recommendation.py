@@ -0,0 +1,376 @@
+"""
+Benchmark: "Recommended for You" latency, query counts, memory and hit rate.
+
+For every user count a synthetic history is generated
+(benchmarks/synthetic.py: Zipf-like item popularity, 0-6 orders per
+user, some users never order) and loaded into a SQLite database file
+together with the menu catalog. Each user's last order is held out:
+it is not loaded, and serves as the ground truth for quality.
+
+Then, for every engine (RECOMMENDATION_ENGINE values, precomputed lists
+off), get_recommendations runs uncached (no latency budget) for a sample
+of users with a held-out order, reporting:
+- Latency: p50 / p95 / p99 / max milliseconds per call
+- Queries: mean / max SQL statements per call (count_queries)
+- Memory: peak traced allocation of one call (tracemalloc, separate pass
+  so tracing does not inflate the latencies)
+- Quality: hit rate@k, the share of users whose held-out order contains
+  at least one recommended item, and the share served a personalized
+  list (the rest fell back to popular items)
+
+Setup costs (loading, item_sales / item_cooccurrence rebuilds) are
+reported once per user count; the LSH index build and the model
+snapshot write once per engine that needs them.
+
+Around 100000 users give ~1 million order_items rows, the scale the
+recommendation.py docstring refers to.
+
+Results are written as JSON, so runs of two versions can be compared.
+
+Usage:
+    python benchmarks/bench_recommendation.py
+    python benchmarks/bench_recommendation.py --users 10000,100000 \\
+        --engines user_cf,lsh --sample 500 --output after.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from synthetic import generate_orders, generate_rows  # noqa: E402
+
+INSERT_CHUNK = 10000
+
+
+# ==============================================================================
+# Data
+# ==============================================================================
+
+
+def bind_sqlite(path):
+    """
+    Point the application's engine / sessions at a SQLite database file
+    with the tables the recommendation engines read.
+    """
+    from sqlalchemy import create_engine
+
+    import auth
+
+    engine = create_engine(
+        f"sqlite:///{path}", connect_args={"check_same_thread": False}
+    )
+    auth.engine = engine
+    auth.SessionLocal.configure(bind=engine)
+    auth.db_session.remove()
+    auth.Base.metadata.create_all(engine, tables=[
+        auth.MenuItem.__table__,
+        auth.Order.__table__,
+        auth.OrderItem.__table__,
+        auth.ItemCooccurrence.__table__,
+        auth.ItemSales.__table__,
+    ])
+    return engine
+
+
+def hold_out_last_orders(orders, order_items):
+    """
+    Split off each user's last order (users with 2+ orders only).
+
+    Returns:
+        (kept orders, kept order items, {user_id: held-out item IDs})
+    """
+    last = {}
+    counts = {}
+    for order in orders:
+        user_id = order["user_id"]
+        counts[user_id] = counts.get(user_id, 0) + 1
+        last[user_id] = order["id"]
+    held_out_orders = {
+        order_id: user_id for user_id, order_id in last.items()
+        if counts[user_id] > 1
+    }
+
+    held_out = {user_id: set() for user_id in held_out_orders.values()}
+    kept_items = []
+    for line in order_items:
+        user_id = held_out_orders.get(line["order_id"])
+        if user_id is None:
+            kept_items.append(line)
+        else:
+            held_out[user_id].add(line["menu_item_id"])
+    kept_orders = [o for o in orders if o["id"] not in held_out_orders]
+    return kept_orders, kept_items, held_out
+
+
+def load(engine, n_users, n_items, orders_per_user, seed):
+    """
+    Fill the database for one user count.
+
+    Returns:
+        ({user_id: held-out item IDs}, setup timings, order item rows)
+    """
+    from sqlalchemy import delete, insert
+
+    import auth
+    from recommendation import rebuild_item_cooccurrence, rebuild_item_sales
+
+    orders, order_items = generate_orders(
+        n_users, n_items, orders_per_user, seed=seed
+    )
+    orders, order_items, held_out = hold_out_last_orders(orders, order_items)
+
+    timings = {}
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        for table in (auth.ItemCooccurrence, auth.ItemSales,
+                      auth.OrderItem, auth.Order, auth.MenuItem):
+            conn.execute(delete(table.__table__))
+        for table, rows in ((auth.MenuItem, generate_rows(n_items, seed)),
+                            (auth.Order, orders),
+                            (auth.OrderItem, order_items)):
+            for i in range(0, len(rows), INSERT_CHUNK):
+                conn.execute(
+                    insert(table.__table__), rows[i:i + INSERT_CHUNK]
+                )
+    timings["load"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rebuild_item_sales()
+    timings["rebuild_item_sales"] = time.perf_counter() - start
+    start = time.perf_counter()
+    rebuild_item_cooccurrence()
+    timings["rebuild_item_cooccurrence"] = time.perf_counter() - start
+    return held_out, timings, len(order_items)
+
+
+# ==============================================================================
+# Measurement
+# ==============================================================================
+
+
+def percentiles(values):
+    """
+    p50 / p95 / p99 / max of a list of seconds, in milliseconds.
+    """
+    if len(values) < 2:
+        value = values[0] * 1000 if values else 0.0
+        return {"p50": value, "p95": value, "p99": value, "max": value}
+    cuts = statistics.quantiles(values, n=100, method="inclusive")
+    return {
+        "p50": cuts[49] * 1000,
+        "p95": cuts[94] * 1000,
+        "p99": cuts[98] * 1000,
+        "max": max(values) * 1000,
+    }
+
+
+def bench_engine(engine_name, user_ids, held_out, k, memory, workdir):
+    """
+    Time get_recommendations for each user with one engine.
+    """
+    from recommendation import (
+        count_queries,
+        get_recommendations,
+        recommendation_cache,
+        set_recommendation_engine,
+    )
+    from recommendation_lsh import configure_lsh, get_lsh_index
+    from recommendation_snapshot import (
+        configure_snapshot,
+        get_model_snapshot,
+        write_snapshot,
+    )
+
+    set_recommendation_engine(engine_name)
+
+    setup = None
+    if engine_name == "lsh":
+        configure_lsh()
+        start = time.perf_counter()
+        get_lsh_index()
+        setup = time.perf_counter() - start
+    elif engine_name == "snapshot":
+        path = os.path.join(workdir, "recommendation_model.bin")
+        start = time.perf_counter()
+        write_snapshot(path)
+        configure_snapshot(path)
+        get_model_snapshot()
+        setup = time.perf_counter() - start
+
+    latencies = []
+    queries = []
+    hits = 0
+    personalized = 0
+    for user_id in user_ids:
+        start = time.perf_counter()
+        with count_queries() as counter:
+            items, kind = get_recommendations(user_id, limit=k)
+        latencies.append(time.perf_counter() - start)
+        queries.append(counter.count)
+        if kind == "Recommended for You":
+            personalized += 1
+        if any(item["id"] in held_out[user_id] for item in items):
+            hits += 1
+
+    entry = {
+        "engine": engine_name,
+        "users": len(user_ids),
+        "latency_ms": percentiles(latencies),
+        "queries_mean": statistics.fmean(queries) if queries else 0.0,
+        "queries_max": max(queries, default=0),
+        "hit_rate": hits / len(user_ids) if user_ids else 0.0,
+        "personalized": personalized / len(user_ids) if user_ids else 0.0,
+    }
+    if setup is not None:
+        entry["setup_seconds"] = setup
+
+    if memory:
+        peak = 0
+        recommendation_cache.clear()
+        tracemalloc.start()
+        try:
+            for user_id in user_ids:
+                tracemalloc.reset_peak()
+                get_recommendations(user_id, limit=k)
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+        entry["peak_memory_kib"] = peak / 1024
+
+    recommendation_cache.clear()
+    return entry
+
+
+def print_entry(n_users, entry):
+    latency = entry["latency_ms"]
+    memory = entry.get("peak_memory_kib")
+    print(
+        f"{n_users:>8} {entry['engine']:<8} {latency['p50']:>8.2f} "
+        f"{latency['p95']:>8.2f} {latency['p99']:>8.2f} "
+        f"{entry['queries_mean']:>7.1f} "
+        f"{'-' if memory is None else f'{memory:.0f}':>9} "
+        f"{entry['hit_rate']:>7.3f} {entry['personalized']:>7.3f}",
+        file=sys.stderr
+    )
+
+
+# ==============================================================================
+# Runner
+# ==============================================================================
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(user_counts, engines, n_items, orders_per_user, sample, k, seed,
+        memory):
+    from recommendation import set_precomputed_recommendations
+
+    # Engines only: no user_recommendations table here
+    set_precomputed_recommendations(False)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = bind_sqlite(os.path.join(tmp, "bench.sqlite3"))
+
+        print(f"{'users':>8} {'engine':<8} {'p50 ms':>8} {'p95 ms':>8} "
+              f"{'p99 ms':>8} {'queries':>7} {'peak KiB':>9} "
+              f"{'hit@k':>7} {'personal':>7}", file=sys.stderr)
+        for n_users in user_counts:
+            held_out, timings, rows = load(
+                engine, n_users, n_items, orders_per_user, seed
+            )
+            rng = random.Random(seed)
+            candidates = sorted(held_out)
+            user_ids = rng.sample(candidates, min(sample, len(candidates)))
+
+            for engine_name in engines:
+                entry = bench_engine(
+                    engine_name, user_ids, held_out, k, memory, tmp
+                )
+                entry.update(
+                    size=n_users, order_items=rows, setup=timings
+                )
+                results.append(entry)
+                print_entry(n_users, entry)
+
+    return {
+        "meta": {
+            "benchmark": "bench_recommendation",
+            "revision": git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "users": user_counts,
+            "items": n_items,
+            "orders_per_user": orders_per_user,
+            "sample": sample,
+            "k": k,
+            "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def main():
+    from recommendation import RECOMMENDATION_ENGINES
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", default="1000,10000",
+                        help="comma-separated user counts")
+    parser.add_argument("--engines", default=",".join(RECOMMENDATION_ENGINES),
+                        help="comma-separated RECOMMENDATION_ENGINE values")
+    parser.add_argument("--items", type=int, default=200,
+                        help="menu items in the synthetic catalog")
+    parser.add_argument("--orders-per-user", type=int, default=3,
+                        help="mean orders per user (0..2x, uniform)")
+    parser.add_argument("--sample", type=int, default=200,
+                        help="users timed / evaluated per engine")
+    parser.add_argument("-k", type=int, default=3,
+                        help="recommendations per user (hit rate@k)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-memory", action="store_true",
+                        help="skip the tracemalloc pass")
+    parser.add_argument("--output",
+                        help="write JSON here instead of stdout")
+    args = parser.parse_args()
+
+    engines = args.engines.split(",")
+    unknown = set(engines) - set(RECOMMENDATION_ENGINES)
+    if unknown:
+        parser.error(f"unknown engines: {', '.join(sorted(unknown))}")
+
+    report = run(
+        [int(u) for u in args.users.split(",")], engines, args.items,
+        args.orders_per_user, args.sample, args.k, args.seed,
+        memory=not args.no_memory
+    )
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+Benchmark: per-user collaborative filtering vs the sparse matrix engine.
+
+For every user count an order history is generated
+(benchmarks/synthetic.py: Zipf-like item popularity, some users without
+orders) and loaded into an in-memory SQLite database. Then:
+
+1. Equivalence: for a sample of users, find_similar_users and
+   get_candidate_items (recommendation.py) must equal
+   UserItemMatrix.similar_users / candidate_scores exactly, and
+   batch_top_k must equal the candidates ranked the way
+   compute_recommendations ranks them (score desc, item id)
+2. Throughput (users scored per second):
+   - python: get_user_purchase_history + find_similar_users +
+     get_candidate_items per user (three queries each)
+   - matrix: UserItemMatrix.load (timed separately) + batch_top_k
+     over all users
+
+Exits with status 1 when the engines disagree.
+
+Usage:
+    python benchmarks/bench_recommendation_matrix.py
+    python benchmarks/bench_recommendation_matrix.py --users 1000,20000 \\
+        --items 500 --sample 200
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from sort_utils import compound_key, stable_sort  # noqa: E402
+from synthetic import generate_orders  # noqa: E402
+
+INSERT_CHUNK = 10000
+TOP_K = 10
+
+
+def bind_sqlite():
+    """
+    Point the application's engine / sessions at an in-memory SQLite
+    database with the orders / order_items tables.
+    """
+    from sqlalchemy import create_engine
+    from sqlalchemy.pool import StaticPool
+
+    import auth
+
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    auth.engine = engine
+    auth.SessionLocal.configure(bind=engine)
+    auth.Order.__table__.create(engine)
+    auth.OrderItem.__table__.create(engine)
+    return engine
+
+
+def load_orders(engine, orders, order_items):
+    from sqlalchemy import delete, insert
+
+    import auth
+
+    with engine.begin() as conn:
+        conn.execute(delete(auth.OrderItem.__table__))
+        conn.execute(delete(auth.Order.__table__))
+        for table, rows in ((auth.Order.__table__, orders),
+                            (auth.OrderItem.__table__, order_items)):
+            for start in range(0, len(rows), INSERT_CHUNK):
+                conn.execute(insert(table), rows[start:start + INSERT_CHUNK])
+
+
+def python_scores(user_id):
+    """
+    (similar users, candidate scores) from the per-user pipeline.
+    """
+    from recommendation import (
+        find_similar_users,
+        get_candidate_items,
+        get_user_purchase_history,
+    )
+
+    purchased = get_user_purchase_history(user_id)
+    if not purchased:
+        return {}, {}
+    similar = find_similar_users(user_id, purchased)
+    if not similar:
+        return similar, {}
+    return similar, get_candidate_items(purchased, similar)
+
+
+def ranked(scores, k):
+    """
+    Top k (item_id, score), ranked like compute_recommendations.
+    """
+    order = stable_sort(
+        list(scores.items()),
+        key=compound_key((lambda kv: kv[1], True), (lambda kv: kv[0], False))
+    )
+    return order[:k]
+
+
+def check_equivalence(matrix, expected):
+    """
+    Compare the matrix engine with {user_id: python_scores(user_id)}.
+    """
+    top_k = matrix.batch_top_k(list(expected), TOP_K)
+    mismatches = 0
+    for user_id, (similar, scores) in expected.items():
+        if (matrix.similar_users(user_id) != similar
+                or matrix.candidate_scores(user_id) != scores
+                or top_k[user_id] != ranked(scores, TOP_K)):
+            mismatches += 1
+            print(f"  mismatch for user {user_id}", file=sys.stderr)
+    return mismatches
+
+
+def run(user_counts, n_items, sample, seed):
+    from recommendation_matrix import UserItemMatrix
+
+    engine = bind_sqlite()
+    failures = 0
+
+    print(f"{'users':>8} {'pairs':>9} {'engine':<8} {'seconds':>9} "
+          f"{'users/s':>10}")
+    for n_users in user_counts:
+        orders, order_items = generate_orders(n_users, n_items, seed=seed)
+        load_orders(engine, orders, order_items)
+        user_ids = list(range(1, n_users + 1))
+
+        start = time.perf_counter()
+        matrix = UserItemMatrix.load()
+        load_seconds = time.perf_counter() - start
+
+        # Per-user Python pipeline on a sample (rate extrapolates)
+        rng = random.Random(seed)
+        checked = rng.sample(user_ids, min(sample, n_users))
+        start = time.perf_counter()
+        expected = {user_id: python_scores(user_id) for user_id in checked}
+        python_seconds = time.perf_counter() - start
+        python_rate = len(checked) / python_seconds
+
+        mismatches = check_equivalence(matrix, expected)
+        failures += mismatches
+
+        start = time.perf_counter()
+        matrix.batch_top_k(user_ids, TOP_K)
+        batch_seconds = time.perf_counter() - start
+        matrix_rate = n_users / batch_seconds
+
+        print(f"{n_users:>8} {matrix.nnz:>9} {'python':<8} "
+              f"{python_seconds:>9.3f} {python_rate:>10.0f}")
+        print(f"{n_users:>8} {matrix.nnz:>9} {'load':<8} "
+              f"{load_seconds:>9.3f} {'':>10}")
+        print(f"{n_users:>8} {matrix.nnz:>9} {'matrix':<8} "
+              f"{batch_seconds:>9.3f} {matrix_rate:>10.0f}  "
+              f"({matrix_rate / python_rate:.0f}x, "
+              f"{len(checked) - mismatches}/{len(checked)} equal)")
+
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", default="1000,10000,50000",
+                        help="comma-separated user counts")
+    parser.add_argument("--items", type=int, default=200,
+                        help="menu items in the synthetic catalog")
+    parser.add_argument("--sample", type=int, default=30,
+                        help="users checked / timed on the Python pipeline")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    failures = run(
+        [int(u) for u in args.users.split(",")], args.items,
+        args.sample, args.seed
+    )
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Benchmark: legacy recursive quick sort vs the shared merge sort engine.
+
+Runs both sorts on duplicate-heavy and presorted inputs (the cases that
+push the old Lomuto quick sort to O(n²) time and O(n) recursion depth),
+checks the merge sort against Python's sorted() (stable reference)
+and prints timings.
+
+The legacy sort is only run up to LEGACY_LIMIT items: beyond that it
+either takes minutes or exceeds the recursion limit.
+
+Usage:
+    python benchmarks/bench_sort.py
+    python benchmarks/bench_sort.py --sizes 10000,100000 --repeat 3
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(
+    0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
+from sort_utils import compound_key, stable_sort  # noqa: E402
+
+LEGACY_LIMIT = 10000
+
+
+def legacy_quick_sort(arr, key_func, reverse=False):
+    """
+    Copy of the recursive median-of-three Lomuto quick sort that
+    menu_utils.py used before sort_utils.py (kept here for comparison).
+    """
+    def pivot_index(low, high):
+        mid = (low + high) // 2
+        a, b, c = key_func(arr[low]), key_func(arr[mid]), key_func(arr[high])
+        if a <= b <= c or c <= b <= a:
+            return mid
+        if b <= a <= c or c <= a <= b:
+            return low
+        return high
+
+    def partition(low, high):
+        p = pivot_index(low, high)
+        arr[p], arr[high] = arr[high], arr[p]
+        pivot = key_func(arr[high])
+        i = low - 1
+        for j in range(low, high):
+            value = key_func(arr[j])
+            if (value > pivot) if reverse else (value < pivot):
+                i += 1
+                arr[i], arr[j] = arr[j], arr[i]
+        arr[i + 1], arr[high] = arr[high], arr[i + 1]
+        return i + 1
+
+    def recurse(low, high):
+        if low < high:
+            p = partition(low, high)
+            recurse(low, p - 1)
+            recurse(p + 1, high)
+
+    recurse(0, len(arr) - 1)
+    return arr
+
+
+def generate(kind, n, seed=42):
+    rng = random.Random(seed)
+    if kind == "random":
+        prices = [round(rng.uniform(5, 60), 2) for _ in range(n)]
+    elif kind == "few_prices":
+        # Menu-like: a handful of distinct price points
+        prices = [float(rng.randint(8, 12)) for _ in range(n)]
+    elif kind == "all_equal":
+        prices = [9.99] * n
+    elif kind == "sorted":
+        prices = [float(i // 10) for i in range(n)]
+    else:  # "reversed"
+        prices = [float((n - i) // 10) for i in range(n)]
+    return [
+        {"id": i + 1, "price": p, "rating": rng.choice([3.0, 4.0, 4.5, 5.0])}
+        for i, p in enumerate(prices)
+    ]
+
+
+def time_once(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def best_of(repeat, func):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        elapsed, result = time_once(func)
+        best = min(best, elapsed)
+    return best, result
+
+
+def run(sizes, repeat):
+    kinds = ["random", "few_prices", "all_equal", "sorted", "reversed"]
+    price = lambda item: item["price"]  # noqa: E731
+    # rating desc, then price asc, then id asc
+    compound = compound_key(
+        (lambda item: item["rating"], True),
+        (price, False),
+        (lambda item: item["id"], False),
+    )
+
+    print(f"{'items':>9} {'input':<11} {'legacy ms':>10} {'merge ms':>9} "
+          f"{'compound ms':>12}")
+    for n in sizes:
+        for kind in kinds:
+            items = generate(kind, n)
+
+            merge_time, merged = best_of(
+                repeat, lambda: stable_sort(items, key=price)
+            )
+            if merged != sorted(items, key=price):
+                raise SystemExit(f"Merge sort mismatch on {kind!r}")
+
+            compound_time, ordered = best_of(
+                repeat, lambda: stable_sort(items, key=compound)
+            )
+            if ordered != sorted(items, key=compound):
+                raise SystemExit(f"Compound sort mismatch on {kind!r}")
+
+            if n <= LEGACY_LIMIT:
+                limit = sys.getrecursionlimit()
+                sys.setrecursionlimit(max(limit, n + 1000))
+                try:
+                    legacy_time, _ = best_of(
+                        repeat, lambda: legacy_quick_sort(list(items), price)
+                    )
+                    legacy = f"{legacy_time * 1000:>10.1f}"
+                except RecursionError:
+                    legacy = f"{'recursion':>10}"
+                finally:
+                    sys.setrecursionlimit(limit)
+            else:
+                legacy = f"{'skipped':>10}"
+
+            print(f"{n:>9} {kind:<11} {legacy} {merge_time * 1000:>9.1f} "
+                  f"{compound_time * 1000:>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000",
+                        help="comma-separated item counts")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="runs per measurement (best is reported)")
+    args = parser.parse_args()
+    run([int(s) for s in args.sizes.split(",")], args.repeat)
+
+
+if __name__ == "__main__":
+    main()
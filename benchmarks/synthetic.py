@@ -0,0 +1,114 @@
+"""
+Synthetic menu catalog and order history generators shared by the
+benchmark scripts.
+
+Catalogs are deterministic for a given (n, seed) and shaped like a real
+menu at scale:
+- Skewed categories (Zipf-like: the first categories dominate)
+- Heavily duplicated prices (whole amounts 8-50) and ratings (half stars)
+- Common dish words plus a long tail of rare description words,
+  so word searches are selective
+
+Order histories (generate_orders) are deterministic for a given
+(n_users, n_items, seed), with Zipf-like item popularity and a varying
+number of orders per user (some users never order: cold start).
+"""
+
+import random
+from datetime import datetime, timedelta
+
+CATEGORIES = ["Main Course", "Dessert", "Salad", "Appetizer", "Soup",
+              "Drinks", "Sides", "Kids"]
+# Zipf-like weights: first categories dominate
+CATEGORY_WEIGHTS = [1.0 / (i + 1) for i in range(len(CATEGORIES))]
+WORDS = ["pizza", "pasta", "salad", "chocolate", "cake", "beef", "chicken",
+         "salmon", "mushroom", "cheese", "tomato", "basil", "lemon",
+         "garlic", "cream", "spicy", "grilled", "roasted", "fresh", "classic"]
+# Long tail of rarer description words, so searches are selective
+RARE_WORDS = [f"{w}{i}" for i in range(200) for w in ("herb", "sauce")]
+
+IMAGES = ["../images/pizza1.jpg", "../images/black_cake.jpg",
+          "../images/beef-stew-15.png", "../images/snails.jpg"]
+
+
+def generate_items(n, seed=42):
+    """
+    Generate n menu item dictionaries with ids 1..n (in id order).
+
+    Prices are floats and image_url is a static URL, i.e. the format
+    the catalog snapshot produces (see menu_catalog.menu_item_to_dict).
+    """
+    rng = random.Random(seed)
+    items = []
+    for i in range(1, n + 1):
+        words = rng.sample(WORDS, 3)
+        items.append({
+            "id": i,
+            "name": " ".join(words[:2]).title(),
+            "price": float(rng.randint(8, 50)),  # heavy price duplication
+            "description": " ".join(
+                rng.choices(WORDS, k=4) + rng.choices(RARE_WORDS, k=8)
+            ),
+            "image_url": "/static/images/blank.png",
+            "category": rng.choices(CATEGORIES, CATEGORY_WEIGHTS)[0],
+            "rating": rng.choice([3.0, 3.5, 4.0, 4.5, 5.0]),
+        })
+    return items
+
+
+def generate_rows(n, seed=42):
+    """
+    Generate n menu_items table rows (same catalog as generate_items),
+    ready for a bulk INSERT.
+    """
+    rows = []
+    for item in generate_items(n, seed):
+        row = dict(item)
+        row["image_url"] = IMAGES[item["id"] % len(IMAGES)]
+        rows.append(row)
+    return rows
+
+
+def generate_orders(n_users, n_items, orders_per_user=3, seed=42):
+    """
+    Generate orders / order_items table rows for users 1..n_users
+    buying menu items 1..n_items.
+
+    Each user places 0..2*orders_per_user orders of 1-5 distinct items;
+    item popularity is Zipf-like (low ids are bestsellers).
+
+    Returns:
+        (order rows, order item rows), ready for a bulk INSERT
+    """
+    rng = random.Random(seed)
+    item_ids = list(range(1, n_items + 1))
+    weights = [1.0 / i for i in item_ids]
+    start = datetime(2024, 1, 1)
+
+    orders = []
+    order_items = []
+    for user_id in range(1, n_users + 1):
+        for _ in range(rng.randint(0, 2 * orders_per_user)):
+            order_id = len(orders) + 1
+            picked = set(rng.choices(item_ids, weights, k=rng.randint(1, 5)))
+            lines = [
+                {
+                    "order_id": order_id,
+                    "menu_item_id": item_id,
+                    "quantity": rng.randint(1, 3),
+                    "price_at_purchase": float(8 + item_id % 43),
+                }
+                for item_id in sorted(picked)
+            ]
+            orders.append({
+                "id": order_id,
+                "user_id": user_id,
+                "date": start + timedelta(minutes=order_id),
+                "total_amount": sum(
+                    line["quantity"] * line["price_at_purchase"]
+                    for line in lines
+                ),
+                "status": "Completed",
+            })
+            order_items.extend(lines)
+    return orders, order_items
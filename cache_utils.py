@@ -0,0 +1,138 @@
+"""
+Cache utility module
+
+Small in-process caches shared by route modules.
+
+LRUCache:
+- Bounded: evicts the least recently used entry when full
+- Optional TTL: entries older than `ttl` seconds count as misses
+  (expired entries are dropped lazily, on lookup or when evicted)
+- Thread-safe: one lock around every operation
+- Counts hits / misses / evictions / expirations for tuning
+
+Time complexity: O(1) per get / set (OrderedDict move_to_end / popitem)
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+# Returned by get() when a key is not cached (None may be a cached value)
+MISSING = object()
+
+
+class LRUCache:
+    """
+    Bounded least-recently-used cache.
+
+    Example:
+        >>> cache = LRUCache(maxsize=2)
+        >>> cache.set("a", 1)
+        >>> cache.get("a")
+        1
+        >>> cache.get("b") is MISSING
+        True
+
+    With ttl=60.0, an entry is served for at most 60 seconds after set().
+    """
+
+    def __init__(self, maxsize: int = 128, ttl: Optional[float] = None):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        if ttl is not None and ttl <= 0:
+            raise ValueError("ttl must be positive")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # key -> (value, expiry time on time.monotonic(), or None)
+        self._data: "OrderedDict[Hashable, Tuple[Any, Optional[float]]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        """
+        Return the cached value and mark it as recently used,
+        or `default` when not cached.
+        """
+        with self._lock:
+            try:
+                value, expires = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            if expires is not None and time.monotonic() >= expires:
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def peek(self, key: Hashable, default: Any = MISSING) -> Any:
+        """
+        Return the cached value without marking it as recently used or
+        counting a lookup, or `default` when not cached (or expired).
+        """
+        with self._lock:
+            entry = self._data.get(key)
+        if entry is None:
+            return default
+        value, expires = entry
+        if expires is not None and time.monotonic() >= expires:
+            return default
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """
+        Store a value, evicting the least recently used entry if full.
+        """
+        expires = (
+            time.monotonic() + self.ttl if self.ttl is not None else None
+        )
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        """
+        Remove one entry (returns its value, or `default`).
+        """
+        with self._lock:
+            entry = self._data.pop(key, MISSING)
+        return default if entry is MISSING else entry[0]
+
+    def clear(self) -> None:
+        """
+        Remove all entries (counters are kept).
+        """
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return size and hit / miss / eviction counters.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "ttl": self.ttl,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+        }
@@ -12,6 +12,8 @@ from main_routes import init_main_routes
 from review_routes import init_review_routes
 from order_routes import init_order_routes
 from admin import init_admin
+from recommendation_snapshot import DEFAULT_PATH as DEFAULT_SNAPSHOT_PATH
+from trending import DEFAULT_STORE as DEFAULT_TRENDING_STORE
 
 babel = Babel()
 
@@ -30,10 +32,11 @@ def create_app() -> Flask:
 
     # -------------- Logging --------------
     # Write to logs/app.log and logs/user_log.log
-    # (auto-create directory), prevent duplicate handlers
+    # (auto-create directory), prevent duplicate handlers.
+    # LOG_DIR overrides the directory (e.g. for benchmarks)
     try:
         base_dir = os.path.dirname(os.path.abspath(__file__))
-        log_dir = os.path.join(base_dir, "logs")
+        log_dir = os.environ.get("LOG_DIR") or os.path.join(base_dir, "logs")
         os.makedirs(log_dir, exist_ok=True)
         log_file = os.path.join(log_dir, "app.log")
         user_log_file = os.path.join(log_dir, "user_log.log")
@@ -96,6 +99,94 @@ def create_app() -> Flask:
     # Session lasts 7 days
     app.config["PERMANENT_SESSION_LIFETIME"] = timedelta(days=7)
 
+    # Menu API engine: "memory" (in-process catalog snapshot, default)
+    # or "sql" (filter / sort / page pushed down to the database)
+    app.config["MENU_QUERY_ENGINE"] = os.environ.get(
+        "MENU_QUERY_ENGINE", "memory"
+    )
+    # Recommendation candidates: "user_cf" (similar users, default),
+    # "item_cf" (item_cooccurrence index), "sql" (user_cf as one
+    # statement), "lsh" (approximate similar users) or "snapshot"
+    # (memory-mapped model file), see recommendation.py
+    app.config["RECOMMENDATION_ENGINE"] = os.environ.get(
+        "RECOMMENDATION_ENGINE", "user_cf"
+    )
+    # "lsh" engine: bands x rows hash functions (more bands / fewer rows:
+    # higher recall, more candidates), candidates scored per lookup,
+    # similar users kept, and index rebuild interval in seconds (0: never)
+    app.config["RECOMMENDATION_LSH_BANDS"] = int(
+        os.environ.get("RECOMMENDATION_LSH_BANDS", 32)
+    )
+    app.config["RECOMMENDATION_LSH_ROWS"] = int(
+        os.environ.get("RECOMMENDATION_LSH_ROWS", 2)
+    )
+    app.config["RECOMMENDATION_LSH_MAX_CANDIDATES"] = int(
+        os.environ.get("RECOMMENDATION_LSH_MAX_CANDIDATES", 2000)
+    )
+    app.config["RECOMMENDATION_LSH_NEIGHBOURS"] = int(
+        os.environ.get("RECOMMENDATION_LSH_NEIGHBOURS", 200)
+    )
+    app.config["RECOMMENDATION_LSH_MAX_AGE"] = float(
+        os.environ.get("RECOMMENDATION_LSH_MAX_AGE", 3600)
+    )
+    # "snapshot" engine: model file written by
+    # python recommendation_jobs.py write-snapshot, and seconds between
+    # checks for a new file (swapped in without restarting workers)
+    app.config["RECOMMENDATION_SNAPSHOT"] = os.environ.get(
+        "RECOMMENDATION_SNAPSHOT", DEFAULT_SNAPSHOT_PATH
+    )
+    app.config["RECOMMENDATION_SNAPSHOT_CHECK_SECONDS"] = float(
+        os.environ.get("RECOMMENDATION_SNAPSHOT_CHECK_SECONDS", 5)
+    )
+    # "Trending Now" for users without a login: decayed order counts
+    # shared by all workers through a SQLite file (TRENDING_STORE empty:
+    # per process only), synced every TRENDING_SYNC_SECONDS
+    app.config["RECOMMENDATION_TRENDING"] = os.environ.get(
+        "RECOMMENDATION_TRENDING", "1"
+    ).lower() not in ("0", "false", "no")
+    app.config["TRENDING_STORE"] = os.environ.get(
+        "TRENDING_STORE", DEFAULT_TRENDING_STORE
+    )
+    app.config["TRENDING_SYNC_SECONDS"] = float(
+        os.environ.get("TRENDING_SYNC_SECONDS", 10)
+    )
+    # Serve lists from the batch precompute job
+    # (python recommendation_jobs.py precompute) when available
+    app.config["RECOMMENDATION_PRECOMPUTED"] = os.environ.get(
+        "RECOMMENDATION_PRECOMPUTED", "1"
+    ).lower() not in ("0", "false", "no")
+    # Per-user recommendation cache: entries, TTL in seconds (0: no TTL),
+    # and how many orders by other users a cached result may miss
+    # (unset: only the TTL bounds that staleness)
+    app.config["RECOMMENDATION_CACHE_SIZE"] = int(
+        os.environ.get("RECOMMENDATION_CACHE_SIZE", 1024)
+    )
+    app.config["RECOMMENDATION_CACHE_TTL"] = float(
+        os.environ.get("RECOMMENDATION_CACHE_TTL", 300)
+    )
+    max_stale_orders = os.environ.get("RECOMMENDATION_CACHE_MAX_STALE_ORDERS")
+    app.config["RECOMMENDATION_CACHE_MAX_STALE_ORDERS"] = (
+        int(max_stale_orders) if max_stale_orders else None
+    )
+    # Seconds between each worker's polls of the orders table, which
+    # drop results made stale by orders other workers took (0: no poll,
+    # only this worker's orders invalidate before the TTL)
+    app.config["RECOMMENDATION_CACHE_POLL_SECONDS"] = float(
+        os.environ.get("RECOMMENDATION_CACHE_POLL_SECONDS", 1)
+    )
+    # Latency budget for a recommendation cache miss in milliseconds
+    # (0: wait for the result); past it pages get the popular list
+    # while the computation finishes in the background
+    app.config["RECOMMENDATION_BUDGET_MS"] = float(
+        os.environ.get("RECOMMENDATION_BUDGET_MS", 50)
+    )
+
+    # Seconds a POST /api/orders Idempotency-Key is remembered
+    # (retries within this window return the original order)
+    app.config["ORDER_IDEMPOTENCY_TTL"] = int(
+        os.environ.get("ORDER_IDEMPOTENCY_TTL", 86400)
+    )
+
     # Flask-Babel configuration (required by Flask-Admin)
     app.config['BABEL_DEFAULT_LOCALE'] = 'en'
     app.config['BABEL_DEFAULT_TIMEZONE'] = 'UTC'
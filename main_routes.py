@@ -1,3 +1,4 @@
+import hashlib
 import os
 from datetime import datetime
 
@@ -5,12 +6,44 @@ from flask import jsonify, render_template, request, session, url_for
 from werkzeug.utils import secure_filename
 
 from auth import Address, db_session, MenuItem, User
+from cache_utils import LRUCache, MISSING
+from menu_catalog import get_menu_catalog, menu_catalog_cache
+from menu_sql import (
+    MENU_ENGINES,
+    query_menu_facet_counts,
+    query_menu_facets,
+    query_menu_page,
+)
 from menu_utils import (
+    DEFAULT_PRICE_BUCKETS,
+    MAX_PRICE_BUCKETS,
     filter_and_sort_menu,
-    get_unique_categories,
-    get_price_range,
 )
-from recommendation import get_recommendations
+from pagination import (
+    InvalidCursor,
+    next_offset_cursor,
+    parse_limit,
+    parse_offset,
+    resolve_offset_cursor,
+)
+from recommendation import (
+    configure_recommendation_cache,
+    resolve_recommendations,
+    recommendation_cache,
+    set_precomputed_recommendations,
+    set_recommendation_engine,
+    set_trending_recommendations,
+)
+from recommendation_lsh import configure_lsh
+from recommendation_pairings import get_pairings, pairings_index
+from recommendation_snapshot import configure_snapshot, snapshot_stats
+from trending import configure_trending, trending_stats
+
+
+# Largest /api/recommendations limit
+MAX_RECOMMENDATIONS = 12
+# Largest /api/menu/<id>/pairings limit
+MAX_PAIRINGS = 10
 
 
 def init_main_routes(app) -> None:
@@ -19,6 +52,64 @@ def init_main_routes(app) -> None:
     and inject current logged-in user info into all templates.
     """
 
+    # Serialized /api/menu responses,
+    # keyed by (catalog version, normalized query parameters)
+    menu_response_cache = LRUCache(maxsize=256)
+
+    # "memory" (catalog snapshot) or "sql" (push-down, see menu_sql.py)
+    menu_engine = app.config.get("MENU_QUERY_ENGINE", "memory")
+    if menu_engine not in MENU_ENGINES:
+        raise ValueError(
+            f"MENU_QUERY_ENGINE must be one of {MENU_ENGINES}, "
+            f"got {menu_engine!r}"
+        )
+
+    # "user_cf", "item_cf" (co-purchase index), "sql" (one statement),
+    # "lsh" (approximate similar users) or "snapshot" (memory-mapped
+    # model file), see recommendation.py
+    set_recommendation_engine(
+        app.config.get("RECOMMENDATION_ENGINE", "user_cf")
+    )
+    lsh_max_age = app.config.get("RECOMMENDATION_LSH_MAX_AGE", 3600)
+    configure_lsh(
+        bands=app.config.get("RECOMMENDATION_LSH_BANDS", 32),
+        rows=app.config.get("RECOMMENDATION_LSH_ROWS", 2),
+        max_candidates=app.config.get(
+            "RECOMMENDATION_LSH_MAX_CANDIDATES", 2000
+        ),
+        neighbours=app.config.get("RECOMMENDATION_LSH_NEIGHBOURS", 200),
+        max_age=lsh_max_age if lsh_max_age and lsh_max_age > 0 else None,
+    )
+    configure_snapshot(
+        path=app.config.get("RECOMMENDATION_SNAPSHOT") or None,
+        check_interval=app.config.get(
+            "RECOMMENDATION_SNAPSHOT_CHECK_SECONDS", 5
+        ),
+    )
+    set_precomputed_recommendations(
+        app.config.get("RECOMMENDATION_PRECOMPUTED", True)
+    )
+    configure_trending(
+        path=app.config.get("TRENDING_STORE") or None,
+        sync_interval=app.config.get("TRENDING_SYNC_SECONDS", 10),
+    )
+    set_trending_recommendations(
+        app.config.get("RECOMMENDATION_TRENDING", True)
+    )
+    cache_ttl = app.config.get("RECOMMENDATION_CACHE_TTL", 300)
+    poll_seconds = app.config.get("RECOMMENDATION_CACHE_POLL_SECONDS", 1)
+    configure_recommendation_cache(
+        maxsize=app.config.get("RECOMMENDATION_CACHE_SIZE", 1024),
+        ttl=cache_ttl if cache_ttl and cache_ttl > 0 else None,
+        max_stale_orders=app.config.get(
+            "RECOMMENDATION_CACHE_MAX_STALE_ORDERS"
+        ),
+        poll_interval=poll_seconds if poll_seconds else None,
+    )
+    # Seconds a page waits for a cache miss (None: no budget)
+    budget_ms = app.config.get("RECOMMENDATION_BUDGET_MS", 50)
+    recommendation_budget = budget_ms / 1000 if budget_ms else None
+
     # Inject current user info into all templates
     # (for navbar avatar, user menu)
     @app.context_processor
@@ -326,11 +417,8 @@ def init_main_routes(app) -> None:
         Homepage: read some menu items from menu_items table
         for Popular Categories section.
 
-        New feature: "Recommended for You" recommendation system
-        - If user is logged in and has purchase history:
-          show personalized recommendations based on collaborative filtering
-        - If user is not logged in or has no purchase history:
-          show popular items (cold start handling)
+        "Recommended for You" is loaded after render by main.js
+        from /api/recommendations.
         """
         db = db_session()
         try:
@@ -340,17 +428,9 @@ def init_main_routes(app) -> None:
         finally:
             db.close()
 
-        # Get recommended items
-        user_id = session.get("user_id")
-        recommended_items, recommendation_type = get_recommendations(
-            user_id, limit=3
-        )
-
         return render_template(
             "index.html",
-            popular_items=popular_items,
-            recommended_items=recommended_items,
-            recommendation_type=recommendation_type
+            popular_items=popular_items
         )
 
     @app.route("/about")
@@ -449,36 +529,6 @@ def init_main_routes(app) -> None:
         finally:
             db.close()
 
-    def _get_all_menu_items_from_db() -> list:
-        """
-        Get all menu items from database and convert to Python dictionary list.
-
-        This is the data access layer,
-        does not use SQL ORDER BY (sorting done at application layer).
-        Time complexity: O(n), where n is number of database records
-        """
-        db = db_session()
-        try:
-            items = db.query(MenuItem).all()
-            menu_items = [
-                {
-                    "id": item.id,
-                    "name": item.name,
-                    "price": float(item.price),
-                    "description": item.description or "",
-                    "image_url": url_for(
-                        "static",
-                        filename=(item.image_url or "").replace("../", ""),
-                    ),
-                    "category": item.category or "",
-                    "rating": float(item.rating or 0),
-                }
-                for item in items
-            ]
-            return menu_items
-        finally:
-            db.close()
-
     @app.route("/menu")
     def menu():
         """
@@ -486,21 +536,13 @@ def init_main_routes(app) -> None:
         pass to frontend JS.
         Supports filtering and sorting via URL parameters.
 
-        New feature: "Recommended for You" recommendation system
-        - If user is logged in and has purchase history:
-          show personalized recommendations based on collaborative filtering
-        - If user is not logged in or has no purchase history:
-          show popular items (cold start handling)
+        "Recommended for You" is loaded after render by main.js
+        from /api/recommendations.
         """
         from auth import ChefSpecialty
 
-        menu_items = _get_all_menu_items_from_db()
-
-        # Get recommended items
-        user_id = session.get("user_id")
-        recommended_items, recommendation_type = get_recommendations(
-            user_id, limit=3
-        )
+        # Shared in-memory snapshot (see menu_catalog.py)
+        menu_items = get_menu_catalog().items
 
         # Get Chef's Specialty, ordered by updated_at descending
         db = db_session()
@@ -517,11 +559,54 @@ def init_main_routes(app) -> None:
         return render_template(
             "menu.html",
             menu_items=menu_items,
-            recommended_items=recommended_items,
-            recommendation_type=recommendation_type,
             chef_specialties=chef_specialties
         )
 
+    @app.get("/api/recommendations")
+    def api_recommendations():
+        """
+        "Recommended for You" for the current user (JSON), loaded by the
+        index / menu pages after render so page responses do not wait
+        on collaborative filtering.
+
+        Query parameters:
+        - limit: Number of items (1-12, default 3)
+
+        Response format:
+        {
+            "type": "Recommended for You" or "Popular Items",
+            "items": [{"id", "name", "price", "description", "image_url",
+                       "category", "rating", "recommendation_reason",
+                       "score"}]
+        }
+
+        Caching: the result is per user (session cookie), so shared
+        caches must not store it.
+        - Results carry a strong ETag (hash of the body); the browser
+          revalidates every time (If-None-Match, 304 when unchanged), so
+          an order shows up in the next response
+        - The popular list served when the latency budget runs out is
+          not stored at all (no-store): the next request gets the real
+          result
+        """
+        try:
+            limit = int(request.args.get("limit", 3))
+        except ValueError:
+            return jsonify({"error": "limit must be an integer"}), 400
+        limit = max(1, min(limit, MAX_RECOMMENDATIONS))
+
+        items, recommendation_type, final = resolve_recommendations(
+            session.get("user_id"), limit=limit, budget=recommendation_budget
+        )
+        response = jsonify({"type": recommendation_type, "items": items})
+        response.vary.add("Cookie")
+        if not final:
+            response.headers["Cache-Control"] = "no-store"
+            return response
+        response.headers["Cache-Control"] = "private, no-cache"
+        response.set_etag(hashlib.sha1(response.get_data()).hexdigest())
+        return response.make_conditional(request)
+
     @app.route("/api/menu")
     def api_menu():
         """
@@ -531,25 +616,47 @@ def init_main_routes(app) -> None:
         - category: Filter category (e.g., "Main Course", "Dessert")
         - min_price: Minimum price
         - max_price: Maximum price
-        - search: Search keyword (searches in name and description)
-        - sort_by: Sort field ("price" or "rating")
+        - search: Search keyword (word-prefix match in name and description)
+        - sort_by: Sort field ("price", "rating" or "relevance")
         - sort_order: Sort direction ("asc" or "desc")
+        - limit: Page size (1-100; omitted returns all matching items)
+        - offset: Items to skip (ignored when cursor is given)
+        - cursor: Opaque cursor from a previous response's next_cursor
+        - facets: "0" / "false" to omit facet counts (included by default)
+        - price_buckets: Price histogram buckets (1-20, default 5)
+
+        Caching:
+        - Responses carry a strong ETag derived from the catalog version and
+          the normalized parameters; a matching If-None-Match gets a 304
+        - Serialized bodies are kept in a bounded LRU cache
 
         Response format:
         {
             "items": [...],
-            "total": count,
+            "total": count of all matching items,
+            "limit": page size or null,
+            "offset": offset of this page,
+            "next_cursor": cursor for the next page or null,
             "categories": available category list,
             "price_range": {"min": min_price, "max": max_price},
             "filters_applied": {...},
-            "sort_applied": {...}
+            "sort_applied": {...},
+            "facets": {
+                "categories": [{"name", "count"}],  # other filters applied
+                "price": [{"min", "max", "count"}],  # histogram
+                "rating": [{"rating", "count"}]     # whole stars 0-5
+            }
         }
 
         Time complexity analysis (see menu_utils.py):
-        - Data retrieval: O(n)
+        - Data retrieval: O(1) from catalog snapshot
+          (O(n) rebuild only when the menu changes, see menu_catalog.py)
         - Filtering: O(n)
-        - Sorting: O(m log m), where m is number of filtered items
-        - Overall: O(n + m log m)
+        - Sorting: O(n) pass over a precomputed order
+          (stops after offset + limit rows when paging)
+        - Overall: O(n)
+        With MENU_QUERY_ENGINE=sql the work is pushed down to the database
+        instead (one page query + one aggregate query, see menu_sql.py).
         """
         # Get query parameters
         category = request.args.get("category", "").strip() or None
@@ -575,50 +682,226 @@ def init_main_routes(app) -> None:
                 pass
 
         # Validate sort parameters
-        if sort_by not in ("price", "rating"):
+        if sort_by not in ("price", "rating", "relevance"):
             sort_by = "price"
         if sort_order not in ("asc", "desc"):
             sort_order = "asc"
 
-        # Get raw data from database (does not use SQL ORDER BY)
-        all_items = _get_all_menu_items_from_db()
-
-        # Use manually implemented quick sort for filtering and sorting
-        result = filter_and_sort_menu(
-            items=all_items,
-            category=category,
-            min_price=min_price,
-            max_price=max_price,
-            search_query=search_query,
-            sort_by=sort_by,
-            sort_order=sort_order
+        # Facet parameters (counted in the same pass as filtering)
+        want_facets = request.args.get("facets", "1").strip().lower() not in (
+            "0", "false", "no"
+        )
+        try:
+            price_buckets = int(request.args.get(
+                "price_buckets", DEFAULT_PRICE_BUCKETS
+            ))
+        except ValueError:
+            price_buckets = DEFAULT_PRICE_BUCKETS
+        price_buckets = max(1, min(price_buckets, MAX_PRICE_BUCKETS))
+        if not want_facets:
+            price_buckets = None
+
+        # Paging parameters; a cursor is only valid for the same filters
+        limit = parse_limit(request.args.get("limit"))
+        signature = hashlib.sha1(repr((
+            category, min_price, max_price, search_query, sort_by, sort_order
+        )).encode("utf-8")).hexdigest()[:12]
+        try:
+            offset, signature = resolve_offset_cursor(
+                request.args.get("cursor", "").strip() or None,
+                parse_offset(request.args.get("offset")),
+                signature,
+            )
+        except InvalidCursor as exc:
+            return jsonify({"error": str(exc)}), 400
+
+        if menu_engine == "sql":
+            # Only the version stamp is needed, no snapshot is built
+            catalog = None
+            version = menu_catalog_cache.current_version()
+        else:
+            # Get shared catalog snapshot (does not use SQL ORDER BY)
+            catalog = get_menu_catalog()
+            version = catalog.version
+
+        # The response depends only on the engine, the catalog version and
+        # the normalized parameters: they form both the cache key and ETag
+        cache_key = (
+            menu_engine, version, category, min_price, max_price,
+            search_query, sort_by, sort_order, limit, offset, price_buckets,
         )
+        etag = hashlib.sha1(repr(cache_key).encode("utf-8")).hexdigest()
+
+        # Browser already has this exact response
+        if request.if_none_match.contains(etag):
+            return _menu_json_response(b"", etag, status=304)
+
+        body = menu_response_cache.get(cache_key)
+        if body is MISSING:
+            body = jsonify(_build_menu_payload(
+                catalog, category, min_price, max_price, search_query,
+                sort_by, sort_order, limit, offset, signature, price_buckets,
+            )).get_data()
+            menu_response_cache.set(cache_key, body)
+
+        return _menu_json_response(body, etag)
+
+    @app.get("/api/menu/<int:item_id>/pairings")
+    def api_menu_pairings(item_id: int):
+        """
+        "Frequently bought together" add-ons for a menu item, from the
+        mined pairings index (see recommendation_pairings.py).
 
-        # Get all available categories (for frontend filter dropdown)
-        categories = get_unique_categories(all_items)
+        Query parameters:
+        - limit: Number of pairings (1-10, default 3)
+
+        Response format:
+        {
+            "item_id": item_id,
+            "pairings": [{menu item fields..., "support", "confidence",
+                          "lift"}]  # best first
+        }
+
+        Time complexity: O(1) index lookup + O(limit)
+        """
+        try:
+            limit = int(request.args.get("limit", 3))
+        except ValueError:
+            return jsonify({"error": "limit must be an integer"}), 400
+        limit = max(1, min(limit, MAX_PAIRINGS))
+
+        catalog = get_menu_catalog()
+        row_by_id = catalog.index.row_by_id
+        if item_id not in row_by_id:
+            return jsonify({"error": "Menu item not found"}), 404
+
+        pairings = []
+        for rule in get_pairings(item_id, limit):
+            row = row_by_id.get(rule["id"])
+            if row is None:
+                # Deleted since the last mining run
+                continue
+            pairings.append({**catalog.items[row], **rule})
+
+        response = jsonify({"item_id": item_id, "pairings": pairings})
+        # Same for every user; changes only with a new mining run
+        response.headers["Cache-Control"] = "public, max-age=300"
+        return response
+
+    def _build_menu_payload(
+        catalog, category, min_price, max_price, search_query,
+        sort_by, sort_order, limit, offset, signature, price_buckets,
+    ) -> dict:
+        """
+        Filter / sort / page the menu and build the /api/menu payload.
 
-        # Get price range (for frontend price slider)
-        price_range = get_price_range(all_items)
+        `catalog` is None when the SQL engine is active;
+        `price_buckets` is None when facets are not wanted.
+        """
+        if catalog is None:
+            # Pushed down to the database (menu_sql.py)
+            result = query_menu_page(
+                category=category,
+                min_price=min_price,
+                max_price=max_price,
+                search_query=search_query,
+                sort_by=sort_by,
+                sort_order=sort_order,
+                limit=limit,
+                offset=offset
+            )
+            categories, price_range = query_menu_facets()
+            if price_buckets is not None:
+                result["facets"] = query_menu_facet_counts(
+                    category, min_price, max_price, search_query,
+                    categories, price_range, price_buckets
+                )
+        else:
+            # Columnar filtering on the catalog index,
+            # precomputed sort orders for sorting
+            result = filter_and_sort_menu(
+                items=catalog.index,
+                category=category,
+                min_price=min_price,
+                max_price=max_price,
+                search_query=search_query,
+                sort_by=sort_by,
+                sort_order=sort_order,
+                limit=limit,
+                offset=offset,
+                facets=price_buckets is not None,
+                price_buckets=price_buckets or DEFAULT_PRICE_BUCKETS
+            )
+            # Available categories (for frontend filter dropdown)
+            # and price range (for frontend price slider),
+            # both precomputed once per catalog version
+            categories = list(catalog.categories)
+            price_range = catalog.price_range
+
+        next_cursor = None
+        if limit is not None:
+            next_cursor = next_offset_cursor(
+                offset, limit, result["total"], signature
+            )
 
         # Handle no search results case
         if result["total"] == 0:
-            return jsonify({
+            payload = {
                 "items": [],
                 "total": 0,
+                "limit": limit,
+                "offset": offset,
+                "next_cursor": None,
                 "message": "No items found matching your criteria.",
                 "categories": categories,
                 "price_range": price_range,
                 "filters_applied": result["filters_applied"],
                 "sort_applied": result["sort_applied"]
-            })
+            }
+        else:
+            payload = {
+                "items": result["items"],
+                "total": result["total"],
+                "limit": limit,
+                "offset": offset,
+                "next_cursor": next_cursor,
+                "categories": categories,
+                "price_range": price_range,
+                "filters_applied": result["filters_applied"],
+                "sort_applied": result["sort_applied"]
+            }
+
+        if "facets" in result:
+            payload["facets"] = result["facets"]
+        return payload
+
+    def _menu_json_response(body: bytes, etag: str, status: int = 200):
+        """
+        JSON response with a strong ETag; clients must revalidate
+        (If-None-Match) before reusing their copy.
+        """
+        response = app.response_class(
+            body, status=status, mimetype="application/json"
+        )
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "no-cache"
+        return response
+
+    @app.get("/api/admin/metrics")
+    def api_admin_metrics():
+        """
+        Cache counters for tuning (admin only).
+        """
+        if not session.get("user_id") or not session.get("is_admin"):
+            return jsonify({"error": "Forbidden"}), 403
 
         return jsonify({
-            "items": result["items"],
-            "total": result["total"],
-            "categories": categories,
-            "price_range": price_range,
-            "filters_applied": result["filters_applied"],
-            "sort_applied": result["sort_applied"]
+            "menu_catalog": menu_catalog_cache.stats(),
+            "menu_responses": menu_response_cache.stats(),
+            "recommendations": recommendation_cache.stats(),
+            "trending": trending_stats(),
+            "pairings": pairings_index.stats(),
+            "snapshot": snapshot_stats(),
         })
 
     @app.route("/gallery")
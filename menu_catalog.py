@@ -0,0 +1,256 @@
+"""
+Menu catalog snapshot module
+
+Keeps an immutable, in-process snapshot of the menu_items table that is
+shared by every request handled by this worker.
+
+Why:
+- /menu and /api/menu previously ran db.query(MenuItem).all(),
+  converted every Numeric price to float and called url_for per row
+  on every request, although the menu only changes a few times a day.
+
+How invalidation works:
+- A local version stamp is bumped whenever an admin edits menu items
+  through MenuItemModelView (see admin.py).
+- An aggregate probe runs at most once every `probe_interval`
+  seconds: COUNT(*), MAX(id), MAX(updated_at). Inserts and deletes
+  move the count / MAX(id); every update moves MAX(updated_at)
+  (stamped by the ORM, and on MySQL by a trigger, so edits made by
+  other workers or directly in SQL are picked up within one interval,
+  see sql/Menu_Items_Updated_At.sql).
+- The snapshot is only rebuilt when one of the two stamps changes.
+
+Time complexity:
+- Snapshot hit: O(1)
+- Probe: one aggregate query; MAX(id) / MAX(updated_at) are index
+  lookups, COUNT(*) scans the smallest index
+- Rebuild: O(n log n), n is number of menu items
+  (includes building the columnar MenuIndex and its sort orders)
+"""
+
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from flask import url_for
+from sqlalchemy import func
+
+from auth import db_session, MenuItem
+from menu_utils import SORTABLE_COLUMNS, MenuIndex
+
+
+def menu_item_to_dict(item: MenuItem) -> Dict[str, Any]:
+    """
+    Convert a MenuItem row to the dictionary format used by the menu API.
+
+    Must be called inside a Flask app/request context (url_for).
+    """
+    return {
+        "id": item.id,
+        "name": item.name,
+        "price": float(item.price),
+        "description": item.description or "",
+        "image_url": url_for(
+            "static",
+            filename=(item.image_url or "").replace("../", ""),
+        ),
+        "category": item.category or "",
+        "rating": float(item.rating or 0),
+    }
+
+
+class MenuCatalog:
+    """
+    Immutable snapshot of the menu catalog.
+
+    Attributes:
+        version: (local version stamp, database fingerprint)
+        items: Tuple of menu item dictionaries (treat as read-only)
+        index: Columnar MenuIndex over `items` (see menu_utils.py)
+        categories: Alphabetically sorted unique category list
+        price_range: {"min": ..., "max": ...}
+        built_at: time.time() when the snapshot was built
+    """
+
+    __slots__ = (
+        "version", "items", "index", "categories", "price_range", "built_at"
+    )
+
+    def __init__(
+        self,
+        version: Tuple[int, Any],
+        items: Tuple[Dict, ...],
+        previous: Optional["MenuCatalog"] = None,
+    ):
+        self.version = version
+        self.items = items
+        # Reuse the previous search index, re-tokenizing changed items only
+        self.index = MenuIndex(
+            items, previous=previous.index if previous else None
+        )
+        # Build all sort permutations now (under the rebuild lock)
+        # rather than on the first request that needs them
+        for sort_by in SORTABLE_COLUMNS:
+            for reverse in (False, True):
+                self.index.sorted_rows(sort_by, reverse)
+        # Collected while building the index (no extra passes / sort)
+        self.categories = tuple(self.index.category_names)
+        self.price_range = self.index.price_range
+        self.built_at = time.time()
+
+
+class MenuCatalogCache:
+    """
+    Holds the current MenuCatalog snapshot and decides when to rebuild it.
+
+    All requests in a worker share one instance (see `menu_catalog_cache`).
+    Reads are lock-free; rebuilds are serialized by a lock so that a burst
+    of requests after an invalidation only triggers a single rebuild.
+    """
+
+    def __init__(self, probe_interval: float = 5.0):
+        self.probe_interval = probe_interval
+        self._lock = threading.Lock()
+        self._snapshot: Optional[MenuCatalog] = None
+        self._local_version = 0
+        self._fingerprint: Any = None
+        self._next_probe_at = 0.0
+
+        # Counters (see stats())
+        self.hits = 0
+        self.misses = 0
+        self.rebuilds = 0
+        self.probes = 0
+
+    def bump_version(self) -> None:
+        """
+        Mark the current snapshot as stale.
+
+        Called after admin create / update / delete of menu items.
+        """
+        with self._lock:
+            self._local_version += 1
+            # Force a probe on next access as well
+            self._next_probe_at = 0.0
+
+    def get(self) -> MenuCatalog:
+        """
+        Return the current catalog snapshot, rebuilding it if stale.
+
+        Must be called inside a Flask app/request context
+        (url_for is used to resolve image URLs during rebuild).
+        """
+        snapshot = self._snapshot
+        if (snapshot is not None and
+                snapshot.version[0] == self._local_version and
+                time.monotonic() < self._next_probe_at):
+            self.hits += 1
+            return snapshot
+
+        with self._lock:
+            version = self._current_version_locked()
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.version == version:
+                self.hits += 1
+                return snapshot
+
+            self.misses += 1
+            snapshot = self._build(version, previous=snapshot)
+            self._snapshot = snapshot
+            self.rebuilds += 1
+            return snapshot
+
+    def current_version(self) -> Tuple[int, Any]:
+        """
+        Return the catalog version stamp without building a snapshot.
+
+        Used by the SQL menu engine (menu_sql.py), which never loads the
+        whole table but still needs a version for response caching.
+        Costs at most one aggregate probe per `probe_interval`.
+        """
+        with self._lock:
+            return self._current_version_locked()
+
+    def _current_version_locked(self) -> Tuple[int, Any]:
+        # Caller holds self._lock
+        if time.monotonic() >= self._next_probe_at:
+            self._fingerprint = self._probe()
+            self._next_probe_at = time.monotonic() + self.probe_interval
+        return (self._local_version, self._fingerprint)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return hit / miss / rebuild counters for monitoring.
+        """
+        snapshot = self._snapshot
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "rebuilds": self.rebuilds,
+            "probes": self.probes,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0,
+            "local_version": self._local_version,
+            "item_count": len(snapshot.items) if snapshot else 0,
+            "built_at": snapshot.built_at if snapshot else None,
+        }
+
+    def _probe(self) -> Tuple:
+        """
+        Change detection: one aggregate query over indexes, no rows
+        transferred.
+
+        Returns:
+            (row count, MAX(id), MAX(updated_at)), see module docstring
+        """
+        self.probes += 1
+        db = db_session()
+        try:
+            return tuple(db.query(
+                func.count(),
+                func.max(MenuItem.id),
+                func.max(MenuItem.updated_at),
+            ).select_from(MenuItem).one())
+        finally:
+            db.close()
+
+    def _build(
+        self,
+        version: Tuple[int, Any],
+        previous: Optional[MenuCatalog] = None,
+    ) -> MenuCatalog:
+        """
+        Load all menu items and convert them to dictionaries once.
+
+        Time complexity: O(n)
+        """
+        db = db_session()
+        try:
+            rows = db.query(MenuItem).all()
+            items = tuple(menu_item_to_dict(item) for item in rows)
+        finally:
+            db.close()
+
+        return MenuCatalog(
+            version=version,
+            items=items,
+            previous=previous,
+        )
+
+
+# Shared by all requests in this worker process
+menu_catalog_cache = MenuCatalogCache()
+
+
+def get_menu_catalog() -> MenuCatalog:
+    """
+    Get the current menu catalog snapshot for this worker.
+    """
+    return menu_catalog_cache.get()
+
+
+def bump_menu_version() -> None:
+    """
+    Invalidate the menu catalog snapshot (after menu item edits).
+    """
+    menu_catalog_cache.bump_version()
@@ -0,0 +1,251 @@
+"""
+Menu full-text search module
+
+Token-level inverted index over menu item name and description,
+used by MenuIndex (menu_utils.py) for the menu `search` parameter.
+
+Structure:
+- postings: token -> {item_id: weight}
+  weight = NAME_WEIGHT * (occurrences in name) + (occurrences in description)
+- vocabulary: sorted token list, for prefix (type-ahead) lookup with bisect
+- documents: item_id -> (name, description, tokens), for incremental updates
+
+Query semantics:
+- Query is tokenized the same way as documents
+- Every query token is matched as a prefix ("choc" matches "chocolate")
+- An item must match all query tokens (AND)
+- Relevance score = sum over query tokens of weight * idf,
+  exact token matches count double compared to prefix-only matches
+
+Time complexity:
+- Build: O(total tokens)
+- Add / remove / update one item: O(tokens in that item + new vocabulary)
+- Query: O(q * (log V + e + p)), q query tokens, V vocabulary size,
+  e prefix expansions, p posting list length
+  (independent of catalog size for selective queries)
+"""
+
+import math
+import re
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Matches in the item name are worth more than matches in the description
+NAME_WEIGHT = 3
+# Score multiplier when a query token is only a prefix of the indexed token
+PREFIX_FACTOR = 0.5
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """
+    Split text into lowercase word tokens.
+
+    Example:
+        >>> tokenize("Crème Brûlée, 2 pcs")
+        ['crème', 'brûlée', '2', 'pcs']
+    """
+    if not text:
+        return []
+    return _TOKEN_RE.findall(text.lower())
+
+
+class InvertedIndex:
+    """
+    Inverted index over menu item name / description, keyed by item id.
+
+    Supports incremental add / remove / update, and cheap copy-on-write
+    copies so a new catalog snapshot can reuse the previous index while
+    the old snapshot is still being read by other requests.
+    """
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._vocabulary: List[str] = []
+        self._documents: Dict[int, Tuple[str, str, Tuple[str, ...]]] = {}
+        # Tokens whose posting dict belongs to this instance
+        # (others are shared with the index this one was copied from)
+        self._owned: Set[str] = set()
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def __contains__(self, item_id: int) -> bool:
+        return item_id in self._documents
+
+    # ------------------------------------------------------------------
+    # Maintenance
+    # ------------------------------------------------------------------
+
+    def copy(self) -> "InvertedIndex":
+        """
+        Return a copy that can be modified without affecting this index.
+
+        Posting dicts are shared until the copy modifies them.
+        Time complexity: O(V + D), V vocabulary size, D item count
+        """
+        clone = InvertedIndex()
+        clone._postings = dict(self._postings)
+        clone._vocabulary = list(self._vocabulary)
+        clone._documents = dict(self._documents)
+        # Posting dicts are now shared by both indexes
+        self._owned = set()
+        return clone
+
+    def add(self, item_id: int, name: str, description: str) -> None:
+        """
+        Index one item (replaces any previous entry for the same id).
+        """
+        if item_id in self._documents:
+            self.remove(item_id)
+
+        weights: Dict[str, int] = {}
+        for token in tokenize(name):
+            weights[token] = weights.get(token, 0) + NAME_WEIGHT
+        for token in tokenize(description):
+            weights[token] = weights.get(token, 0) + 1
+
+        for token, weight in weights.items():
+            postings = self._writable_postings(token)
+            postings[item_id] = weight
+
+        self._documents[item_id] = (
+            name or "", description or "", tuple(weights)
+        )
+
+    def remove(self, item_id: int) -> None:
+        """
+        Remove one item from the index (no-op if not indexed).
+        """
+        document = self._documents.pop(item_id, None)
+        if document is None:
+            return
+
+        for token in document[2]:
+            postings = self._writable_postings(token)
+            postings.pop(item_id, None)
+            if not postings:
+                del self._postings[token]
+                self._owned.discard(token)
+                pos = bisect_left(self._vocabulary, token)
+                if (pos < len(self._vocabulary) and
+                        self._vocabulary[pos] == token):
+                    del self._vocabulary[pos]
+
+    def update(self, item_id: int, name: str, description: str) -> bool:
+        """
+        Re-index one item if its text changed.
+
+        Returns:
+            True if the index was modified
+        """
+        document = self._documents.get(item_id)
+        if (document is not None and
+                document[0] == (name or "") and
+                document[1] == (description or "")):
+            return False
+        self.add(item_id, name, description)
+        return True
+
+    def sync(self, items: Iterable[Dict]) -> int:
+        """
+        Bring the index in line with a full item list, touching only
+        items that were added, removed or whose text changed.
+
+        Returns:
+            Number of items re-indexed or removed
+        """
+        changed = 0
+        seen = set()
+        for item in items:
+            item_id = item.get("id")
+            seen.add(item_id)
+            if self.update(
+                item_id, item.get("name") or "", item.get("description") or ""
+            ):
+                changed += 1
+
+        for item_id in [i for i in self._documents if i not in seen]:
+            self.remove(item_id)
+            changed += 1
+        return changed
+
+    def _writable_postings(self, token: str) -> Dict[int, int]:
+        postings = self._postings.get(token)
+        if postings is None:
+            postings = {}
+            self._postings[token] = postings
+            self._owned.add(token)
+            insort(self._vocabulary, token)
+        elif token not in self._owned:
+            postings = dict(postings)
+            self._postings[token] = postings
+            self._owned.add(token)
+        return postings
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def expand_prefix(self, prefix: str) -> List[str]:
+        """
+        Return all indexed tokens starting with `prefix` (type-ahead).
+
+        Time complexity: O(log V + e), e is number of expansions
+        """
+        vocabulary = self._vocabulary
+        start = bisect_left(vocabulary, prefix)
+        result = []
+        for pos in range(start, len(vocabulary)):
+            token = vocabulary[pos]
+            if not token.startswith(prefix):
+                break
+            result.append(token)
+        return result
+
+    def search(self, query: Optional[str]) -> Dict[int, float]:
+        """
+        Find items matching every query token (prefix match),
+        with a relevance score for each.
+
+        Returns:
+            {item_id: relevance score}; empty dict when nothing matches
+            or the query has no tokens
+        """
+        query_tokens = tokenize(query)
+        if not query_tokens:
+            return {}
+
+        total_docs = max(len(self._documents), 1)
+        # One {item_id: score} dict per query token
+        per_token: List[Dict[int, float]] = []
+
+        for query_token in query_tokens:
+            token_scores: Dict[int, float] = {}
+            for token in self.expand_prefix(query_token):
+                postings = self._postings[token]
+                idf = math.log(1.0 + total_docs / len(postings))
+                factor = 1.0 if token == query_token else PREFIX_FACTOR
+                for item_id, weight in postings.items():
+                    token_scores[item_id] = (
+                        token_scores.get(item_id, 0.0) +
+                        weight * idf * factor
+                    )
+            if not token_scores:
+                return {}
+            per_token.append(token_scores)
+
+        # Intersect, starting from the smallest result set
+        smallest = min(per_token, key=len)
+        result = {}
+        for item_id in smallest:
+            score = 0.0
+            for token_scores in per_token:
+                token_score = token_scores.get(item_id)
+                if token_score is None:
+                    break
+                score += token_score
+            else:
+                result[item_id] = score
+        return result
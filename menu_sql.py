@@ -0,0 +1,354 @@
+"""
+SQL menu engine module
+
+Alternative to the in-process catalog snapshot (menu_catalog.py) for
+/api/menu: filtering, sorting and paging are pushed down to the database,
+so a worker never loads the whole menu_items table.
+
+Selected with the MENU_QUERY_ENGINE setting (environment variable or
+app.config, see flask_app.py):
+- "memory" (default): catalog snapshot + columnar MenuIndex
+- "sql": this module
+
+Per request (cache miss) the engine runs:
+1. One parameterized page query:
+   WHERE category / price range / search terms
+   ORDER BY price | rating | relevance, id
+   LIMIT / OFFSET
+   with COUNT(*) OVER () for the total, so no separate count query
+   (a count query only runs when the requested page is past the end)
+2. One aggregate query (GROUP BY category with MIN / MAX price)
+   for the category list and price range
+3. With facets: one GROUP BY category, price, rating query under the
+   search filter; category / price / rating facets are then counted
+   from those groups in a single Python pass (like
+   MenuIndex.select_rows_with_facets, but over groups instead of rows)
+
+Semantics match filter_and_sort_menu on a MenuIndex:
+- Category: exact match, case-insensitive (MySQL's default collation,
+  LOWER() elsewhere)
+- Price: min_price <= price <= max_price
+- Search: every query token must match the start of a word in the
+  name or description. On MySQL that is the FULLTEXT index:
+  MATCH (name, description) AGAINST ('+tok*' IN BOOLEAN MODE), whose
+  parser splits words on punctuation like tokenize does ("fried"
+  matches "Chicken-Fried"); tokens shorter than FULLTEXT_MIN_TOKEN and
+  other databases (SQLite in development) fall back to a substring
+  LIKE '%tok%', which also matches inside words. InnoDB stopwords
+  ("the", "with", ...) are not indexed and match nothing required.
+  relevance = NAME_WEIGHT per name match + 1 per description match
+  (a simpler score than the inverted index: no term counts or idf,
+  so best-match order can differ between engines)
+- Ties are broken by item id ascending
+
+Indexes: see MenuItem.__table_args__ (auth.py) and
+sql/Menu_Items_Indexes.sql.
+
+Time complexity: index range scan + top (offset + limit) sort in the
+database; Python work is O(limit) for the returned page.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import case, func, or_
+from sqlalchemy.dialects.mysql import match
+
+from auth import db_session, MenuItem
+from menu_catalog import menu_item_to_dict
+from menu_search import NAME_WEIGHT, tokenize
+from menu_utils import (
+    DEFAULT_PRICE_BUCKETS,
+    RATING_BUCKETS,
+    build_menu_result,
+    format_facets,
+    price_bucket_bounds,
+)
+from sort_utils import stable_sort
+
+# Valid MENU_QUERY_ENGINE values
+MENU_ENGINES = ("memory", "sql")
+
+# Shortest word InnoDB FULLTEXT indexes (innodb_ft_min_token_size)
+FULLTEXT_MIN_TOKEN = 3
+
+
+def _is_mysql() -> bool:
+    return db_session.get_bind().dialect.name == "mysql"
+
+
+def _like_substring(column, token: str):
+    """
+    Condition: `column` contains `token` ("_" in tokens is a LIKE
+    wildcard and must be escaped).
+    """
+    escaped = token.replace("\\", "\\\\").replace("_", "\\_")
+    return column.like(f"%{escaped}%", escape="\\")
+
+
+def _word_prefix(columns, token: str, mysql: bool):
+    """
+    Condition: some word in one of `columns` starts with `token`.
+
+    MySQL: MATCH ... AGAINST('+tok*' IN BOOLEAN MODE) on the FULLTEXT
+    index over exactly these columns; elsewhere (and for tokens shorter
+    than FULLTEXT_MIN_TOKEN, which the index does not hold) a substring
+    LIKE, i.e. a superset of the word-prefix matches.
+    """
+    if mysql and len(token) >= FULLTEXT_MIN_TOKEN:
+        return match(*columns, against=f"+{token}*").in_boolean_mode() > 0
+    return or_(*(_like_substring(column, token) for column in columns))
+
+
+def _search_terms(search_query: Optional[str]) -> Tuple[List[Any], Any]:
+    """
+    Build (WHERE conditions, relevance expression) for a search query.
+
+    The WHERE side searches name and description together (one FULLTEXT
+    index on MySQL); relevance is only evaluated on the matching rows.
+    """
+    mysql = _is_mysql()
+    conditions = []
+    score_parts = []
+    for token in tokenize(search_query):
+        conditions.append(_word_prefix(
+            (MenuItem.name, MenuItem.description), token, mysql
+        ))
+        in_name = _word_prefix((MenuItem.name,), token, mysql)
+        in_description = _word_prefix((MenuItem.description,), token, mysql)
+        score_parts.append(case((in_name, NAME_WEIGHT), else_=0))
+        score_parts.append(case((in_description, 1), else_=0))
+
+    relevance = None
+    for part in score_parts:
+        relevance = part if relevance is None else relevance + part
+    return conditions, relevance
+
+
+def _filter_conditions(
+    category: Optional[str],
+    min_price: Optional[float],
+    max_price: Optional[float]
+) -> List[Any]:
+    """
+    WHERE conditions for the category and price filters.
+    """
+    conditions = []
+    if category:
+        key = category.strip().lower()
+        if _is_mysql():
+            # The default collation already ignores case (and keeps the
+            # category indexes usable)
+            conditions.append(MenuItem.category == key)
+        else:
+            conditions.append(func.lower(MenuItem.category) == key)
+    if min_price is not None:
+        conditions.append(MenuItem.price >= min_price)
+    if max_price is not None:
+        conditions.append(MenuItem.price <= max_price)
+    return conditions
+
+
+def query_menu_page(
+    category: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    search_query: Optional[str] = None,
+    sort_by: str = "price",
+    sort_order: str = "asc",
+    limit: Optional[int] = None,
+    offset: int = 0
+) -> Dict[str, Any]:
+    """
+    Filter, sort and page menu items in the database.
+
+    Takes the same arguments as filter_and_sort_menu (menu_utils.py)
+    and returns the same result dictionary.
+
+    Must be called inside a Flask app/request context (image URLs).
+    """
+    reverse = sort_order.lower() == "desc"
+
+    conditions = _filter_conditions(category, min_price, max_price)
+
+    relevance = None
+    if search_query:
+        search_conditions, relevance = _search_terms(search_query)
+        if not search_conditions:
+            # Query without any word characters matches nothing
+            return build_menu_result(
+                [], 0, category, min_price, max_price, search_query,
+                sort_by, sort_order, limit, offset
+            )
+        conditions.extend(search_conditions)
+
+    if sort_by == "relevance":
+        # Best match first; without a search query keep catalog order
+        sort_order = "desc"
+        order_by = [MenuItem.id.asc()]
+        if relevance is not None:
+            order_by.insert(0, relevance.desc())
+    else:
+        column = MenuItem.price if sort_by == "price" else MenuItem.rating
+        order_by = [
+            column.desc() if reverse else column.asc(),
+            MenuItem.id.asc(),
+        ]
+
+    db = db_session()
+    try:
+        query = db.query(MenuItem, func.count().over().label("total"))
+        if conditions:
+            query = query.filter(*conditions)
+        query = query.order_by(*order_by)
+        if offset:
+            query = query.offset(offset)
+        if limit is not None:
+            query = query.limit(limit)
+        rows = query.all()
+
+        if rows:
+            total = rows[0].total
+        elif offset:
+            # Page past the end: the window count has no row to ride on
+            count_query = db.query(func.count(MenuItem.id))
+            if conditions:
+                count_query = count_query.filter(*conditions)
+            total = count_query.scalar() or 0
+        else:
+            total = 0
+
+        page_items = [menu_item_to_dict(row[0]) for row in rows]
+    finally:
+        db.close()
+
+    return build_menu_result(
+        page_items, total, category, min_price, max_price, search_query,
+        sort_by, sort_order, limit, offset
+    )
+
+
+def query_menu_facets() -> Tuple[List[str], Dict[str, float]]:
+    """
+    Category list and price range from one aggregate query.
+
+    Returns:
+        (alphabetically sorted unique categories, {"min": ..., "max": ...}),
+        the same values get_unique_categories / get_price_range
+        compute from a full item list
+    """
+    db = db_session()
+    try:
+        rows = db.query(
+            MenuItem.category,
+            func.min(MenuItem.price),
+            func.max(MenuItem.price),
+        ).group_by(MenuItem.category).all()
+    finally:
+        db.close()
+
+    seen = set()
+    categories = []
+    low = None
+    high = None
+    for category, row_min, row_max in rows:
+        name = (category or "").strip()
+        if name and name not in seen:
+            seen.add(name)
+            categories.append(name)
+        if row_min is not None and (low is None or row_min < low):
+            low = row_min
+        if row_max is not None and (high is None or row_max > high):
+            high = row_max
+
+    price_range = {
+        "min": float(low) if low is not None else 0.0,
+        "max": float(high) if high is not None else 0.0,
+    }
+    return stable_sort(categories, key=str.lower), price_range
+
+
+def query_menu_facet_counts(
+    category: Optional[str],
+    min_price: Optional[float],
+    max_price: Optional[float],
+    search_query: Optional[str],
+    categories: List[str],
+    price_range: Dict[str, float],
+    price_buckets: int = DEFAULT_PRICE_BUCKETS
+) -> Dict[str, Any]:
+    """
+    Facet counts (see menu_utils.py, Facets) from one grouped query.
+
+    Each facet counts items under the other active filters, the same as
+    MenuIndex.select_rows_with_facets.
+
+    Args:
+        categories: Sorted category list from query_menu_facets
+        price_range: Catalog price range from query_menu_facets
+                     (histogram bounds)
+
+    Time complexity: one GROUP BY query, then O(g) in Python,
+    g is number of distinct (category, price, rating) groups
+    """
+    bounds = price_bucket_bounds(price_range, price_buckets)
+    bucket_low, bucket_width, bucket_count = bounds
+    last_bucket = bucket_count - 1
+
+    position = {name.lower(): i for i, name in enumerate(categories)}
+    category_counts = [0] * len(categories)
+    price_counts = [0] * bucket_count
+    rating_counts = [0] * RATING_BUCKETS
+
+    search_conditions: List[Any] = []
+    if search_query:
+        search_conditions, _ = _search_terms(search_query)
+        if not search_conditions:
+            return format_facets(
+                [(name, 0) for name in categories],
+                bounds, price_counts, rating_counts
+            )
+
+    db = db_session()
+    try:
+        query = db.query(
+            MenuItem.category,
+            MenuItem.price,
+            MenuItem.rating,
+            func.count(MenuItem.id),
+        )
+        if search_conditions:
+            query = query.filter(*search_conditions)
+        groups = query.group_by(
+            MenuItem.category, MenuItem.price, MenuItem.rating
+        ).all()
+    finally:
+        db.close()
+
+    wanted = category.strip().lower() if category else None
+    low = float(min_price) if min_price is not None else float("-inf")
+    high = float(max_price) if max_price is not None else float("inf")
+
+    for group_category, price, rating, count in groups:
+        key = (group_category or "").strip().lower()
+        price = float(price)
+        in_price = low <= price <= high
+        if in_price and key in position:
+            category_counts[position[key]] += count
+        if wanted is None or key == wanted:
+            if bucket_width:
+                bucket = int((price - bucket_low) / bucket_width)
+                price_counts[
+                    bucket if bucket < last_bucket else last_bucket
+                ] += count
+            else:
+                price_counts[0] += count
+            if in_price:
+                star = int(float(rating or 0))
+                rating_counts[
+                    0 if star < 0 else (star if star < 5 else 5)
+                ] += count
+
+    return format_facets(
+        list(zip(categories, category_counts)),
+        bounds, price_counts, rating_counts
+    )
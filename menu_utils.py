@@ -6,183 +6,64 @@ functionality for menu data processing.
 Does not use SQL ORDER BY or Python's built-in .sort() method.
 
 Time complexity analysis:
-- Quick Sort: Average time complexity O(n log n), worst case O(n²)
-  - Worst case occurs when pivot selection is poor
-    (e.g., selecting first/last element of sorted array)
-  - This implementation uses "median of three" strategy
-    to optimize pivot selection,
-    reducing worst case probability
-  - Space complexity O(log n) (recursive call stack)
+- Sorting: stable merge sort (sort_utils.py), O(n log n) worst case
+  - Also on duplicate-heavy, sorted or reverse-sorted input
+  - Iterative, so large catalogs cannot hit the recursion limit
+  - Space complexity O(n)
 
 - Filtering operation: O(n),
   requires traversing all items for condition checking
 - Overall complexity: O(n) + O(n log n) = O(n log n)
+
+Columnar index (MenuIndex):
+- Built once per catalog version: O(n)
+- Prices / ratings stored in contiguous arrays, categories integer-coded,
+  name / description tokenized into an inverted index (menu_search.py)
+- Filtering then works on row numbers (selection vectors) and only
+  materializes dictionaries for the rows that survive
 """
 
-from typing import List, Dict, Any, Optional, Callable
+import heapq
+from array import array
+from bisect import insort
+from itertools import islice
+from typing import List, Dict, Any, Optional, Callable, Sequence, Union
+
+from cache_utils import LRUCache, MISSING
+from menu_search import InvertedIndex
+from sort_utils import stable_sort
 
 # ==============================================================================
-# Quick Sort Algorithm Implementation
+# Sorting
 # ==============================================================================
 #
-# Algorithm principle:
-# 1. Select a pivot element
-# 2. Partition array into two parts: elements less than pivot
-#    and elements greater than pivot
-# 3. Recursively sort the two sub-arrays
-# 4. Combine results
+# Sorting is done by the shared merge sort engine (sort_utils.py):
+# - Stable: equal values keep their relative order
+# - O(n log n) worst case, also on duplicate-heavy or presorted input
+# - Iterative: no recursion depth limit on large catalogs
 # ==============================================================================
 
 
-def _get_pivot_index(
-    arr: List[Dict], low: int, high: int, key_func: Callable
-) -> int:
-    """
-    Select pivot index using "median of three" strategy
-    to optimize worst-case performance.
-
-    Compare values of arr[low], arr[mid], arr[high],
-    return index of median value.
-    This avoids O(n²) worst case on sorted or
-    reverse-sorted arrays.
-
-    Time complexity: O(1)
-    """
-    mid = (low + high) // 2
-
-    val_low = key_func(arr[low])
-    val_mid = key_func(arr[mid])
-    val_high = key_func(arr[high])
-
-    # Find index corresponding to median value
-    if (val_low <= val_mid <= val_high or
-            val_high <= val_mid <= val_low):
-        return mid
-    elif (val_mid <= val_low <= val_high or
-          val_high <= val_low <= val_mid):
-        return low
-    else:
-        return high
-
-
-def _partition(
-    arr: List[Dict],
-    low: int,
-    high: int,
-    key_func: Callable,
-    reverse: bool = False
-) -> int:
-    """
-    Partition function: divide array into two parts.
-
-    Uses Lomuto partition scheme:
-    1. Select pivot and move it to the end
-    2. Maintain an index i representing the boundary of
-       "less than pivot region"
-    3. Traverse array, swap qualifying elements to the front
-    4. Finally place pivot in correct position
-
-    Time complexity: O(n), where n = high - low + 1
-    Space complexity: O(1)
-
-    Args:
-        arr: Array to partition
-        low: Partition start index
-        high: Partition end index
-        key_func: Function to extract sort key
-        reverse: Whether to sort in descending order
-
-    Returns:
-        Final position index of pivot
-    """
-    # Use median of three to select pivot
-    pivot_idx = _get_pivot_index(arr, low, high, key_func)
-
-    # Move pivot to end
-    arr[pivot_idx], arr[high] = arr[high], arr[pivot_idx]
-    pivot_value = key_func(arr[high])
-
-    # i is the boundary of "less than pivot region"
-    i = low - 1
-
-    for j in range(low, high):
-        current_value = key_func(arr[j])
-
-        # Determine comparison logic based on sort direction
-        if reverse:
-            # Descending: larger values first
-            should_swap = current_value > pivot_value
-        else:
-            # Ascending: smaller values first
-            should_swap = current_value < pivot_value
-
-        if should_swap:
-            i += 1
-            arr[i], arr[j] = arr[j], arr[i]
-
-    # Place pivot in correct position
-    arr[i + 1], arr[high] = arr[high], arr[i + 1]
-
-    return i + 1
-
-
-def _quick_sort_recursive(
-    arr: List[Dict],
-    low: int,
-    high: int,
-    key_func: Callable,
-    reverse: bool = False
-) -> None:
-    """
-    Recursive quick sort implementation (in-place sorting).
-
-    Recursion termination condition: low >= high
-    (sub-array is empty or has one element)
-
-    Time complexity: O(n log n) average, O(n²) worst case
-    Space complexity: O(log n) recursive stack space
-
-    Args:
-        arr: Array to sort (modified in-place)
-        low: Sort range start index
-        high: Sort range end index
-        key_func: Function to extract sort key
-        reverse: Whether to sort in descending order
-    """
-    if low < high:
-        # Partition and get pivot position
-        pivot_index = _partition(arr, low, high, key_func, reverse)
-
-        # Recursively sort left and right sub-arrays
-        _quick_sort_recursive(
-            arr, low, pivot_index - 1, key_func, reverse
-        )
-        _quick_sort_recursive(
-            arr, pivot_index + 1, high, key_func, reverse
-        )
-
-
 def quick_sort(
     items: List[Dict],
     sort_by: str = "price",
     reverse: bool = False
 ) -> List[Dict]:
     """
-    Perform quick sort on menu item list.
+    Sort a menu item list by one field.
 
-    This is the main entry function for quick sort,
-    supports sorting by different fields.
+    The name is kept for existing callers; the implementation is the
+    stable merge sort from sort_utils.py (it used to be an unstable
+    recursive quick sort, O(n²) worst case).
 
     Algorithm characteristics:
-    - In-place sorting, but returns new list here
-      to keep original data unchanged
-    - Unstable sort (relative order of equal elements may change)
-    - Uses "median of three" to optimize pivot selection
+    - Returns a new list, original data unchanged
+    - Stable sort (equal values keep their input order,
+      also when sorting descending)
+    - Sort key computed once per item
 
-    Time complexity analysis:
-    - Partition operation: O(n)
-    - Recursion depth: O(log n) average, O(n) worst case
-    - Overall: O(n log n) average, O(n²) worst case
+    Time complexity: O(n log n) worst case
+    Space complexity: O(n)
 
     Args:
         items: List of menu item dictionaries
@@ -207,23 +88,125 @@ def quick_sort(
     if not items:
         return []
 
-    # Copy list to keep original data unchanged
-    result = items.copy()
-
-    # Define key extraction function
+    # Handle None or invalid values as 0.0
     def key_func(item: Dict) -> float:
-        value = item.get(sort_by, 0)
-        # Handle None or invalid values
-        try:
-            return float(value) if value is not None else 0.0
-        except (TypeError, ValueError):
-            return 0.0
+        return _to_float(item.get(sort_by, 0))
 
-    # Execute quick sort
-    if len(result) > 1:
-        _quick_sort_recursive(result, 0, len(result) - 1, key_func, reverse)
+    return stable_sort(items, key=key_func, reverse=reverse)
 
-    return result
+
+# ==============================================================================
+# Top-k Selection
+# ==============================================================================
+#
+# When only the first k items in sort order are needed (one page),
+# a bounded heap avoids ordering all m items:
+# - Time complexity: O(m log k) instead of O(m log m)
+# - Space complexity: O(k)
+# ==============================================================================
+
+
+def select_top_k(
+    items: Sequence[Any],
+    k: Optional[int],
+    key_func: Callable[[Any], Any]
+) -> List[Any]:
+    """
+    Return the k smallest items by key_func, in ascending key order.
+
+    Uses a bounded heap (heapq.nsmallest), which is stable
+    for equal keys. With k None or k >= len(items) all items are
+    ordered (stable merge sort, keys computed once).
+
+    Args:
+        items: Items to select from
+        k: Number of items wanted (None means all)
+        key_func: Ascending sort key
+
+    Returns:
+        New list with at most k items
+    """
+    m = len(items)
+    if k is not None and k < m:
+        if k <= 0:
+            return []
+        return heapq.nsmallest(k, items, key=key_func)
+
+    return stable_sort(items, key=key_func)
+
+
+# ==============================================================================
+# Facets
+# ==============================================================================
+#
+# Counts shown next to the menu filters, computed in the same pass as
+# filtering (see MenuIndex.select_rows_with_facets and menu_sql.py):
+# - categories: [{"name", "count"}], alphabetical
+# - price: equal-width histogram over the catalog price range,
+#   [{"min", "max", "count"}]
+# - rating: whole-star histogram, [{"rating": 0..5, "count"}]
+#   (bucket s holds ratings s <= r < s + 1; 5 holds 5.0)
+# ==============================================================================
+
+DEFAULT_PRICE_BUCKETS = 5
+MAX_PRICE_BUCKETS = 20
+RATING_BUCKETS = 6
+
+
+def price_bucket_bounds(
+    price_range: Dict[str, float], buckets: int
+) -> tuple:
+    """
+    Equal-width histogram bounds over a price range.
+
+    Returns:
+        (low, width, bucket count); width 0.0 means a single bucket
+        (all prices equal or empty catalog)
+    """
+    buckets = max(1, min(int(buckets), MAX_PRICE_BUCKETS))
+    low = float(price_range.get("min", 0.0))
+    span = float(price_range.get("max", 0.0)) - low
+    if span <= 0:
+        return low, 0.0, 1
+    return low, span / buckets, buckets
+
+
+def format_facets(
+    category_counts: List[tuple],
+    bounds: tuple,
+    price_counts: List[int],
+    rating_counts: List[int]
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Build the "facets" response object from raw counts.
+
+    Args:
+        category_counts: [(category name, count)] in display order
+        bounds: (low, width, bucket count) from price_bucket_bounds
+        price_counts: Count per price bucket
+        rating_counts: Count per whole-star rating bucket (0..5)
+    """
+    low, width, bucket_count = bounds
+    price = []
+    for i in range(bucket_count):
+        bucket_min = low + width * i
+        bucket_max = low + width * (i + 1) if width else low
+        price.append({
+            "min": round(bucket_min, 2),
+            "max": round(bucket_max, 2),
+            "count": price_counts[i],
+        })
+    return {
+        "categories": [
+            {"name": name, "count": count}
+            for name, count in category_counts
+        ],
+        "price": price,
+        "rating": [
+            {"rating": star, "count": count}
+            for star, count in enumerate(rating_counts)
+        ],
+    }
 
 
 # ==============================================================================
@@ -314,19 +297,431 @@ def filter_menu_items(
     return result
 
 
+# ==============================================================================
+# Columnar Menu Index
+# ==============================================================================
+#
+# Column layout (row r describes items[r]):
+# - prices / ratings: array('d'), parsed to float once
+# - category_codes: array('i'), code into category_keys
+# - search_index: inverted index over name / description (menu_search.py)
+# - category_rows: code -> array('i') of rows in that category
+# - sort orders: (sort_by, reverse) -> (permutation, rank), built lazily
+#   once per catalog version, ties broken by item id ascending
+#
+# Build: O(n) time, O(n) space (+ O(n log n) once per sort order)
+# Filter: O(r) where r is the number of rows in the selected category
+#         (or n without category filter), no per-row parsing
+# Sort: O(n) pass over the precomputed permutation, no comparisons
+#       (O(m log m) integer rank comparisons when m is very small)
+# ==============================================================================
+
+# Sort fields backed by a column (see MenuIndex.sorted_rows)
+SORTABLE_COLUMNS = ("price", "rating")
+
+
+def _to_float(value: Any) -> float:
+    """
+    Parse a numeric field the same way the list-based filter does.
+    """
+    try:
+        return float(value) if value is not None else 0.0
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class MenuIndex:
+    """
+    Columnar, read-only representation of a menu item list.
+
+    Build once per catalog version, then pass it to filter_and_sort_menu
+    in place of the plain item list.
+
+    Attributes:
+        items: Original item dictionaries (row r is items[r])
+        prices: Item prices (array of double)
+        ratings: Item ratings (array of double)
+        category_keys: Normalized (stripped, lowercased) category per code
+        category_codes: Category code per row (array of int)
+        category_rows: {code: rows in that category}
+        category_names: Display names of non-empty categories, sorted
+                        case-insensitively (same as get_unique_categories)
+        price_range: {"min": ..., "max": ...} (same as get_price_range)
+        search_index: InvertedIndex over name / description (menu_search.py)
+        row_by_id: {item id: row}
+    """
+
+    def __init__(
+        self,
+        items: Sequence[Dict],
+        previous: Optional["MenuIndex"] = None
+    ):
+        """
+        Args:
+            items: Menu item dictionaries
+            previous: Index of the previous catalog version; when given,
+                      its inverted index is copied and only changed items
+                      are re-tokenized
+        """
+        self.items = tuple(items)
+
+        self.ids: List[int] = []
+        self.prices = array("d")
+        self.ratings = array("d")
+        self.category_codes = array("i")
+        self.category_keys: List[str] = []
+        self.category_rows: Dict[int, array] = {}
+
+        code_by_key: Dict[str, int] = {}
+        # (key, display name, code), kept sorted as categories are found,
+        # so no separate sort pass is needed
+        sorted_categories: List[tuple] = []
+        min_price = float("inf")
+        max_price = float("-inf")
+
+        for row, item in enumerate(self.items):
+            self.ids.append(item.get("id") or 0)
+            price = _to_float(item.get("price", 0))
+            self.prices.append(price)
+            self.ratings.append(_to_float(item.get("rating", 0)))
+            if price < min_price:
+                min_price = price
+            if price > max_price:
+                max_price = price
+
+            name = (item.get("category") or "").strip()
+            key = name.lower()
+            code = code_by_key.get(key)
+            if code is None:
+                code = len(self.category_keys)
+                code_by_key[key] = code
+                self.category_keys.append(key)
+                self.category_rows[code] = array("i")
+                if name:
+                    insort(sorted_categories, (key, name, code))
+            self.category_codes.append(code)
+            self.category_rows[code].append(row)
+
+        self._code_by_key = code_by_key
+        self.category_names = [name for _, name, _ in sorted_categories]
+        # Facet output order: codes of non-empty categories, by name
+        self._facet_codes = [code for _, _, code in sorted_categories]
+        self.price_range = {
+            "min": min_price if self.items else 0.0,
+            "max": max_price if self.items else 0.0,
+        }
+        # (sort_by, reverse) -> (permutation, rank); see sorted_rows()
+        self._orders: Dict[tuple, tuple] = {}
+        # Facets depend on the filters only, not on sort / page,
+        # so paging through one listing counts them once
+        self._facet_cache = LRUCache(maxsize=64)
+        self.row_by_id = {
+            item.get("id"): row for row, item in enumerate(self.items)
+        }
+
+        if previous is not None:
+            self.search_index = previous.search_index.copy()
+            self.search_index.sync(self.items)
+        else:
+            self.search_index = InvertedIndex()
+            for item in self.items:
+                self.search_index.add(
+                    item.get("id"),
+                    item.get("name") or "",
+                    item.get("description") or ""
+                )
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def search(self, search_query: Optional[str]) -> Dict[int, float]:
+        """
+        Full-text search via the inverted index.
+
+        Returns:
+            {row: relevance score} for rows matching every query token
+        """
+        row_by_id = self.row_by_id
+        return {
+            row_by_id[item_id]: score
+            for item_id, score in self.search_index.search(
+                search_query
+            ).items()
+            if item_id in row_by_id
+        }
+
+    def select_rows(
+        self,
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        search_query: Optional[str] = None,
+        search_scores: Optional[Dict[int, float]] = None
+    ) -> List[int]:
+        """
+        Return row numbers that pass all filter conditions.
+
+        Evaluated column by column:
+        1. Search: posting lists from the inverted index
+           (word-prefix match on name / description)
+        2. Category: precomputed row list for the category code,
+           or a code check on the search hits
+        3. Price: one pass over the price column
+        Each step narrows a selection vector (list of row numbers),
+        so later columns are only read for rows that are still candidates.
+
+        Args:
+            search_scores: Result of self.search(search_query),
+                           if the caller already has it
+
+        Time complexity: O(r), r is candidate row count
+        (number of search hits when searching)
+        """
+        prices = self.prices
+
+        code = None
+        if category:
+            code = self._code_by_key.get(category.strip().lower())
+            if code is None:
+                return []
+
+        if search_query:
+            if search_scores is None:
+                search_scores = self.search(search_query)
+            rows: Optional[Sequence[int]] = list(search_scores)
+            if code is not None:
+                codes = self.category_codes
+                rows = [r for r in rows if codes[r] == code]
+        elif code is not None:
+            rows = self.category_rows[code]
+        else:
+            # None means "all rows": scan columns directly with enumerate,
+            # which avoids one index lookup per row
+            rows = None
+
+        low = float(min_price) if min_price is not None else float("-inf")
+        high = float(max_price) if max_price is not None else float("inf")
+        if min_price is not None or max_price is not None:
+            if rows is None:
+                rows = [
+                    r for r, price in enumerate(prices)
+                    if low <= price <= high
+                ]
+            else:
+                rows = [r for r in rows if low <= prices[r] <= high]
+
+        if rows is None:
+            return list(range(len(self.items)))
+        return list(rows)
+
+    def select_rows_with_facets(
+        self,
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        search_query: Optional[str] = None,
+        search_scores: Optional[Dict[int, float]] = None,
+        price_buckets: int = DEFAULT_PRICE_BUCKETS
+    ) -> tuple:
+        """
+        select_rows plus facet counts, computed in the same pass.
+
+        Each facet counts items under the other active filters:
+        - categories: search + price filters (ignores the category filter)
+        - price histogram: search + category filters (ignores price range)
+        - rating histogram: all filters (the selected rows)
+
+        Unlike select_rows this always visits every search hit (or every
+        row without a search), since other categories and prices must be
+        counted too.
+
+        Returns:
+            (rows, facets), rows in the same order select_rows returns,
+            facets as built by format_facets()
+
+        Time complexity: O(r), r is search hit count (n without a search);
+        when the facets for these filters are cached, select_rows cost
+        """
+        facet_key = (
+            category.strip().lower() if category else None,
+            min_price, max_price, search_query, price_buckets,
+        )
+        facets = self._facet_cache.get(facet_key)
+        if facets is not MISSING:
+            return self.select_rows(
+                category, min_price, max_price, search_query, search_scores
+            ), facets
+
+        codes = self.category_codes
+        prices = self.prices
+        ratings = self.ratings
+
+        code = None
+        if category:
+            # -1 never matches: unknown category selects no rows,
+            # but the other categories are still counted
+            code = self._code_by_key.get(category.strip().lower(), -1)
+
+        if search_query:
+            if search_scores is None:
+                search_scores = self.search(search_query)
+            candidates: Sequence[int] = list(search_scores)
+        else:
+            candidates = range(len(self.items))
+
+        low = float(min_price) if min_price is not None else float("-inf")
+        high = float(max_price) if max_price is not None else float("inf")
+        bucket_low, bucket_width, bucket_count = price_bucket_bounds(
+            self.price_range, price_buckets
+        )
+        last_bucket = bucket_count - 1
+
+        category_counts = [0] * len(self.category_keys)
+        price_counts = [0] * bucket_count
+        rating_counts = [0] * RATING_BUCKETS
+        rows = []
+
+        for row in candidates:
+            price = prices[row]
+            in_price = low <= price <= high
+            row_code = codes[row]
+            if in_price:
+                category_counts[row_code] += 1
+            if code is None or row_code == code:
+                if bucket_width:
+                    bucket = int((price - bucket_low) / bucket_width)
+                    price_counts[
+                        bucket if bucket < last_bucket else last_bucket
+                    ] += 1
+                else:
+                    price_counts[0] += 1
+                if in_price:
+                    rows.append(row)
+                    star = int(ratings[row])
+                    rating_counts[
+                        0 if star < 0 else (star if star < 5 else 5)
+                    ] += 1
+
+        facets = format_facets(
+            [(self.category_names[i], category_counts[c])
+             for i, c in enumerate(self._facet_codes)],
+            (bucket_low, bucket_width, bucket_count),
+            price_counts,
+            rating_counts,
+        )
+        self._facet_cache.set(facet_key, facets)
+        return rows, facets
+
+    def _sort_order(self, sort_by: str, reverse: bool) -> tuple:
+        """
+        Get (permutation, rank) for one sort order, building it on first use.
+
+        permutation[i] is the row at position i;
+        rank[row] is the position of that row.
+        Equal values are ordered by item id ascending in both directions,
+        so results (and pagination) are deterministic.
+
+        Time complexity: O(n log n) on first use, O(1) afterwards
+        """
+        key = (sort_by, reverse)
+        order = self._orders.get(key)
+        if order is not None:
+            return order
+
+        column = self.prices if sort_by == "price" else self.ratings
+        ids = self.ids
+        # (value desc / asc, id asc): the same order as
+        # compound_key((value, reverse), (id, False)), built inline because
+        # this runs over the whole catalog
+        if reverse:
+            sort_keys = [(-value, ids[r]) for r, value in enumerate(column)]
+        else:
+            sort_keys = [(value, ids[r]) for r, value in enumerate(column)]
+        rows = stable_sort(range(len(column)), key=sort_keys.__getitem__)
+
+        permutation = array("i", rows)
+        rank = array("i", [0]) * len(rows)
+        for position, row in enumerate(permutation):
+            rank[row] = position
+
+        # Concurrent first calls may both build it; results are identical
+        order = (permutation, rank)
+        self._orders[key] = order
+        return order
+
+    def sorted_rows(self, sort_by: str, reverse: bool = False) -> array:
+        """
+        Precomputed permutation of all rows for a sort field / direction.
+        """
+        return self._sort_order(sort_by, reverse)[0]
+
+    def order_rows(
+        self,
+        rows: Sequence[int],
+        sort_by: str,
+        reverse: bool = False,
+        limit: Optional[int] = None
+    ) -> List[int]:
+        """
+        Arrange selected rows in sort order using the precomputed permutation.
+
+        - All rows selected: a slice of the permutation itself
+        - Very small selections: order them by their integer rank instead
+          (O(m log m) with m log m < n; heap top-k when limited)
+        - Otherwise: one pass over the permutation keeping selected rows
+          (O(n), no comparisons), stopping early after `limit` rows
+
+        Args:
+            rows: Selected rows (output of select_rows)
+            sort_by: "price" or "rating"
+            reverse: True for descending
+            limit: Only the first `limit` rows in sort order are needed
+
+        Returns:
+            Rows in sort order (at most `limit` rows)
+        """
+        permutation, rank = self._sort_order(sort_by, reverse)
+        n = len(permutation)
+        m = len(rows)
+
+        if m == n:
+            return list(permutation[:limit])
+        if m * max(m.bit_length(), 1) < n:
+            return select_top_k(rows, limit, rank.__getitem__)
+
+        selected = bytearray(n)
+        for row in rows:
+            selected[row] = 1
+        # filter() / islice() keep the scan loop in C
+        return list(islice(filter(selected.__getitem__, permutation), limit))
+
+    def materialize(self, rows: Sequence[int]) -> List[Dict]:
+        """
+        Convert row numbers back to item dictionaries.
+
+        Time complexity: O(k), k is number of rows
+        """
+        items = self.items
+        return [items[r] for r in rows]
+
+
 # ==============================================================================
 # Main Entry Function: Filter + Sort
 # ==============================================================================
 
 
 def filter_and_sort_menu(
-    items: List[Dict],
+    items: Union[List[Dict], MenuIndex],
     category: Optional[str] = None,
     min_price: Optional[float] = None,
     max_price: Optional[float] = None,
     search_query: Optional[str] = None,
     sort_by: str = "price",
-    sort_order: str = "asc"
+    sort_order: str = "asc",
+    limit: Optional[int] = None,
+    offset: int = 0,
+    facets: bool = False,
+    price_buckets: int = DEFAULT_PRICE_BUCKETS
 ) -> Dict[str, Any]:
     """
     Main function for filtering and sorting menu items.
@@ -340,22 +735,43 @@ def filter_and_sort_menu(
     - m: Filtered item count (m ≤ n)
 
     Worst case (no filtering): O(n log n)
+    With a MenuIndex: O(n) (sort step is a pass over a precomputed order)
+
+    Paging (limit / offset): only the first k = offset + limit items in
+    sort order are selected (heap top-k, O(m log k), or an early-exit
+    pass over the precomputed order); "total" still counts all m matches.
+
+    When `items` is a MenuIndex, filtering runs on its columns and only
+    the surviving rows are materialized. Price / rating ordering then
+    comes from precomputed permutations (ties by item id, so results are
+    deterministic) instead of a per-request sort. Search uses the inverted
+    index (word-prefix match, see menu_search.py) instead of a substring
+    scan, and sort_by="relevance" orders results by search score
+    (best match first; without a search query the catalog order is kept).
 
     Args:
-        items: Original menu item list
+        items: Original menu item list, or a prebuilt MenuIndex
         category: Filter category
         min_price: Minimum price
         max_price: Maximum price
         search_query: Search keyword
-        sort_by: Sort field ("price" or "rating")
-        sort_order: Sort direction ("asc" ascending, "desc" descending)
+        sort_by: Sort field ("price", "rating" or "relevance")
+        sort_order: Sort direction ("asc" ascending, "desc" descending),
+                    ignored for "relevance"
+        limit: Page size (None returns all matching items)
+        offset: Number of items to skip in sort order
+        facets: Also count categories / price / rating facets in the
+                filtering pass (a plain list is indexed first)
+        price_buckets: Number of price histogram buckets (1-20)
 
     Returns:
         Dictionary containing the following keys:
-        - "items": Filtered and sorted item list
-        - "total": Total result count
+        - "items": Filtered and sorted items (current page when limited)
+        - "total": Total result count (all pages)
+        - "limit" / "offset": Paging applied
         - "filters_applied": Applied filter conditions
         - "sort_applied": Applied sort conditions
+        - "facets": Facet counts (only when facets=True, see Facets)
 
     Example:
         >>> result = filter_and_sort_menu(
@@ -368,31 +784,124 @@ def filter_and_sort_menu(
         ... )
         >>> print(f"Found {result['total']} items")
     """
+    # Only the first `offset + limit` rows in sort order are needed
+    top = None if limit is None else offset + limit
+    reverse = sort_order.lower() == "desc"
+
+    # Facet counts need the column data of a MenuIndex
+    if facets and not isinstance(items, MenuIndex):
+        items = MenuIndex(items)
+
     # Step 1: Filter - O(n)
-    filtered_items = filter_menu_items(
-        items,
-        category=category,
-        min_price=min_price,
-        max_price=max_price,
-        search_query=search_query
-    )
+    if isinstance(items, MenuIndex):
+        search_scores = (
+            items.search(search_query) if search_query else None
+        )
+        filter_args = dict(
+            category=category,
+            min_price=min_price,
+            max_price=max_price,
+            search_query=search_query,
+            search_scores=search_scores
+        )
+        if facets:
+            rows, facet_counts = items.select_rows_with_facets(
+                price_buckets=price_buckets, **filter_args
+            )
+        else:
+            rows, facet_counts = items.select_rows(**filter_args), None
+        total = len(rows)
+
+        if sort_by == "relevance":
+            # Best match first (ties by item id)
+            if search_scores:
+                ids = items.ids
+                rows = select_top_k(
+                    rows, top, lambda r: (-search_scores[r], ids[r])
+                )
+            return build_menu_result(
+                items.materialize(rows[offset:top]), total, category,
+                min_price, max_price, search_query, sort_by, "desc",
+                limit, offset, facet_counts
+            )
 
-    # Step 2: Sort - O(m log m)
-    # Determine sort direction
-    reverse = sort_order.lower() == "desc"
+        if sort_by in SORTABLE_COLUMNS:
+            # Walk the precomputed permutation, no per-request sort
+            ordered_rows = items.order_rows(
+                rows, sort_by, reverse=reverse, limit=top
+            )
+            return build_menu_result(
+                items.materialize(ordered_rows[offset:top]), total,
+                category, min_price, max_price, search_query, sort_by,
+                sort_order, limit, offset, facet_counts
+            )
 
-    # For ratings, users typically expect "high to low", so default desc
-    # For prices, users typically expect "low to high", so default asc
-    sorted_items = quick_sort(
-        filtered_items,
-        sort_by=sort_by,
-        reverse=reverse
+        filtered_items = items.materialize(rows)
+    else:
+        facet_counts = None
+        filtered_items = filter_menu_items(
+            items,
+            category=category,
+            min_price=min_price,
+            max_price=max_price,
+            search_query=search_query
+        )
+    total = len(filtered_items)
+
+    # Step 2: Sort - O(m log m), or O(m log k) when paging
+    if top is not None:
+        # Partial selection: only the first `top` items are ordered
+        sorted_items = select_top_k(
+            filtered_items, top, _make_sort_key(sort_by, reverse)
+        )
+    else:
+        # For ratings, users typically expect "high to low", so default desc
+        # For prices, users typically expect "low to high", so default asc
+        sorted_items = quick_sort(
+            filtered_items,
+            sort_by=sort_by,
+            reverse=reverse
+        )
+
+    return build_menu_result(
+        sorted_items[offset:top], total, category, min_price, max_price,
+        search_query, sort_by, sort_order, limit, offset, facet_counts
     )
 
-    # Build response
-    return {
-        "items": sorted_items,
-        "total": len(sorted_items),
+
+def _make_sort_key(sort_by: str, reverse: bool) -> Callable[[Dict], tuple]:
+    """
+    Ascending sort key for an item dict: (value, id), or (-value, id)
+    for descending order, so ties are broken by item id.
+    """
+    def key_func(item: Dict) -> tuple:
+        value = _to_float(item.get(sort_by, 0))
+        return (-value if reverse else value, item.get("id") or 0)
+    return key_func
+
+
+def build_menu_result(
+    page_items: List[Dict],
+    total: int,
+    category: Optional[str],
+    min_price: Optional[float],
+    max_price: Optional[float],
+    search_query: Optional[str],
+    sort_by: str,
+    sort_order: str,
+    limit: Optional[int] = None,
+    offset: int = 0,
+    facets: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Build the filter_and_sort_menu response dictionary
+    (also used by the SQL menu engine, menu_sql.py).
+    """
+    result = {
+        "items": page_items,
+        "total": total,
+        "limit": limit,
+        "offset": offset,
         "filters_applied": {
             "category": category,
             "min_price": min_price,
@@ -404,6 +913,10 @@ def filter_and_sort_menu(
             "sort_order": sort_order
         }
     }
+    if facets is not None:
+        result["facets"] = facets
+    return result
+
 
 # ==============================================================================
 # Get All Available Categories (for frontend filter dropdown)
@@ -429,28 +942,8 @@ def get_unique_categories(items: List[Dict]) -> List[str]:
         if category:
             categories.add(category)
 
-    # Return sorted list (using simple quick sort here for consistency)
-    result = list(categories)
-
-    # Perform quick sort on category names
-    if len(result) > 1:
-        # Use recursive quick sort to sort string list
-        def str_key(item):
-            return {"name": item}
-
-        temp_list = [{"name": c} for c in result]
-
-        def str_key_func(item):
-            return item["name"].lower()
-
-        if len(temp_list) > 1:
-            _quick_sort_recursive(
-                temp_list, 0, len(temp_list) - 1, str_key_func, False
-            )
-
-        result = [item["name"] for item in temp_list]
-
-    return result
+    # Case-insensitive alphabetical order (shared merge sort engine)
+    return stable_sort(categories, key=str.lower)
 
 
 def get_price_range(items: List[Dict]) -> Dict[str, float]:
@@ -1,8 +1,27 @@
-from datetime import datetime
+import hashlib
+import json
+from datetime import datetime, timedelta
 
 from flask import jsonify, request, session
+from sqlalchemy import and_, insert, or_
+from sqlalchemy.exc import IntegrityError
 
-from auth import db_session, Order, OrderItem, MenuItem
+from auth import (
+    db_session,
+    MenuItem,
+    Order,
+    OrderIdempotencyKey,
+    OrderItem,
+)
+from pagination import (
+    InvalidCursor,
+    next_keyset_cursor,
+    parse_limit,
+    resolve_keyset_cursor,
+)
+from recommendation import invalidate_recommendations, record_order
+from recommendation_lsh import record_order_items
+from trending import record_trending
 
 
 def serialize_order(order, items):
@@ -32,15 +51,154 @@ def serialize_order(order, items):
     }
 
 
+# Identifies order history cursors (see pagination.py)
+ORDERS_CURSOR_SIGNATURE = "orders"
+
+
+def parse_orders_cursor(cursor):
+    """
+    (date or None, order id) after which the next order history page
+    starts, or None for the first page.
+
+    Raises:
+        InvalidCursor: if the cursor is malformed
+    """
+    key = resolve_keyset_cursor(cursor, ORDERS_CURSOR_SIGNATURE, 2)
+    if key is None:
+        return None
+    date, order_id = key
+    if not isinstance(order_id, int) or isinstance(order_id, bool):
+        raise InvalidCursor("Invalid cursor")
+    if date is None:
+        return None, order_id
+    if not isinstance(date, str):
+        raise InvalidCursor("Invalid cursor")
+    try:
+        return datetime.fromisoformat(date), order_id
+    except ValueError as exc:
+        raise InvalidCursor("Invalid cursor") from exc
+
+
+def orders_after(query, after):
+    """
+    Restrict an order query sorted by (date DESC, id DESC) to the
+    orders after the cursor key `after` = (date, id).
+
+    Orders without a date sort last (MySQL / SQLite put NULLs last in
+    descending order), so they follow every dated order.
+    """
+    date, order_id = after
+    if date is None:
+        return query.filter(Order.date.is_(None), Order.id < order_id)
+    return query.filter(or_(
+        Order.date < date,
+        and_(Order.date == date, Order.id < order_id),
+        Order.date.is_(None),
+    ))
+
+
+def query_order_items(db, order_ids):
+    """
+    Order lines (order_id, menu_item_id, quantity, price_at_purchase,
+    menu_item_name) of the given orders.
+    """
+    return (
+        db.query(
+            OrderItem.order_id,
+            OrderItem.menu_item_id,
+            OrderItem.quantity,
+            OrderItem.price_at_purchase,
+            MenuItem.name.label("menu_item_name"),
+        )
+        .join(MenuItem, MenuItem.id == OrderItem.menu_item_id)
+        .filter(OrderItem.order_id.in_(order_ids))
+        .all()
+    )
+
+
+# ==================== Idempotency Keys ====================
+#
+# A client sends the same Idempotency-Key header when it retries
+# POST /api/orders (cart.js: one key per cart until an order succeeds).
+# The key is stored with the order in the same transaction:
+# - Known key, same cart: the original order is returned (201,
+#   Idempotent-Replayed: true); the order tables are only read
+# - Known key, different cart: 422
+# - Two concurrent requests with one key: the primary key lets one
+#   commit; the other rolls back and returns the committed order
+# Keys are per user and expire after ORDER_IDEMPOTENCY_TTL seconds.
+
+MAX_IDEMPOTENCY_KEY_LENGTH = 255
+DEFAULT_IDEMPOTENCY_TTL = 86400
+
+
+def cart_hash(lines) -> str:
+    """
+    SHA-256 of a request's (menu_item_id, quantity) lines, in order.
+    """
+    return hashlib.sha256(
+        json.dumps(lines, separators=(",", ":")).encode("utf-8")
+    ).hexdigest()
+
+
+def replay_order(db, user_id, key, request_hash, since):
+    """
+    Response for a known Idempotency-Key (created after `since`),
+    or None when the key is new.
+    """
+    stored = (
+        db.query(OrderIdempotencyKey)
+        .filter(
+            OrderIdempotencyKey.user_id == user_id,
+            OrderIdempotencyKey.idempotency_key == key,
+            OrderIdempotencyKey.created_at >= since,
+        )
+        .first()
+    )
+    if stored is None:
+        return None
+    if stored.request_hash != request_hash:
+        return jsonify({
+            "error": "Idempotency-Key was already used for a different cart."
+        }), 422
+
+    order = db.query(Order).filter(Order.id == stored.order_id).first()
+    if order is None:
+        return None
+    response = jsonify(
+        serialize_order(order, query_order_items(db, [order.id]))
+    )
+    response.status_code = 201
+    response.headers["Idempotent-Replayed"] = "true"
+    return response
+
+
 def init_order_routes(app) -> None:
     """
     Register order placement and order history related API routes.
     """
+    # Seconds an Idempotency-Key is remembered
+    idempotency_ttl = timedelta(seconds=app.config.get(
+        "ORDER_IDEMPOTENCY_TTL", DEFAULT_IDEMPOTENCY_TTL
+    ))
 
     @app.route("/api/orders", methods=["GET"])
     def api_get_orders():
         """
-        Get order history list for current logged-in user.
+        Get order history list for current logged-in user,
+        newest first.
+
+        Query parameters (optional; without `limit` the whole history
+        is returned):
+        - limit: Orders per page (1..MAX_PAGE_SIZE)
+        - cursor: X-Next-Cursor value of the previous page
+
+        The response body is always a list of orders; when more orders
+        follow, the X-Next-Cursor header holds the cursor of the next
+        page. Pages are keyset-paginated on (date, id), an index range
+        scan on ix_orders_user_date_id, and only the page's order lines
+        are read, so every page costs the same however long the
+        history is.
         """
         user_id = session.get("user_id")
         if not user_id:
@@ -48,33 +206,44 @@ def init_order_routes(app) -> None:
                 {"error": "You must be logged in to view orders."}
             ), 401
 
+        limit = parse_limit(request.args.get("limit"))
+        try:
+            after = parse_orders_cursor(
+                request.args.get("cursor", "").strip() or None
+            )
+        except InvalidCursor as exc:
+            return jsonify({"error": str(exc)}), 400
+
         db = db_session()
         try:
-            # First query all orders for this user
-            orders = (
+            # First query this user's orders (the page, when paging;
+            # one extra row tells whether another page follows)
+            query = (
                 db.query(Order)
                 .filter(Order.user_id == user_id)
-                .order_by(Order.date.desc())
-                .all()
+                .order_by(Order.date.desc(), Order.id.desc())
             )
+            if after is not None:
+                query = orders_after(query, after)
+            if limit is not None:
+                query = query.limit(limit + 1)
+            orders = query.all()
+
+            next_cursor = None
+            if limit is not None and len(orders) > limit:
+                orders = orders[:limit]
+                last = orders[-1]
+                next_cursor = next_keyset_cursor(
+                    [last.date.isoformat() if last.date else None, last.id],
+                    ORDERS_CURSOR_SIGNATURE,
+                )
             if not orders:
                 return jsonify([])
 
             order_ids = [o.id for o in orders]
 
             # Query all corresponding order_items + menu item names
-            rows = (
-                db.query(
-                    OrderItem.order_id,
-                    OrderItem.menu_item_id,
-                    OrderItem.quantity,
-                    OrderItem.price_at_purchase,
-                    MenuItem.name.label("menu_item_name"),
-                )
-                .join(MenuItem, MenuItem.id == OrderItem.menu_item_id)
-                .filter(OrderItem.order_id.in_(order_ids))
-                .all()
-            )
+            rows = query_order_items(db, order_ids)
 
             # Assemble as order_id -> [items]
             items_by_order = {}
@@ -86,7 +255,10 @@ def init_order_routes(app) -> None:
                 for order in orders
             ]
 
-            return jsonify(result)
+            response = jsonify(result)
+            if next_cursor is not None:
+                response.headers["X-Next-Cursor"] = next_cursor
+            return response
         finally:
             db.close()
 
@@ -101,6 +273,9 @@ def init_order_routes(app) -> None:
             { "id": 3, "quantity": 1 }
           ]
         }
+
+        Optional Idempotency-Key header: retries with the same key return
+        the order created first (see Idempotency Keys above).
         """
         user_id = session.get("user_id")
         if not user_id:
@@ -115,8 +290,28 @@ def init_order_routes(app) -> None:
         if not isinstance(items, list) or len(items) == 0:
             return jsonify({"error": "Cart is empty."}), 400
 
+        idempotency_key = request.headers.get("Idempotency-Key")
+        if idempotency_key is not None:
+            idempotency_key = idempotency_key.strip()
+            if not (0 < len(idempotency_key) <= MAX_IDEMPOTENCY_KEY_LENGTH):
+                return jsonify({"error": "Invalid Idempotency-Key."}), 400
+            request_hash = cart_hash([
+                [i.get("id"), i.get("quantity")] if isinstance(i, dict)
+                else i
+                for i in items
+            ])
+            now = datetime.utcnow()
+
         db = db_session()
         try:
+            if idempotency_key is not None:
+                replayed = replay_order(
+                    db, user_id, idempotency_key, request_hash,
+                    now - idempotency_ttl
+                )
+                if replayed is not None:
+                    return replayed
+
             # Get all involved menu items from database
             # to ensure prices are server-side accurate
             menu_ids = [
@@ -171,18 +366,59 @@ def init_order_routes(app) -> None:
             db.add(order)
             db.flush()  # Get order.id first
 
-            # Create order items
-            for oi in order_items:
-                db.add(
-                    OrderItem(
-                        order_id=order.id,
-                        menu_item_id=oi["menu_item_id"],
-                        quantity=oi["quantity"],
-                        price_at_purchase=oi["price_at_purchase"],
-                    )
-                )
+            # Create order items (one multi-row INSERT)
+            db.execute(
+                insert(OrderItem.__table__).values([
+                    {
+                        "order_id": order.id,
+                        "menu_item_id": oi["menu_item_id"],
+                        "quantity": oi["quantity"],
+                        "price_at_purchase": oi["price_at_purchase"],
+                    }
+                    for oi in order_items
+                ])
+            )
 
-            db.commit()
+            if idempotency_key is not None:
+                # Expired keys of this user, then this request's key
+                db.query(OrderIdempotencyKey).filter(
+                    OrderIdempotencyKey.user_id == user_id,
+                    OrderIdempotencyKey.created_at < now - idempotency_ttl,
+                ).delete(synchronize_session=False)
+                db.add(OrderIdempotencyKey(
+                    user_id=user_id,
+                    idempotency_key=idempotency_key,
+                    request_hash=request_hash,
+                    order_id=order.id,
+                    created_at=now,
+                ))
+
+            try:
+                db.commit()
+            except IntegrityError:
+                # A concurrent request with the same key committed first
+                db.rollback()
+                if idempotency_key is None:
+                    raise
+                replayed = replay_order(
+                    db, user_id, idempotency_key, request_hash,
+                    now - idempotency_ttl
+                )
+                if replayed is None:
+                    raise
+                return replayed
+            # Co-purchase index / sales counters: own short transaction
+            record_order(
+                db, user_id, order.id,
+                [(oi["menu_item_id"], oi["quantity"]) for oi in order_items]
+            )
+            record_order_items(
+                user_id, [oi["menu_item_id"] for oi in order_items]
+            )
+            record_trending(
+                [(oi["menu_item_id"], oi["quantity"]) for oi in order_items]
+            )
+            invalidate_recommendations(user_id)
 
             # Return new order details
             # (same structure as single item from GET /api/orders)
@@ -0,0 +1,163 @@
+"""
+Pagination helpers module
+
+Opaque cursor encoding shared by paginated JSON APIs.
+
+A cursor is URL-safe base64 of a small JSON object, so clients treat it
+as an opaque token and the server can change its contents later
+without breaking the API shape.
+
+Two kinds:
+- Offset cursors (menu API): the position of the next page
+- Keyset cursors (order history): the sort key of the last row served,
+  so the next page is an index range scan that does not slow down
+  with depth and is not shifted by rows inserted in the meantime
+"""
+
+import base64
+import json
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Largest page a client may request in one call
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client sends a cursor that cannot be decoded."""
+
+
+def encode_cursor(payload: Dict[str, Any]) -> str:
+    """
+    Encode a cursor payload as an opaque URL-safe string.
+    """
+    raw = json.dumps(payload, separators=(",", ":"), sort_keys=True)
+    encoded = base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+    # Padding is restored in decode_cursor; "=" would need URL-escaping
+    return encoded.rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Raises:
+        InvalidCursor: if the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(
+            base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+        )
+    except (ValueError, UnicodeError) as exc:
+        raise InvalidCursor("Invalid cursor") from exc
+    if not isinstance(payload, dict):
+        raise InvalidCursor("Invalid cursor")
+    return payload
+
+
+def parse_limit(
+    value: Optional[str], max_limit: int = MAX_PAGE_SIZE
+) -> Optional[int]:
+    """
+    Parse a `limit` query parameter.
+
+    Returns:
+        None when absent or invalid (no paging),
+        otherwise an int clamped to 1..max_limit
+    """
+    if value is None or not value.strip():
+        return None
+    try:
+        limit = int(value)
+    except ValueError:
+        return None
+    return max(1, min(limit, max_limit))
+
+
+def parse_offset(value: Optional[str]) -> int:
+    """
+    Parse an `offset` query parameter (invalid / negative -> 0).
+    """
+    if value is None or not value.strip():
+        return 0
+    try:
+        return max(0, int(value))
+    except ValueError:
+        return 0
+
+
+def resolve_offset_cursor(
+    cursor: Optional[str], offset: int, signature: str
+) -> Tuple[int, str]:
+    """
+    Resolve an offset cursor for a listing identified by `signature`
+    (e.g. a digest of the active filters).
+
+    Args:
+        cursor: Cursor from the client (may be None / empty)
+        offset: Offset parameter, used when no cursor is given
+        signature: Identifies the listing the cursor must belong to
+
+    Returns:
+        (offset, signature)
+
+    Raises:
+        InvalidCursor: if the cursor is malformed or was issued
+                       for a different listing
+    """
+    if not cursor:
+        return offset, signature
+    payload = decode_cursor(cursor)
+    if payload.get("s") != signature:
+        raise InvalidCursor("Cursor does not match the current filters")
+    cursor_offset = payload.get("o")
+    if not isinstance(cursor_offset, int) or cursor_offset < 0:
+        raise InvalidCursor("Invalid cursor")
+    return cursor_offset, signature
+
+
+def next_offset_cursor(
+    offset: int, page_size: int, total: int, signature: str
+) -> Optional[str]:
+    """
+    Build the cursor for the page after [offset, offset + page_size),
+    or None when this was the last page.
+    """
+    next_offset = offset + page_size
+    if page_size <= 0 or next_offset >= total:
+        return None
+    return encode_cursor({"o": next_offset, "s": signature})
+
+
+def next_keyset_cursor(key: Sequence[Any], signature: str) -> str:
+    """
+    Build a keyset cursor: the sort key of the last row of a page
+    (the next page starts after it) for a listing identified by
+    `signature`.
+    """
+    return encode_cursor({"k": list(key), "s": signature})
+
+
+def resolve_keyset_cursor(
+    cursor: Optional[str], signature: str, size: int
+) -> Optional[List[Any]]:
+    """
+    Resolve a keyset cursor (see next_keyset_cursor).
+
+    Returns:
+        None when no cursor is given, otherwise the sort key
+        (a list of `size` JSON values; the caller validates the types)
+
+    Raises:
+        InvalidCursor: if the cursor is malformed or was issued
+                       for a different listing
+    """
+    if not cursor:
+        return None
+    payload = decode_cursor(cursor)
+    if payload.get("s") != signature:
+        raise InvalidCursor("Cursor does not match this listing")
+    key = payload.get("k")
+    if not isinstance(key, list) or len(key) != size:
+        raise InvalidCursor("Invalid cursor")
+    return key
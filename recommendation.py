@@ -11,7 +11,7 @@ Algorithm flow:
 2. Find "similar users" (other users who purchased same items)
 3. Extract candidate items (items similar users bought but target user hasn't)
 4. Calculate recommendation scores (based on similar user weights)
-5. Sort results using quick sort
+5. Sort results by score (stable merge sort, ties by item id)
 6. Handle cold start (return popular items when new user
    has no purchase history)
 
@@ -40,21 +40,109 @@ Performance improvements:
   (with 1 million records)
 """
 
-from typing import Dict, List, Optional, Tuple
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 from collections import defaultdict
 
-from auth import db_session, Order, OrderItem, MenuItem
+from sqlalchemy import (
+    distinct,
+    event,
+    exists,
+    func,
+    insert,
+    literal,
+    select,
+    union_all,
+)
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
+
+from auth import (
+    db_session,
+    ItemCooccurrence,
+    ItemSales,
+    MenuItem,
+    Order,
+    OrderItem,
+    RecommendationGeneration,
+    UserRecommendation,
+)
+from cache_utils import LRUCache, MISSING
+from recommendation_lsh import find_similar_users_lsh
+from recommendation_snapshot import get_model_snapshot, ModelSnapshot
+from sort_utils import compound_key, sort_in_place, stable_sort
+from trending import get_trending
+
+logger = logging.getLogger(__name__)
+
+# Candidate generation strategies (see get_recommendations):
+# - "user_cf": user-user overlap computed from orders / order_items
+# - "item_cf": lookup in the item_cooccurrence index (same scores)
+# - "sql": user_cf as one CTE statement on one session (same results)
+# - "lsh": user_cf with similar users from the MinHash / LSH index
+#   (approximate top-N neighbours, see recommendation_lsh.py)
+# - "snapshot": user_cf scores from the memory-mapped model snapshot
+#   (same results as of the snapshot, see recommendation_snapshot.py);
+#   users who ordered since, or no snapshot, fall back to "user_cf"
+RECOMMENDATION_ENGINES = ("user_cf", "item_cf", "sql", "lsh", "snapshot")
+_engine = "user_cf"
+# Serve user_recommendations rows from the batch precompute job
+# (recommendation_precompute.py) before any online engine
+_use_precomputed = True
+# Show users without a login what is trending (trending.py)
+# instead of all-time popular items
+_use_trending = True
+
+
+def set_recommendation_engine(engine: str) -> None:
+    """
+    Select the candidate generation strategy for get_recommendations
+    (called once at startup from the RECOMMENDATION_ENGINE setting).
+    """
+    global _engine
+    if engine not in RECOMMENDATION_ENGINES:
+        raise ValueError(
+            f"RECOMMENDATION_ENGINE must be one of "
+            f"{RECOMMENDATION_ENGINES}, got {engine!r}"
+        )
+    _engine = engine
+    recommendation_cache.clear()
+
+
+def set_precomputed_recommendations(enabled: bool) -> None:
+    """
+    Enable / disable reading precomputed lists
+    (RECOMMENDATION_PRECOMPUTED setting).
+    """
+    global _use_precomputed
+    _use_precomputed = bool(enabled)
+    recommendation_cache.clear()
+
+
+def set_trending_recommendations(enabled: bool) -> None:
+    """
+    Enable / disable "Trending Now" for users without a login
+    (RECOMMENDATION_TRENDING setting).
+    """
+    global _use_trending
+    _use_trending = bool(enabled)
+    recommendation_cache.clear()
 
 # ===========================================================================
-# Quick Sort Algorithm (manually implemented, not using built-in sort)
+# Score Sorting (shared merge sort engine, not using built-in sort)
 # ===========================================================================
 #
-# Time complexity:
-# - Average case: O(n log n)
-# - Worst case: O(n²) (when array is sorted)
-# - Best case: O(n log n)
+# Time complexity: O(n log n) worst case (sort_utils.stable_sort)
+# Space complexity: O(n)
 #
-# Space complexity: O(log n) (recursive call stack)
+# Ties are broken by item_id ascending, so equal scores always come
+# back in the same order (stable, reproducible recommendations).
 # ===========================================================================
 
 
@@ -62,81 +150,29 @@ def quick_sort_by_score(
     items: List[Dict], descending: bool = True
 ) -> List[Dict]:
     """
-    Sort recommendation results by score using quick sort algorithm.
-
-    This function demonstrates manual implementation of
-    sorting algorithm capability,
-    meeting "second/third year programming skills" requirements,
-    does not use Python's built-in .sort() or sorted() methods.
+    Sort recommendation results by score, then item_id ascending.
 
-    Algorithm steps:
-    1. Select pivot element - use middle element to optimize
-       sorted array cases
-    2. Partition - divide elements less/greater than pivot
-       to two sides
-    3. Recursively sort left and right sub-arrays
+    The name is kept for existing callers; sorting is done by the
+    stable merge sort in sort_utils.py (manually implemented,
+    does not use Python's built-in .sort() or sorted() methods).
 
     Args:
-        items: List of dictionaries containing 'score' key
+        items: List of dictionaries containing 'score' and 'item_id' keys
         descending: True for high to low sort, False for low to high
 
     Returns:
-        Sorted list (in-place sorting)
+        Sorted list (the same list object, sorted in place)
 
-    Time complexity: O(n log n) average case
+    Time complexity: O(n log n) worst case
     """
     if len(items) <= 1:
         return items
 
-    def partition(arr: List[Dict], low: int, high: int) -> int:
-        """
-        Partition function: select pivot element, divide array into two parts.
-
-        Uses Lomuto partition scheme, selects middle element
-        as pivot to optimize performance.
-        """
-        # Select middle element as pivot (optimize sorted array cases)
-        mid = (low + high) // 2
-        arr[mid], arr[high] = arr[high], arr[mid]
-
-        pivot_score = arr[high].get('score', 0)
-        i = low - 1
-
-        for j in range(low, high):
-            current_score = arr[j].get('score', 0)
-            # Compare based on sort direction
-            if descending:
-                should_swap = current_score > pivot_score
-            else:
-                should_swap = current_score < pivot_score
-
-            if should_swap:
-                i += 1
-                arr[i], arr[j] = arr[j], arr[i]
-
-        arr[i + 1], arr[high] = arr[high], arr[i + 1]
-        return i + 1
-
-    def quick_sort_recursive(arr: List[Dict], low: int, high: int) -> None:
-        """
-        Recursive quick sort implementation.
-
-        Uses tail recursion optimization
-        (process smaller sub-array first) to reduce stack depth.
-        """
-        while low < high:
-            pivot_index = partition(arr, low, high)
-
-            # Tail recursion optimization: process smaller sub-array first
-            if pivot_index - low < high - pivot_index:
-                quick_sort_recursive(arr, low, pivot_index - 1)
-                low = pivot_index + 1
-            else:
-                quick_sort_recursive(arr, pivot_index + 1, high)
-                high = pivot_index - 1
-
-    quick_sort_recursive(items, 0, len(items) - 1)
-    return items
+    key_func = compound_key(
+        (lambda item: item.get('score', 0), descending),
+        (lambda item: item.get('item_id', 0), False),
+    )
+    return sort_in_place(items, key=key_func)
 
 # ===========================================================================
 # Recommendation System Core Functions
@@ -337,28 +373,453 @@ def get_candidate_items(
             .all()
         )
 
-        # Calculate recommendation scores for candidate items
-        candidate_scores = defaultdict(float)
+        # Calculate recommendation scores for candidate items.
+        # Accumulate exact common item counts (similarity x |T|) and
+        # divide once, so equal scores compare equal whatever the
+        # summation order (ties by item id, as in the other engines)
+        target_count = len(target_purchased_items)
+        candidate_weights = defaultdict(int)
 
         for user_id, menu_item_id in similar_user_items:
             if user_id in similar_users:
                 # Accumulate similarity weights
-                candidate_scores[menu_item_id] += similar_users[user_id]
+                candidate_weights[menu_item_id] += round(
+                    similar_users[user_id] * target_count
+                )
+
+        return {
+            item_id: weight / target_count
+            for item_id, weight in candidate_weights.items()
+        }
+    finally:
+        db.close()
 
-        return dict(candidate_scores)
+
+# ===========================================================================
+# Item-to-Item Co-purchase Index ("item_cf" engine)
+# ===========================================================================
+#
+# item_cooccurrence[a][b] = number of distinct users who bought a and b.
+#
+# For an item X the target user has not bought, the user_cf score is
+#   Σ over similar users u who bought X of |common(u)| / |T|
+# (T = target user's items). Swapping the sums gives
+#   Σ over t in T of cooccurrence[t][X] / |T|
+# so a lookup-and-sum over the user's own items yields the same scores,
+# at a cost bounded by the user's history instead of other users' orders.
+#
+# Maintenance:
+# - Incremental: record_order() (see Order Hook) right after the order
+#   commits, O(new items x history) pair increments for that user
+# - Backfill / repair: rebuild_item_cooccurrence()
+#   (python recommendation_jobs.py rebuild-cooccurrence)
+# ===========================================================================
+
+
+def get_item_cf_candidates(
+    target_purchased_items: List[int]
+) -> Dict[int, float]:
+    """
+    Step 2-4 for the "item_cf" engine: candidate items and scores from
+    the item_cooccurrence index.
+
+    Args:
+        target_purchased_items: Menu item IDs already purchased by target user
+
+    Returns:
+        {item_id: recommendation_score}, same scores as
+        find_similar_users + get_candidate_items
+
+    Time complexity: O(h * d), h is the user's distinct item count,
+    d is the average number of co-purchased neighbours per item
+    """
+    if not target_purchased_items:
+        return {}
+
+    target_count = len(target_purchased_items)
+
+    db = db_session()
+    try:
+        rows = (
+            db.query(
+                ItemCooccurrence.other_item_id,
+                func.sum(ItemCooccurrence.user_count)
+            )
+            .filter(
+                ItemCooccurrence.item_id.in_(target_purchased_items),
+                ~ItemCooccurrence.other_item_id.in_(target_purchased_items)
+            )
+            .group_by(ItemCooccurrence.other_item_id)
+            .all()
+        )
+        return {
+            item_id: int(total) / target_count
+            for item_id, total in rows
+            if total
+        }
     finally:
         db.close()
 
 
+def cooccurrence_deltas(
+    previous_items: Iterable[int], new_items: Iterable[int]
+) -> Dict[Tuple[int, int], int]:
+    """
+    Pair increments for one user who adds `new_items` to a purchase
+    history of `previous_items` (both directions of every pair).
+
+    Only pairs involving an item the user had not bought before change:
+    new x previous, and new x new.
+
+    Example:
+        >>> cooccurrence_deltas([1], [2])
+        {(2, 1): 1, (1, 2): 1}
+    """
+    previous = set(previous_items)
+    added = [item for item in dict.fromkeys(new_items) if item not in previous]
+
+    deltas: Dict[Tuple[int, int], int] = {}
+    for i, item in enumerate(added):
+        for other in previous:
+            deltas[(item, other)] = 1
+            deltas[(other, item)] = 1
+        for other in added[i + 1:]:
+            deltas[(item, other)] = 1
+            deltas[(other, item)] = 1
+    return deltas
+
+
+def upsert_increment(
+    db,
+    table,
+    key_columns: Sequence[str],
+    count_column: str,
+    rows: List[Dict]
+) -> None:
+    """
+    Add rows[count_column] to existing counters (insert missing keys),
+    as one executemany statement on the caller's transaction.
+
+    Uses the dialect's native upsert (MySQL ON DUPLICATE KEY UPDATE,
+    SQLite ON CONFLICT), so concurrent orders cannot lose increments.
+    Rows are written in key order, so concurrent transactions lock
+    counter rows in the same order (no lock-order deadlocks).
+    """
+    if not rows:
+        return
+    rows = stable_sort(rows, key=compound_key(*(
+        (lambda row, column=column: row[column], False)
+        for column in key_columns
+    )))
+
+    dialect = db.get_bind().dialect.name
+    counter = table.c[count_column]
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert as mysql_insert
+        stmt = mysql_insert(table)
+        stmt = stmt.on_duplicate_key_update(
+            {count_column: counter + stmt.inserted[count_column]}
+        )
+        db.execute(stmt, rows)
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+        stmt = sqlite_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c[k] for k in key_columns],
+            set_={count_column: counter + stmt.excluded[count_column]},
+        )
+        db.execute(stmt, rows)
+    else:
+        # Portable fallback: UPDATE, then INSERT keys that did not exist
+        for row in rows:
+            condition = [table.c[k] == row[k] for k in key_columns]
+            updated = db.execute(
+                table.update()
+                .where(*condition)
+                .values({count_column: counter + row[count_column]})
+            )
+            if updated.rowcount == 0:
+                db.execute(insert(table), [row])
+
+
+def rebuild_item_cooccurrence(batch_size: int = 5000) -> int:
+    """
+    Recompute the item_cooccurrence table from all existing orders
+    (backfill, or repair after drift).
+
+    Replaces the table contents in one transaction.
+
+    Returns:
+        Number of rows written (both directions of every pair)
+
+    Time complexity: O(Σ h_u²), h_u is user u's distinct item count
+    """
+    db = db_session()
+    try:
+        user_items: Dict[int, set] = defaultdict(set)
+        for user_id, menu_item_id in (
+            db.query(Order.user_id, OrderItem.menu_item_id)
+            .join(OrderItem, Order.id == OrderItem.order_id)
+            .distinct()
+            .all()
+        ):
+            user_items[user_id].add(menu_item_id)
+
+        counts: Dict[Tuple[int, int], int] = defaultdict(int)
+        for items in user_items.values():
+            items = list(items)
+            for i, item in enumerate(items):
+                for other in items[i + 1:]:
+                    counts[(item, other)] += 1
+                    counts[(other, item)] += 1
+
+        db.query(ItemCooccurrence).delete(synchronize_session=False)
+        rows = [
+            {"item_id": a, "other_item_id": b, "user_count": n}
+            for (a, b), n in counts.items()
+        ]
+        for start in range(0, len(rows), batch_size):
+            db.execute(
+                insert(ItemCooccurrence.__table__),
+                rows[start:start + batch_size]
+            )
+        db.commit()
+        return len(rows)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+# ===========================================================================
+# Materialized Sales Counters
+# ===========================================================================
+#
+# item_sales.units_sold = SUM(order_items.quantity) per menu item, so the
+# popular items are a top-k index read instead of an order_items scan.
+#
+# Maintenance:
+# - Incremental: record_order() adds each order's quantities
+# - Reconcile / backfill: rebuild_item_sales()
+#   (python recommendation_jobs.py rebuild-sales)
+# ===========================================================================
+
+
+def get_top_selling(db, limit: int) -> List[Tuple[int, int]]:
+    """
+    Best-selling items as [(menu_item_id, units_sold)],
+    by units sold (descending), ties by item id.
+
+    Reads item_sales; aggregates order_items in SQL instead when the
+    counter table is missing or empty (not backfilled yet). With the
+    "snapshot" engine the snapshot's popularity vector is read instead
+    (no query; as of the snapshot).
+
+    Time complexity: O(k) index read, O(n) on the fallback path
+    """
+    if _engine == "snapshot":
+        snapshot = get_model_snapshot()
+        if snapshot is not None and len(snapshot.sales_items):
+            return snapshot.top_selling(limit)
+    try:
+        rows = (
+            db.query(ItemSales.menu_item_id, ItemSales.units_sold)
+            .filter(ItemSales.units_sold > 0)
+            .order_by(
+                ItemSales.units_sold.desc(), ItemSales.menu_item_id.asc()
+            )
+            .limit(limit)
+            .all()
+        )
+    except SQLAlchemyError:
+        db.rollback()
+        rows = []
+    if rows:
+        return [(item_id, int(units)) for item_id, units in rows]
+
+    units = func.sum(OrderItem.quantity)
+    rows = (
+        db.query(OrderItem.menu_item_id, units)
+        .group_by(OrderItem.menu_item_id)
+        .having(units > 0)
+        .order_by(units.desc(), OrderItem.menu_item_id.asc())
+        .limit(limit)
+        .all()
+    )
+    return [(item_id, int(total)) for item_id, total in rows]
+
+
+def rebuild_item_sales(batch_size: int = 5000) -> Tuple[int, int]:
+    """
+    Recompute item_sales from order_items (backfill, or repair drift
+    from orders written outside api_create_order).
+
+    Replaces the table contents in one transaction.
+
+    Returns:
+        (rows written, rows that differed from the stored counters)
+
+    Time complexity: O(n), n is total order items count (one GROUP BY)
+    """
+    db = db_session()
+    try:
+        totals = {
+            item_id: int(total)
+            for item_id, total in (
+                db.query(OrderItem.menu_item_id, func.sum(OrderItem.quantity))
+                .group_by(OrderItem.menu_item_id)
+                .all()
+            )
+            if total
+        }
+        stored = dict(
+            db.query(ItemSales.menu_item_id, ItemSales.units_sold).all()
+        )
+        corrected = sum(
+            1 for item_id in totals.keys() | stored.keys()
+            if totals.get(item_id, 0) != stored.get(item_id, 0)
+        )
+
+        db.query(ItemSales).delete(synchronize_session=False)
+        rows = [
+            {"menu_item_id": item_id, "units_sold": total}
+            for item_id, total in totals.items()
+        ]
+        for start in range(0, len(rows), batch_size):
+            db.execute(
+                insert(ItemSales.__table__), rows[start:start + batch_size]
+            )
+        db.commit()
+        return len(rows), corrected
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+# ===========================================================================
+# Order Hook
+# ===========================================================================
+
+
+# Attempts of record_order's transaction when it loses a lock conflict
+RECORD_ORDER_ATTEMPTS = 3
+# MySQL: lock wait timeout, deadlock
+_LOCK_CONFLICT_CODES = (1205, 1213)
+
+
+def _is_lock_conflict(exc: OperationalError) -> bool:
+    """
+    Whether an error is a deadlock / lock timeout worth retrying.
+    """
+    args = getattr(exc.orig, "args", ())
+    if args and args[0] in _LOCK_CONFLICT_CODES:
+        return True
+    # SQLite
+    return "database is locked" in str(exc.orig)
+
+
+def record_order(
+    db, user_id: int, order_id: int, lines: Iterable[Tuple[int, int]]
+) -> bool:
+    """
+    Update recommendation indexes (co-purchase pairs, sales counters)
+    for a committed order, in a short transaction of its own.
+
+    Called by api_create_order right after the order commits, so the
+    order transaction never holds the hot counter rows (best sellers)
+    and a counter failure never fails an order. Deadlocks / lock
+    timeouts are retried; other failures are logged and leave the
+    counters behind until rebuild-sales / rebuild-cooccurrence.
+
+    Args:
+        db: The order's session (no transaction pending)
+        user_id: Buyer
+        order_id: The new order (only older orders count as previous
+                  purchases, so concurrent orders of one user count
+                  each pair once)
+        lines: (menu_item_id, quantity) for each order line
+
+    Returns:
+        Whether the counters were updated
+
+    Time complexity: O(new items x user's distinct item count)
+    """
+    quantities: Dict[int, int] = defaultdict(int)
+    for menu_item_id, quantity in lines:
+        quantities[menu_item_id] += quantity
+    if not quantities:
+        return True
+
+    for attempt in range(1, RECORD_ORDER_ATTEMPTS + 1):
+        try:
+            _record_order_counters(db, user_id, order_id, quantities)
+            db.commit()
+            return True
+        except OperationalError as exc:
+            db.rollback()
+            if attempt < RECORD_ORDER_ATTEMPTS and _is_lock_conflict(exc):
+                continue
+            logger.exception("Counters of order %s not updated", order_id)
+            return False
+        except SQLAlchemyError:
+            db.rollback()
+            logger.exception("Counters of order %s not updated", order_id)
+            return False
+    return False
+
+
+def _record_order_counters(
+    db, user_id: int, order_id: int, quantities: Dict[int, int]
+) -> None:
+    """
+    record_order's statements (the caller commits).
+    """
+    upsert_increment(
+        db,
+        ItemSales.__table__,
+        ("menu_item_id",),
+        "units_sold",
+        [
+            {"menu_item_id": item_id, "units_sold": quantity}
+            for item_id, quantity in quantities.items()
+        ],
+    )
+
+    previous = [
+        row.menu_item_id
+        for row in (
+            db.query(OrderItem.menu_item_id)
+            .join(Order, OrderItem.order_id == Order.id)
+            .filter(Order.user_id == user_id, Order.id < order_id)
+            .distinct()
+            .all()
+        )
+    ]
+
+    deltas = cooccurrence_deltas(previous, quantities)
+    upsert_increment(
+        db,
+        ItemCooccurrence.__table__,
+        ("item_id", "other_item_id"),
+        "user_count",
+        [
+            {"item_id": a, "other_item_id": b, "user_count": n}
+            for (a, b), n in deltas.items()
+        ],
+    )
+
+
 def get_popular_items(limit: int = 3) -> List[Dict]:
     """
     Cold start handling: get popular items (highest sales volume).
 
     When user has no purchase history, use this function as fallback.
 
-    Sales volume calculation:
-    - Count occurrences of each item in order_items table
-      (considering quantity)
+    Sales volume: units sold per item (sum of order_items quantities),
+    read from the materialized item_sales counters (get_top_selling)
 
     Args:
         limit: Number of items to return
@@ -366,34 +827,14 @@ def get_popular_items(limit: int = 3) -> List[Dict]:
     Returns:
         Popular items list (includes complete item information)
 
-    Time complexity: O(n), n is total order items count
+    Time complexity: O(k), k = limit (top-k index read + item lookup)
     """
     db = db_session()
     try:
-        # Get all order items
-        all_order_items = db.query(
-            OrderItem.menu_item_id,
-            OrderItem.quantity
-        ).all()
-
-        # Calculate sales volume at Python side
-        # (not using SQL aggregation)
-        sales_count = defaultdict(int)
-        for item in all_order_items:
-            sales_count[item.menu_item_id] += item.quantity
-
-        # Convert to list and add scores
-        sales_list = [
-            {'item_id': item_id, 'score': count}
-            for item_id, count in sales_count.items()
-        ]
-
-        # Use quick sort to sort by sales volume (descending)
-        if sales_list:
-            quick_sort_by_score(sales_list, descending=True)
-
-        # Get detailed information for top N popular items
-        top_item_ids = [item['item_id'] for item in sales_list[:limit]]
+        # Top N by sales volume (descending), ties by item id
+        top_selling = get_top_selling(db, limit)
+        sales_count = dict(top_selling)
+        top_item_ids = [item_id for item_id, _ in top_selling]
 
         if not top_item_ids:
             # If no sales records, return first few items from database
@@ -446,24 +887,907 @@ def get_popular_items(limit: int = 3) -> List[Dict]:
                     'score': 0
                 })
 
+        _remember_popular(limit, result)
         return result
     finally:
         db.close()
 
 
+# ===========================================================================
+# Trending Now
+# ===========================================================================
+#
+# Time-decayed order counts (trending.py), fed by api_create_order.
+# The shortest window with enough activity wins; the list is padded with
+# all-time popular items when fewer items are trending.
+# ===========================================================================
+
+TRENDING_WINDOWS = ("hour", "day")
+# Smallest decayed score that counts as trending
+# (about one unit ordered within the window)
+MIN_TRENDING_SCORE = 1.0
+
+
+def get_trending_items(limit: int = 3) -> Tuple[List[Dict], str]:
+    """
+    "Trending Now" items, or popular items when nothing is trending.
+
+    Returns:
+        (items list, "Trending Now" or "Popular Items")
+
+    Time complexity: O(k), k = limit (ranking slice + item lookup)
+    """
+    top: List[Tuple[int, float]] = []
+    for window in TRENDING_WINDOWS:
+        top = [
+            (item_id, score)
+            for item_id, score in get_trending(window, limit)
+            if score >= MIN_TRENDING_SCORE
+        ]
+        if top:
+            break
+    if not top:
+        return get_popular_items(limit), "Popular Items"
+
+    db = db_session()
+    try:
+        items = db.query(MenuItem).filter(
+            MenuItem.id.in_([item_id for item_id, _ in top])
+        ).all()
+    finally:
+        db.close()
+
+    item_dict = {item.id: item for item in items}
+    result = [
+        _menu_item_result(item_dict[item_id], 'Trending Now', round(score, 2))
+        for item_id, score in top
+        if item_id in item_dict
+    ]
+    if not result:
+        return get_popular_items(limit), "Popular Items"
+
+    if len(result) < limit:
+        existing_ids = {item['id'] for item in result}
+        for item in get_popular_items(limit + len(result)):
+            if len(result) == limit:
+                break
+            if item['id'] not in existing_ids:
+                result.append(item)
+    return result, "Trending Now"
+
+
+# ===========================================================================
+# Single-statement Pipeline ("sql" engine)
+# ===========================================================================
+#
+# The user_cf pipeline costs up to seven round trips per call (history,
+# similar users, candidates, menu details, popular items fallback).
+# compute_recommendations_sql sends one statement:
+#
+#   WITH target_items    -- step 1: the user's distinct items
+#        similar_users   -- step 2: other users, common item count
+#        neighbour_items -- step 3: their distinct items not in target
+#        top_candidates  -- step 4-6: SUM(common) per item, top k
+#        top_selling     -- fallback: item_sales top k
+#   top_candidates UNION ALL top_selling
+#   LEFT JOIN menu_items, plus COUNT(target_items)
+#
+# Scores: score(X) = Σ common(u) / |T| over similar users u who bought X,
+# the user_cf score; ranked on the exact integer sums, ties by item id.
+# get_popular_items only runs (extra queries) when the item_sales rows
+# cannot reproduce its result (table empty, deleted items, short list).
+# ===========================================================================
+
+
+class QueryCounter:
+    """
+    Count SQL statements executed by this thread (see count_queries).
+    """
+
+    def __init__(self):
+        self.count = 0
+
+
+_query_counters = threading.local()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    counters = getattr(_query_counters, "stack", None)
+    if counters:
+        for counter in counters:
+            counter.count += 1
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryCounter]:
+    """
+    Count the statements executed in the block
+    (current thread only, any engine).
+
+    Example:
+        >>> with count_queries() as counter:
+        ...     pass
+        >>> counter.count
+        0
+    """
+    counter = QueryCounter()
+    stack = getattr(_query_counters, "stack", None)
+    if stack is None:
+        stack = _query_counters.stack = []
+    stack.append(counter)
+    try:
+        yield counter
+    finally:
+        stack.remove(counter)
+
+
+def _recommendation_statement(user_id: int, limit: int):
+    """
+    Build the single recommendation statement (see section comment).
+
+    Rows: (source, menu_item_id, weight, target_count, MenuItem or None),
+    source 0 = personal candidates, 1 = best sellers.
+    """
+    target = (
+        select(OrderItem.menu_item_id)
+        .join(Order, OrderItem.order_id == Order.id)
+        .where(Order.user_id == user_id)
+        .distinct()
+        .cte("target_items")
+    )
+    target_ids = select(target.c.menu_item_id)
+
+    similar = (
+        select(
+            Order.user_id.label("user_id"),
+            func.count(distinct(OrderItem.menu_item_id)).label("common"),
+        )
+        .join(OrderItem, Order.id == OrderItem.order_id)
+        .where(
+            OrderItem.menu_item_id.in_(target_ids),
+            Order.user_id != user_id,
+        )
+        .group_by(Order.user_id)
+        .cte("similar_users")
+    )
+
+    neighbour_items = (
+        select(
+            Order.user_id.label("user_id"),
+            OrderItem.menu_item_id.label("menu_item_id"),
+        )
+        .join(OrderItem, Order.id == OrderItem.order_id)
+        .join(similar, similar.c.user_id == Order.user_id)
+        .where(OrderItem.menu_item_id.not_in(target_ids))
+        .distinct()
+        .cte("neighbour_items")
+    )
+
+    weight = func.sum(similar.c.common)
+    candidates = (
+        select(
+            literal(0).label("source"),
+            neighbour_items.c.menu_item_id.label("menu_item_id"),
+            weight.label("weight"),
+        )
+        .join(similar, similar.c.user_id == neighbour_items.c.user_id)
+        .group_by(neighbour_items.c.menu_item_id)
+        .order_by(weight.desc(), neighbour_items.c.menu_item_id.asc())
+        .limit(limit)
+        .cte("top_candidates")
+    )
+
+    best_sellers = (
+        select(
+            literal(1).label("source"),
+            ItemSales.menu_item_id.label("menu_item_id"),
+            ItemSales.units_sold.label("weight"),
+        )
+        .where(ItemSales.units_sold > 0)
+        .order_by(ItemSales.units_sold.desc(), ItemSales.menu_item_id.asc())
+        .limit(limit)
+        .cte("top_selling")
+    )
+
+    ranked = union_all(
+        select(candidates), select(best_sellers)
+    ).subquery("ranked")
+    target_count = (
+        select(func.count()).select_from(target).scalar_subquery()
+    )
+
+    return (
+        select(
+            ranked.c.source,
+            ranked.c.menu_item_id,
+            ranked.c.weight,
+            target_count.label("target_count"),
+            MenuItem,
+        )
+        .select_from(ranked)
+        .outerjoin(MenuItem, MenuItem.id == ranked.c.menu_item_id)
+        .order_by(
+            ranked.c.source,
+            ranked.c.weight.desc(),
+            ranked.c.menu_item_id.asc(),
+        )
+    )
+
+
+def _menu_item_result(item, reason: str, score) -> Dict:
+    """
+    Recommendation dictionary for one MenuItem.
+    """
+    return {
+        'id': item.id,
+        'name': item.name,
+        'price': float(item.price),
+        'description': item.description or '',
+        'image_url': item.image_url or '/static/images/blank.png',
+        'category': item.category or '',
+        'rating': float(item.rating or 0),
+        'recommendation_reason': reason,
+        'score': score
+    }
+
+
+def _popular_from_rows(best_sellers: List[Any], count: int) -> List[Dict]:
+    """
+    get_popular_items(count) from the statement's best-seller rows,
+    or from get_popular_items itself when the rows cannot reproduce it.
+    """
+    top = best_sellers[:count]
+    if len(top) < count or any(row.MenuItem is None for row in top):
+        return get_popular_items(count)
+    return [
+        _menu_item_result(row.MenuItem, 'Popular Choice', int(row.weight))
+        for row in top
+    ]
+
+
+def compute_recommendations_sql(
+    user_id: int, limit: int = 3
+) -> Tuple[List[Dict], str]:
+    """
+    compute_recommendations for a logged-in user in one round trip.
+
+    Returns the same result as the "user_cf" engine (see section comment).
+
+    Time complexity: one statement (same index work as the multi-query
+    pipeline), then O(limit) in Python
+    """
+    db = db_session()
+    try:
+        rows = db.execute(_recommendation_statement(user_id, limit)).all()
+    except SQLAlchemyError:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    candidates = [row for row in rows if row.source == 0]
+    best_sellers = [row for row in rows if row.source == 1]
+    target_count = rows[0].target_count if rows else 0
+
+    # Cold start, no similar users, or no candidate items
+    if not target_count or not candidates:
+        return _popular_from_rows(best_sellers, limit), "Popular Items"
+
+    result = [
+        _menu_item_result(
+            row.MenuItem, 'Based on Your Taste',
+            int(row.weight) / target_count
+        )
+        for row in candidates
+        if row.MenuItem is not None
+    ]
+
+    # If recommendations insufficient, supplement with popular items
+    if len(result) < limit:
+        existing_ids = {r['id'] for r in result}
+        for item in _popular_from_rows(best_sellers, limit - len(result)):
+            if item['id'] not in existing_ids:
+                item['recommendation_reason'] = 'Popular Choice'
+                result.append(item)
+                if len(result) >= limit:
+                    break
+
+    return result, "Recommended for You"
+
+
+# ===========================================================================
+# Precomputed Lists
+# ===========================================================================
+#
+# recommendation_jobs.py precompute writes each active user's top-k
+# ranked candidates (user_recommendations) under a new generation.
+# A list is used when:
+# - It belongs to the newest complete generation
+# - The request's limit <= the generation's top_k
+#   (the top `limit` candidates are a prefix of the top k)
+# - The user has not ordered since the generation started
+#   (otherwise the list misses their new purchases)
+# Everyone else goes through the online engine.
+# ===========================================================================
+
+
+def get_precomputed_recommendations(
+    user_id: int, limit: int
+) -> Optional[Tuple[List[Dict], str]]:
+    """
+    Recommendations from the newest precomputed generation, or None
+    when the user has no usable list (see section comment).
+
+    One statement (candidates + menu details); get_popular_items only
+    runs when the list needs padding.
+    """
+    latest = (
+        select(func.max(RecommendationGeneration.id))
+        .where(RecommendationGeneration.status == "complete")
+        .scalar_subquery()
+    )
+    ordered_since = exists().where(
+        Order.user_id == user_id,
+        Order.date >= RecommendationGeneration.started_at,
+    )
+
+    db = db_session()
+    try:
+        rows = (
+            db.query(
+                UserRecommendation.menu_item_id,
+                UserRecommendation.score,
+                MenuItem,
+            )
+            .join(
+                RecommendationGeneration,
+                RecommendationGeneration.id ==
+                UserRecommendation.generation_id
+            )
+            .outerjoin(MenuItem, MenuItem.id == UserRecommendation.menu_item_id)
+            .filter(
+                UserRecommendation.generation_id == latest,
+                UserRecommendation.user_id == user_id,
+                UserRecommendation.position < limit,
+                RecommendationGeneration.top_k >= limit,
+                ~ordered_since,
+            )
+            .order_by(UserRecommendation.position)
+            .all()
+        )
+    except SQLAlchemyError:
+        # Tables not created yet: online path
+        db.rollback()
+        return None
+    finally:
+        db.close()
+
+    if not rows:
+        return None
+    return personal_recommendations(
+        [(item_id, score) for item_id, score, _ in rows],
+        {item.id: item for _, _, item in rows if item is not None},
+        limit,
+    )
+
+
+# ===========================================================================
+# Recommendation Cache
+# ===========================================================================
+#
+# Results only change when an order is placed (or the menu is edited),
+# so get_recommendations serves them from a per-user LRU with a TTL.
+#
+# Validity of a cached (user_id, limit) entry:
+# - Younger than the TTL
+# - Computed after that user's latest order (own orders always
+#   invalidate, whichever worker took the order): entries remember the
+#   user's latest order ID (one index-only query on
+#   ix_orders_user_date_id, read before computing, i.e. inside the
+#   latency budget). The worker that takes the order drops the buyer's
+#   entries at once; every worker polls the orders table on a
+#   background thread (every poll_interval seconds) and drops entries
+#   older than their user's newest order.
+# - At most `max_stale_orders` order IDs allocated since it was
+#   computed, as known from the poll (None: other users' orders only
+#   age out through the TTL)
+#
+# Lookups never touch the database. The poll re-scans the orders of the
+# last ORDER_SETTLE_SECONDS (see recommendation_pairings.py, Watermark),
+# so an order whose lower ID commits late is still seen. Markers are
+# read at the start of a computation, so an order committed while a
+# result is being computed also invalidates that result.
+# Anonymous visitors share one entry (user_id None: popular items).
+# ===========================================================================
+
+DEFAULT_CACHE_SIZE = 1024
+DEFAULT_CACHE_TTL = 300.0
+DEFAULT_ORDER_POLL_INTERVAL = 1.0
+# Orders re-scanned by every poll (longer than any order transaction)
+ORDER_SETTLE_SECONDS = 60.0
+
+
+def latest_order_id(user_id: int) -> int:
+    """
+    ID of the user's newest order (0: none), the cache's per-user
+    order marker.
+
+    Time complexity: O(log n) index-only lookup
+    """
+    db = db_session()
+    try:
+        return db.query(func.max(Order.id)).filter(
+            Order.user_id == user_id
+        ).scalar() or 0
+    finally:
+        db.close()
+
+
+class RecommendationCache:
+    """
+    Per-user recommendation results with order-driven invalidation.
+
+    Example:
+        >>> cache = RecommendationCache(
+        ...     maxsize=100, ttl=60.0, latest_order={7: 10}.get
+        ... )
+        >>> marker = cache.markers(7)
+        >>> cache.set(7, 3, marker, ([], "Popular Items"))
+        >>> cache.get(7, 3)
+        ([], 'Popular Items')
+        >>> cache.apply_orders([(7, 11)])  # polled: taken by another worker
+        >>> cache.get(7, 3) is MISSING
+        True
+    """
+
+    def __init__(
+        self,
+        maxsize: int = DEFAULT_CACHE_SIZE,
+        ttl: Optional[float] = DEFAULT_CACHE_TTL,
+        max_stale_orders: Optional[int] = None,
+        poll_interval: Optional[float] = None,
+        latest_order=None
+    ):
+        """
+        Args:
+            poll_interval: Seconds between orders table polls
+                           (None: no poll, this worker's orders only)
+            latest_order: user_id -> newest order ID
+                          (default: latest_order_id, from the database)
+        """
+        self.latest_order = latest_order or latest_order_id
+        self._poller_pid: Optional[int] = None
+        self.configure(maxsize, ttl, max_stale_orders, poll_interval)
+
+    def configure(
+        self,
+        maxsize: int = DEFAULT_CACHE_SIZE,
+        ttl: Optional[float] = DEFAULT_CACHE_TTL,
+        max_stale_orders: Optional[int] = None,
+        poll_interval: Optional[float] = None
+    ) -> None:
+        """
+        (Re)create the cache with new limits; drops all entries.
+        """
+        if max_stale_orders is not None and max_stale_orders < 0:
+            raise ValueError("max_stale_orders must be >= 0")
+        self.max_stale_orders = max_stale_orders
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        # Newest order ID known from the poll
+        self._generation = 0
+        # Orders above this ID are re-scanned by every poll (None: not
+        # polled yet)
+        self._order_floor: Optional[int] = None
+        self.polls = 0
+        self.poll_errors = 0
+        # (user_id, limit) -> ((generation, user's latest order ID) at
+        # compute start, result)
+        self._entries = LRUCache(maxsize, ttl=ttl)
+        # Limits cached so far (order_placed drops (user_id, limit) keys)
+        self._limits: set = set()
+        self.stale = 0
+        self.invalidations = 0
+        self.computes = 0
+        self.queries = 0
+        self.last_queries = 0
+        self.budget_overruns = 0
+
+    def markers(self, user_id: Optional[int]) -> Tuple[int, Optional[int]]:
+        """
+        (newest polled order ID, user's latest order ID) to store with
+        a result; read before computing it.
+        """
+        return (
+            self._generation,
+            self.latest_order(user_id) if user_id else None,
+        )
+
+    def get(self, user_id: Optional[int], limit: int) -> Any:
+        """
+        Cached (items, type) for a user, or MISSING (no database
+        access).
+        """
+        self._start_poller()
+        entry = self._entries.get((user_id, limit))
+        if entry is MISSING:
+            return MISSING
+
+        (generation, _), result = entry
+        if (self.max_stale_orders is not None and
+                self._generation - generation > self.max_stale_orders):
+            self._entries.pop((user_id, limit))
+            self.stale += 1
+            return MISSING
+        return result
+
+    def set(
+        self,
+        user_id: Optional[int],
+        limit: int,
+        markers: Tuple[int, Optional[int]],
+        result: Tuple[List[Dict], str]
+    ) -> None:
+        with self._lock:
+            self._limits.add(limit)
+        self._entries.set((user_id, limit), (markers, result))
+
+    def apply_orders(self, orders: Iterable[Tuple[int, int]]) -> None:
+        """
+        Drop entries computed before their user's newest order.
+
+        Args:
+            orders: [(user_id, newest order ID)] from the orders table
+        """
+        with self._lock:
+            limits = list(self._limits)
+        for user_id, order_id in orders:
+            if order_id > self._generation:
+                self._generation = order_id
+            for limit in limits:
+                entry = self._entries.peek((user_id, limit))
+                if entry is not MISSING and (entry[0][1] or 0) < order_id:
+                    self._entries.pop((user_id, limit))
+                    self.invalidations += 1
+
+    # ----------------------------------------------------------------------
+    # Orders table poll
+    # ----------------------------------------------------------------------
+
+    def _start_poller(self) -> None:
+        """
+        Start the poll thread of this process (again after a fork:
+        threads do not survive it).
+        """
+        pid = os.getpid()
+        if self.poll_interval is None or self._poller_pid == pid:
+            return
+        with self._lock:
+            if self._poller_pid == pid:
+                return
+            self._poller_pid = pid
+            threading.Thread(
+                target=self._run_poller,
+                name="recommendation-orders",
+                daemon=True,
+            ).start()
+
+    def _run_poller(self) -> None:
+        while True:
+            interval = self.poll_interval
+            if interval is None:
+                return
+            try:
+                self.poll_orders()
+            except SQLAlchemyError:
+                self.poll_errors += 1
+                logger.exception("Recommendation order poll failed")
+            finally:
+                # Outside Flask's teardown: release the thread's session
+                db_session.remove()
+            time.sleep(interval)
+
+    def poll_orders(self) -> None:
+        """
+        Apply the orders of the last ORDER_SETTLE_SECONDS (and newer)
+        to the cache, then advance the re-scan floor.
+
+        Time complexity: O(orders since the floor) (primary key range)
+        """
+        # recommendation_pairings imports this module
+        from recommendation_pairings import settled_order_id
+
+        floor = self._order_floor
+        db = db_session()
+        try:
+            if floor is None:
+                # Start: entries are computed from now on (their markers
+                # cover everything committed so far)
+                self._generation = db.query(func.max(Order.id)).scalar() or 0
+                rows = []
+            else:
+                rows = (
+                    db.query(Order.user_id, func.max(Order.id))
+                    .filter(Order.id > floor)
+                    .group_by(Order.user_id)
+                    .all()
+                )
+            self._order_floor = settled_order_id(
+                db, floor or 0, ORDER_SETTLE_SECONDS
+            )
+        finally:
+            db.close()
+        self.apply_orders(rows)
+        self.polls += 1
+
+    def record_compute(self, queries: int) -> None:
+        """
+        Count one uncached computation and its database statements.
+        """
+        with self._lock:
+            self.computes += 1
+            self.queries += queries
+            self.last_queries = queries
+
+    def record_overrun(self) -> None:
+        """
+        Count one request served the popular fallback (latency budget).
+        """
+        with self._lock:
+            self.budget_overruns += 1
+
+    def order_placed(self, user_id: int) -> None:
+        """
+        Invalidate after a committed order: drop the buyer's entries
+        (other workers notice through the poll, which also ages other
+        users' entries per max_stale_orders).
+        """
+        with self._lock:
+            self.invalidations += 1
+            limits = list(self._limits)
+        for limit in limits:
+            self._entries.pop((user_id, limit))
+
+    def clear(self) -> None:
+        """
+        Drop all entries (menu edits, engine switch).
+        """
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        LRU counters plus stale drops; hit_rate counts stale entries
+        as misses.
+        """
+        stats = self._entries.stats()
+        lookups = stats["hits"] + stats["misses"]
+        stats["hits"] -= self.stale
+        stats["misses"] += self.stale
+        stats["hit_rate"] = (stats["hits"] / lookups) if lookups else 0.0
+        stats["stale"] = self.stale
+        stats["order_invalidations"] = self.invalidations
+        stats["max_stale_orders"] = self.max_stale_orders
+        stats["order_polls"] = self.polls
+        stats["order_poll_errors"] = self.poll_errors
+        stats["order_poll_interval"] = self.poll_interval
+        stats["engine"] = _engine
+        stats["computes"] = self.computes
+        stats["queries_last_compute"] = self.last_queries
+        stats["queries_per_compute"] = (
+            self.queries / self.computes if self.computes else 0.0
+        )
+        stats["budget_overruns"] = self.budget_overruns
+        stats["in_flight"] = len(_in_flight)
+        return stats
+
+
+recommendation_cache = RecommendationCache()
+
+
+def configure_recommendation_cache(
+    maxsize: int = DEFAULT_CACHE_SIZE,
+    ttl: Optional[float] = DEFAULT_CACHE_TTL,
+    max_stale_orders: Optional[int] = None,
+    poll_interval: Optional[float] = DEFAULT_ORDER_POLL_INTERVAL
+) -> None:
+    """
+    Apply the RECOMMENDATION_CACHE_* settings (called at startup).
+    """
+    recommendation_cache.configure(
+        maxsize, ttl, max_stale_orders, poll_interval
+    )
+
+
+def invalidate_recommendations(user_id: Optional[int] = None) -> None:
+    """
+    After an order commits, pass the buyer's user_id;
+    with no user_id (menu edits) drop every cached result.
+    """
+    if user_id is None:
+        recommendation_cache.clear()
+    else:
+        recommendation_cache.order_placed(user_id)
+
+
+# ===========================================================================
+# Latency Budget
+# ===========================================================================
+#
+# With a budget, a cache miss is computed on a background thread and the
+# request waits at most `budget` seconds:
+# - Finished in time: the personalized result
+# - Otherwise: the last popular list (no database access), while the
+#   computation finishes and stores its result in recommendation_cache,
+#   so the next page view is a cache hit
+# - Failed on a database error: the same popular list (logged)
+# Concurrent misses for the same (user, limit) share one computation.
+# ===========================================================================
+
+# Background computations at a time (bounds extra database connections)
+BUDGET_WORKERS = 4
+
+_executor: Optional[ThreadPoolExecutor] = None
+_in_flight: Dict[Tuple[Optional[int], int], Future] = {}
+_in_flight_lock = threading.Lock()
+# limit -> last get_popular_items(limit) result
+_popular_fallback: Dict[int, List[Dict]] = {}
+
+
+def _remember_popular(limit: int, items: List[Dict]) -> None:
+    _popular_fallback[limit] = [dict(item) for item in items]
+
+
+def popular_fallback(limit: int) -> List[Dict]:
+    """
+    Last computed popular items for `limit` (or a longer list cut down).
+
+    Only the first call (nothing remembered yet) reads the database,
+    through get_popular_items (an index read on item_sales); errors
+    there give [] so the page still renders.
+    """
+    items = _popular_fallback.get(limit)
+    if items is None:
+        longer = [n for n in _popular_fallback if n >= limit]
+        if longer:
+            items = _popular_fallback[min(longer)][:limit]
+        else:
+            try:
+                items = get_popular_items(limit)
+            except SQLAlchemyError:
+                return []
+    return [dict(item) for item in items]
+
+
+def _compute_and_cache(
+    user_id: Optional[int], limit: int
+) -> Tuple[List[Dict], str]:
+    markers = recommendation_cache.markers(user_id)
+    with count_queries() as counter:
+        result = compute_recommendations(user_id, limit)
+    recommendation_cache.record_compute(counter.count)
+    recommendation_cache.set(user_id, limit, markers, result)
+    return result
+
+
+def _compute_in_background(
+    user_id: Optional[int], limit: int
+) -> Tuple[List[Dict], str]:
+    try:
+        return _compute_and_cache(user_id, limit)
+    finally:
+        # Worker threads are outside Flask's teardown: release the
+        # thread's session / connection here
+        db_session.remove()
+
+
+def _submit(user_id: Optional[int], limit: int) -> Future:
+    """
+    Start (or join) the background computation for (user_id, limit).
+    """
+    global _executor
+    key = (user_id, limit)
+    with _in_flight_lock:
+        future = _in_flight.get(key)
+        if future is not None:
+            return future
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=BUDGET_WORKERS,
+                thread_name_prefix="recommendations",
+            )
+        future = _executor.submit(_compute_in_background, user_id, limit)
+        _in_flight[key] = future
+
+    def _done(_future: Future) -> None:
+        with _in_flight_lock:
+            if _in_flight.get(key) is _future:
+                del _in_flight[key]
+
+    future.add_done_callback(_done)
+    return future
+
+
 def get_recommendations(
+    user_id: Optional[int],
+    limit: int = 3,
+    budget: Optional[float] = None
+) -> Tuple[List[Dict], str]:
+    """
+    Main entry function: get "Recommended for You" recommendation results,
+    served from recommendation_cache when still valid.
+
+    Args:
+        user_id: Current logged-in user ID (None means not logged in)
+        limit: Number of recommendations to return
+        budget: Seconds to wait for a cache miss (None: no limit);
+                see Latency Budget
+
+    Returns:
+        (recommended items list, recommendation type description);
+        the lists are shared with the cache and must not be modified
+
+    Time complexity: O(1) on a cache hit, see compute_recommendations
+    """
+    items, recommendation_type, _ = resolve_recommendations(
+        user_id, limit, budget
+    )
+    return items, recommendation_type
+
+
+def resolve_recommendations(
+    user_id: Optional[int],
+    limit: int = 3,
+    budget: Optional[float] = None
+) -> Tuple[List[Dict], str, bool]:
+    """
+    get_recommendations, also telling whether the result is the user's
+    actual one.
+
+    Returns:
+        (items, type, final); final is False for the popular list served
+        because the budget ran out (the real result is still computing,
+        so callers must not let clients keep it) or the computation
+        failed on a database error (logged)
+    """
+    user_id = user_id or None
+    cached = recommendation_cache.get(user_id, limit)
+    if cached is not MISSING:
+        return cached + (True,)
+
+    if budget is None:
+        return _compute_and_cache(user_id, limit) + (True,)
+
+    future = _submit(user_id, limit)
+    try:
+        return future.result(timeout=budget) + (True,)
+    except FutureTimeout:
+        recommendation_cache.record_overrun()
+    except SQLAlchemyError:
+        logger.exception("Recommendation computation failed")
+    return popular_fallback(limit), "Popular Items", False
+
+
+def compute_recommendations(
     user_id: Optional[int], limit: int = 3
 ) -> Tuple[List[Dict], str]:
     """
-    Main entry function: get "Recommended for You" recommendation results.
+    Compute "Recommended for You" results (uncached).
 
     Complete algorithm flow:
     1. Get user purchase history
     2. If no history, return popular items (cold start handling)
     3. Find similar users
     4. Generate candidate items and calculate scores
-    5. Sort using quick sort
+       (steps 3-4 are one co-purchase index lookup with the
+       "item_cf" engine; the "lsh" engine finds approximate similar
+       users in step 3; the "snapshot" engine runs steps 1-4 on the
+       mapped model, see compute_recommendations_snapshot)
+    5. Sort by score
     6. Return top N recommendations
+    (the "sql" engine runs steps 1-6 as one statement,
+    see compute_recommendations_sql; users with a precomputed list
+    skip all steps, see get_precomputed_recommendations)
 
     Args:
         user_id: Current logged-in user ID (None means not logged in)
@@ -477,10 +1801,31 @@ def get_recommendations(
     - m: Similar users' purchase record count
     - k: Candidate items count
     """
-    # Not logged in user: return popular items
+    # Not logged in user: return trending / popular items
     if not user_id:
+        if _use_trending:
+            return get_trending_items(limit)
         return get_popular_items(limit), "Popular Items"
 
+    if _use_precomputed:
+        precomputed = get_precomputed_recommendations(user_id, limit)
+        if precomputed is not None:
+            return precomputed
+
+    if _engine == "sql":
+        try:
+            return compute_recommendations_sql(user_id, limit)
+        except SQLAlchemyError:
+            # e.g. item_sales not created yet: multi-query pipeline
+            pass
+
+    if _engine == "snapshot":
+        snapshot = get_model_snapshot()
+        if snapshot is not None and not _ordered_since(
+            user_id, snapshot.last_order_id
+        ):
+            return compute_recommendations_snapshot(snapshot, user_id, limit)
+
     # Step 1: Get user purchase history
     purchased_items = get_user_purchase_history(user_id)
 
@@ -488,72 +1833,145 @@ def get_recommendations(
     if not purchased_items:
         return get_popular_items(limit), "Popular Items"
 
-    # Step 2: Find similar users
-    similar_users = find_similar_users(user_id, purchased_items)
+    if _engine == "item_cf":
+        # Steps 2-4 in one lookup on the co-purchase index
+        candidate_scores = get_item_cf_candidates(purchased_items)
+    else:
+        # Step 2: Find similar users
+        if _engine == "lsh":
+            similar_users = find_similar_users_lsh(user_id, purchased_items)
+        else:
+            similar_users = find_similar_users(user_id, purchased_items)
 
-    # If no similar users, return popular items
-    if not similar_users:
-        return get_popular_items(limit), "Popular Items"
+        # If no similar users, return popular items
+        if not similar_users:
+            return get_popular_items(limit), "Popular Items"
 
-    # Step 3 and 4: Generate candidate items and calculate scores
-    candidate_scores = get_candidate_items(purchased_items, similar_users)
+        # Step 3 and 4: Generate candidate items and calculate scores
+        candidate_scores = get_candidate_items(
+            purchased_items, similar_users
+        )
 
     # If no candidate items, return popular items
     if not candidate_scores:
         return get_popular_items(limit), "Popular Items"
 
-    # Convert to list format
-    candidates = [
-        {'item_id': item_id, 'score': score}
-        for item_id, score in candidate_scores.items()
-    ]
-
-    # Step 5: Sort by score using quick sort (descending)
-    quick_sort_by_score(candidates, descending=True)
+    # Step 5: Sort by score (descending), ties by item id
+    top_candidates = rank_candidates(candidate_scores, limit)
 
     # Get detailed information for top N recommended items
-    top_candidates = candidates[:limit]
-    top_item_ids = [c['item_id'] for c in top_candidates]
-
     db = db_session()
     try:
         items = db.query(MenuItem).filter(
-            MenuItem.id.in_(top_item_ids)
+            MenuItem.id.in_([item_id for item_id, _ in top_candidates])
         ).all()
-        item_dict = {item.id: item for item in items}
+    finally:
+        db.close()
 
-        # Build results (maintain sort order)
-        result = []
-        for candidate in top_candidates:
-            item_id = candidate['item_id']
-            if item_id in item_dict:
-                item = item_dict[item_id]
-                result.append({
-                    'id': item.id,
-                    'name': item.name,
-                    'price': float(item.price),
-                    'description': item.description or '',
-                    'image_url': (
-                        item.image_url or '/static/images/blank.png'
-                    ),
-                    'category': item.category or '',
-                    'rating': float(item.rating or 0),
-                    'recommendation_reason': 'Based on Your Taste',
-                    'score': candidate['score']
-                })
+    return personal_recommendations(
+        top_candidates, {item.id: item for item in items}, limit
+    )
 
-        # If recommendations insufficient,
-        # supplement with popular items
-        if len(result) < limit:
-            popular = get_popular_items(limit - len(result))
-            existing_ids = {r['id'] for r in result}
-            for item in popular:
-                if item['id'] not in existing_ids:
-                    item['recommendation_reason'] = 'Popular Choice'
-                    result.append(item)
-                    if len(result) >= limit:
-                        break
-
-        return result, "Recommended for You"
+
+# ===========================================================================
+# Model Snapshot ("snapshot" engine)
+# ===========================================================================
+#
+# Steps 1-4 on the read-only, memory-mapped UserItemMatrix of the newest
+# snapshot (recommendation_jobs.py write-snapshot), shared by all worker
+# processes. Scores are the exact user_cf scores over the orders the
+# snapshot covers, so it is only used for users who have not ordered
+# since (one indexed EXISTS probe); their recommendations are current.
+# ===========================================================================
+
+
+def _ordered_since(user_id: int, last_order_id: int) -> bool:
+    """
+    Whether the user has an order newer than `last_order_id`.
+    """
+    db = db_session()
+    try:
+        return db.query(
+            exists().where(Order.user_id == user_id, Order.id > last_order_id)
+        ).scalar()
+    finally:
+        db.close()
+
+
+def compute_recommendations_snapshot(
+    snapshot: ModelSnapshot, user_id: int, limit: int = 3
+) -> Tuple[List[Dict], str]:
+    """
+    compute_recommendations for a logged-in user from a model snapshot.
+
+    Time complexity: UserItemMatrix.candidate_scores in NumPy (dense
+    co-occurrence row sum for menu-sized catalogs), plus one menu query
+    """
+    matrix = snapshot.matrix
+    # Cold start, no similar users, or no candidate items
+    candidate_scores = matrix.candidate_scores(user_id)
+    if not candidate_scores:
+        return get_popular_items(limit), "Popular Items"
+
+    top_candidates = rank_candidates(candidate_scores, limit)
+    db = db_session()
+    try:
+        items = db.query(MenuItem).filter(
+            MenuItem.id.in_([item_id for item_id, _ in top_candidates])
+        ).all()
     finally:
         db.close()
+    return personal_recommendations(
+        top_candidates, {item.id: item for item in items}, limit
+    )
+
+
+def rank_candidates(
+    candidate_scores: Dict[int, float], k: int
+) -> List[Tuple[int, float]]:
+    """
+    Top k [(item_id, score)] by score (descending), ties by item id.
+
+    Time complexity: O(p log p), p is candidate item count
+    """
+    candidates = [
+        {'item_id': item_id, 'score': score}
+        for item_id, score in candidate_scores.items()
+    ]
+    quick_sort_by_score(candidates, descending=True)
+    return [(c['item_id'], c['score']) for c in candidates[:k]]
+
+
+def personal_recommendations(
+    top_candidates: List[Tuple[int, float]],
+    item_dict: Dict[int, Any],
+    limit: int
+) -> Tuple[List[Dict], str]:
+    """
+    Build the "Recommended for You" result from ranked candidates.
+
+    Args:
+        top_candidates: [(item_id, score)], best first
+        item_dict: {item_id: MenuItem} (deleted items are skipped)
+        limit: Number of recommendations to return
+    """
+    # Build results (maintain sort order)
+    result = [
+        _menu_item_result(item_dict[item_id], 'Based on Your Taste', score)
+        for item_id, score in top_candidates[:limit]
+        if item_id in item_dict
+    ]
+
+    # If recommendations insufficient,
+    # supplement with popular items
+    if len(result) < limit:
+        popular = get_popular_items(limit - len(result))
+        existing_ids = {r['id'] for r in result}
+        for item in popular:
+            if item['id'] not in existing_ids:
+                item['recommendation_reason'] = 'Popular Choice'
+                result.append(item)
+                if len(result) >= limit:
+                    break
+
+    return result, "Recommended for You"
@@ -0,0 +1,220 @@
+"""
+Maintenance jobs for the recommendation system (run from a shell / cron).
+
+Usage:
+    python recommendation_jobs.py rebuild-cooccurrence [--batch-size N]
+    python recommendation_jobs.py rebuild-sales [--batch-size N]
+    python recommendation_jobs.py precompute [--workers N] [--chunk-size N]
+        [--top-k K] [--engine user_cf|matrix] [--active-days D]
+    python recommendation_jobs.py mine-pairings [--workers N]
+        [--chunk-size N] [--min-support S] [--min-confidence C]
+        [--top-n N] [--full] [--settle-seconds S]
+    python recommendation_jobs.py write-snapshot [--path FILE]
+        [--settle-seconds S]
+"""
+
+import argparse
+import time
+
+from recommendation import rebuild_item_cooccurrence, rebuild_item_sales
+from recommendation_pairings import (
+    DEFAULT_CHUNK_SIZE as DEFAULT_PAIRING_CHUNK_SIZE,
+    DEFAULT_MIN_CONFIDENCE,
+    DEFAULT_MIN_SUPPORT,
+    DEFAULT_SETTLE_SECONDS,
+    DEFAULT_TOP_N,
+    mine_pairings,
+)
+from recommendation_precompute import (
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_TOP_K,
+    PRECOMPUTE_ENGINES,
+    precompute_recommendations,
+)
+from recommendation_snapshot import DEFAULT_PATH as DEFAULT_SNAPSHOT_PATH
+from recommendation_snapshot import write_snapshot
+
+
+def cmd_rebuild_cooccurrence(args) -> None:
+    """
+    Recompute item_cooccurrence from all orders (backfill / repair).
+    """
+    start = time.perf_counter()
+    rows = rebuild_item_cooccurrence(batch_size=args.batch_size)
+    print(
+        f"item_cooccurrence rebuilt: {rows} rows "
+        f"in {time.perf_counter() - start:.2f}s"
+    )
+
+
+def cmd_rebuild_sales(args) -> None:
+    """
+    Reconcile item_sales with order_items (backfill / repair).
+    """
+    start = time.perf_counter()
+    rows, corrected = rebuild_item_sales(batch_size=args.batch_size)
+    print(
+        f"item_sales rebuilt: {rows} rows, {corrected} corrected "
+        f"in {time.perf_counter() - start:.2f}s"
+    )
+
+
+def cmd_precompute(args) -> None:
+    """
+    Write a new generation of precomputed recommendation lists.
+    """
+    start = time.perf_counter()
+    stats = precompute_recommendations(
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        top_k=args.top_k,
+        engine=args.engine,
+        active_days=args.active_days,
+    )
+    print(
+        f"generation {stats['generation']}: {stats['users']} users, "
+        f"{stats['rows']} rows in {time.perf_counter() - start:.2f}s"
+    )
+
+
+def cmd_mine_pairings(args) -> None:
+    """
+    Count new orders into the pair counts and rewrite the pairing rules.
+    """
+    start = time.perf_counter()
+    stats = mine_pairings(
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        min_support=args.min_support,
+        min_confidence=args.min_confidence,
+        top_n=args.top_n,
+        full=args.full,
+        settle_seconds=args.settle_seconds,
+    )
+    print(
+        f"pairing run {stats['run']}: {stats['new_orders']} new orders "
+        f"({stats['orders']} total), {stats['rules']} rules "
+        f"in {time.perf_counter() - start:.2f}s"
+    )
+
+
+def cmd_write_snapshot(args) -> None:
+    """
+    Write a new model snapshot (picked up by running workers).
+    """
+    start = time.perf_counter()
+    stats = write_snapshot(args.path, settle_seconds=args.settle_seconds)
+    print(
+        f"snapshot {stats['path']}: orders up to {stats['last_order_id']}, "
+        f"{stats['users']} users, {stats['items']} items, "
+        f"{stats['pairs']} pairs, {stats['bytes']} bytes "
+        f"in {time.perf_counter() - start:.2f}s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Recommendation maintenance jobs"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = subparsers.add_parser(
+        "rebuild-cooccurrence",
+        help="recompute the item co-purchase index from all orders",
+    )
+    rebuild.add_argument(
+        "--batch-size", type=int, default=5000,
+        help="rows per INSERT statement"
+    )
+    rebuild.set_defaults(func=cmd_rebuild_cooccurrence)
+
+    sales = subparsers.add_parser(
+        "rebuild-sales",
+        help="reconcile the per-item sales counters with order_items",
+    )
+    sales.add_argument(
+        "--batch-size", type=int, default=5000,
+        help="rows per INSERT statement"
+    )
+    sales.set_defaults(func=cmd_rebuild_sales)
+
+    precompute = subparsers.add_parser(
+        "precompute",
+        help="precompute recommendation lists for active users",
+    )
+    precompute.add_argument(
+        "--workers", type=int, default=None,
+        help="worker processes (default: CPU count, 0: no pool)"
+    )
+    precompute.add_argument(
+        "--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+        help="users per worker task"
+    )
+    precompute.add_argument(
+        "--top-k", type=int, default=DEFAULT_TOP_K,
+        help="candidates stored per user"
+    )
+    precompute.add_argument(
+        "--engine", choices=PRECOMPUTE_ENGINES, default="user_cf",
+        help="scoring engine (matrix needs NumPy)"
+    )
+    precompute.add_argument(
+        "--active-days", type=int, default=None,
+        help="only users who ordered within this many days"
+    )
+    precompute.set_defaults(func=cmd_precompute)
+
+    pairings = subparsers.add_parser(
+        "mine-pairings",
+        help="mine frequently-bought-together pairings from new orders",
+    )
+    pairings.add_argument(
+        "--workers", type=int, default=None,
+        help="worker processes (default: CPU count, 0: no pool)"
+    )
+    pairings.add_argument(
+        "--chunk-size", type=int, default=DEFAULT_PAIRING_CHUNK_SIZE,
+        help="order IDs per worker task"
+    )
+    pairings.add_argument(
+        "--min-support", type=float, default=DEFAULT_MIN_SUPPORT,
+        help="minimum share of orders containing both items"
+    )
+    pairings.add_argument(
+        "--min-confidence", type=float, default=DEFAULT_MIN_CONFIDENCE,
+        help="minimum share of the item's orders containing the add-on"
+    )
+    pairings.add_argument(
+        "--top-n", type=int, default=DEFAULT_TOP_N,
+        help="pairings kept per item"
+    )
+    pairings.add_argument(
+        "--full", action="store_true",
+        help="recount all orders instead of only new ones"
+    )
+    pairings.add_argument(
+        "--settle-seconds", type=float, default=DEFAULT_SETTLE_SECONDS,
+        help="count only orders at least this old (default: 300)"
+    )
+    pairings.set_defaults(func=cmd_mine_pairings)
+
+    snapshot = subparsers.add_parser(
+        "write-snapshot",
+        help="write the memory-mapped recommendation model snapshot",
+    )
+    snapshot.add_argument(
+        "--path", default=DEFAULT_SNAPSHOT_PATH,
+        help="snapshot file (RECOMMENDATION_SNAPSHOT)"
+    )
+    snapshot.add_argument(
+        "--settle-seconds", type=float, default=DEFAULT_SETTLE_SECONDS,
+        help="cover only orders at least this old (default: 300)"
+    )
+    snapshot.set_defaults(func=cmd_write_snapshot)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,413 @@
+"""
+MinHash / LSH index for approximate similar-user lookup
+
+find_similar_users (recommendation.py) reads every buyer of every item
+the target user bought; for popular dishes that is nearly the whole user
+base. This module keeps an in-memory locality-sensitive hashing index
+over users' purchased item sets, so the "lsh" engine only looks at
+users that are likely to overlap with the target:
+
+1. MinHash signature: for each of num_perm hash functions
+   h_i(x) = (a_i * x + b_i) mod p, a user's signature value is
+   min(h_i(item) for item in the user's items). Two users' values agree
+   with probability equal to the Jaccard similarity of their item sets.
+2. Banding: the signature is cut into `bands` bands of `rows` values;
+   users with an identical band land in the same bucket. Users with
+   Jaccard similarity s share at least one bucket with probability
+   1 - (1 - s^rows)^bands (the recall / speed trade-off):
+   - more bands / fewer rows: higher recall, larger candidate sets
+   - fewer bands / more rows: only near-duplicates are candidates
+3. Query: the union of the target's buckets (capped at max_candidates)
+   is scored exactly with the find_similar_users similarity
+   (common items / target items) and the top N users are returned.
+
+Incremental updates: a new order only lowers signature values
+(elementwise min with the new items' hashes), so add_items re-buckets
+just that user. Orders placed through other processes reach an index
+when it is rebuilt (max_age, see get_lsh_index).
+
+Time complexity:
+- Build: O(P x num_perm) for P distinct (user, item) pairs
+- Query: O(num_perm + C x |T|) for C candidates (C <= max_candidates),
+  independent of how many users bought the target's items
+- add_items: O(new items x num_perm + bands)
+Space complexity: O(U x num_perm + P) for U users
+"""
+
+import heapq
+import logging
+import random
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from auth import db_session, Order, OrderItem
+from sort_utils import sort_in_place
+
+# Defaults: 32 bands x 2 rows (64 hash functions); users with Jaccard
+# similarity 0.2 are found with probability ~0.73, 0.3 with ~0.95
+DEFAULT_BANDS = 32
+DEFAULT_ROWS = 2
+# Exactly scored candidates per query, and similar users returned
+DEFAULT_MAX_CANDIDATES = 2000
+DEFAULT_NEIGHBOURS = 200
+# Seconds before get_lsh_index rebuilds from the database
+DEFAULT_MAX_AGE = 3600.0
+
+# Mersenne prime 2^61 - 1 (hash modulus)
+_PRIME = (1 << 61) - 1
+
+logger = logging.getLogger(__name__)
+
+
+class MinHashLSH:
+    """
+    Banded MinHash index over users' purchased item sets.
+
+    Example:
+        >>> index = MinHashLSH.from_pairs(
+        ...     [(1, 10), (1, 11), (2, 10), (2, 11), (3, 12)]
+        ... )
+        >>> index.similar_users(1, [10, 11])
+        {2: 1.0}
+    """
+
+    def __init__(
+        self,
+        bands: int = DEFAULT_BANDS,
+        rows: int = DEFAULT_ROWS,
+        max_candidates: int = DEFAULT_MAX_CANDIDATES,
+        seed: int = 1
+    ):
+        if bands < 1 or rows < 1:
+            raise ValueError("bands and rows must be positive")
+        self.bands = bands
+        self.rows = rows
+        self.num_perm = bands * rows
+        self.max_candidates = max_candidates
+
+        rng = random.Random(seed)
+        self._coefficients = [
+            (rng.randrange(1, _PRIME), rng.randrange(0, _PRIME))
+            for _ in range(self.num_perm)
+        ]
+        # item_id -> its num_perm hash values
+        self._item_hashes: Dict[int, Tuple[int, ...]] = {}
+        # user_id -> purchased items / signature
+        self._items: Dict[int, Set[int]] = {}
+        self._signatures: Dict[int, Tuple[int, ...]] = {}
+        # Per band: band values -> user IDs
+        self._buckets: List[Dict[Tuple[int, ...], Set[int]]] = [
+            defaultdict(set) for _ in range(bands)
+        ]
+        self._lock = threading.RLock()
+        self.built_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    # ----------------------------------------------------------------------
+    # Construction
+    # ----------------------------------------------------------------------
+
+    @classmethod
+    def from_pairs(
+        cls, pairs: Iterable[Tuple[int, int]], **options
+    ) -> "MinHashLSH":
+        """
+        Build from (user_id, menu_item_id) pairs (duplicates allowed).
+        """
+        user_items: Dict[int, Set[int]] = defaultdict(set)
+        for user_id, item_id in pairs:
+            user_items[user_id].add(item_id)
+
+        index = cls(**options)
+        for user_id, items in user_items.items():
+            index.add_items(user_id, items)
+        return index
+
+    @classmethod
+    def load(cls, **options) -> "MinHashLSH":
+        """
+        Build from all orders (one query for the distinct pairs).
+        """
+        db = db_session()
+        try:
+            pairs = (
+                db.query(Order.user_id, OrderItem.menu_item_id)
+                .join(OrderItem, Order.id == OrderItem.order_id)
+                .distinct()
+                .all()
+            )
+        finally:
+            db.close()
+        return cls.from_pairs(pairs, **options)
+
+    # ----------------------------------------------------------------------
+    # Signatures
+    # ----------------------------------------------------------------------
+
+    def _hashes(self, item_id: int) -> Tuple[int, ...]:
+        hashes = self._item_hashes.get(item_id)
+        if hashes is None:
+            hashes = tuple(
+                (a * item_id + b) % _PRIME for a, b in self._coefficients
+            )
+            self._item_hashes[item_id] = hashes
+        return hashes
+
+    def signature(
+        self,
+        items: Iterable[int],
+        base: Optional[Tuple[int, ...]] = None
+    ) -> Tuple[int, ...]:
+        """
+        MinHash signature of an item set (extending `base`, the
+        signature of a subset, when given).
+        """
+        columns = [self._hashes(item_id) for item_id in items]
+        if base is not None:
+            columns.append(base)
+        if not columns:
+            return ()
+        return tuple(map(min, *columns)) if len(columns) > 1 else columns[0]
+
+    def _band_keys(self, signature: Tuple[int, ...]):
+        rows = self.rows
+        return [
+            signature[band * rows:(band + 1) * rows]
+            for band in range(self.bands)
+        ]
+
+    # ----------------------------------------------------------------------
+    # Updates / queries
+    # ----------------------------------------------------------------------
+
+    def add_items(self, user_id: int, item_ids: Iterable[int]) -> None:
+        """
+        Add purchased items to a user (new user or new order).
+        """
+        with self._lock:
+            items = self._items.setdefault(user_id, set())
+            new_items = set(item_ids) - items
+            if not new_items:
+                return
+            items |= new_items
+
+            old = self._signatures.get(user_id)
+            new = self.signature(new_items, base=old)
+            if new == old:
+                return
+            old_keys = self._band_keys(old) if old else None
+            for band, key in enumerate(self._band_keys(new)):
+                if old_keys is not None:
+                    if old_keys[band] == key:
+                        continue
+                    bucket = self._buckets[band][old_keys[band]]
+                    bucket.discard(user_id)
+                    if not bucket:
+                        del self._buckets[band][old_keys[band]]
+                self._buckets[band][key].add(user_id)
+            self._signatures[user_id] = new
+
+    def candidates(
+        self, user_id: Optional[int], item_ids: Iterable[int]
+    ) -> Set[int]:
+        """
+        Users sharing at least one band with the item set
+        (user_id excluded), at most max_candidates of them.
+
+        Smaller buckets are read first (a band shared by few users is
+        the more specific match); members are added one at a time, so a
+        huge bucket (e.g. everybody who bought only the most popular
+        dish) costs at most max_candidates steps.
+        """
+        signature = self.signature(set(item_ids))
+        if not signature:
+            return set()
+        found: Set[int] = set()
+        with self._lock:
+            buckets = [
+                bucket
+                for band, key in enumerate(self._band_keys(signature))
+                for bucket in (self._buckets[band].get(key),)
+                if bucket
+            ]
+            sort_in_place(buckets, key=len)
+            for bucket in buckets:
+                for other in bucket:
+                    if other == user_id:
+                        continue
+                    found.add(other)
+                    if len(found) >= self.max_candidates:
+                        return found
+        return found
+
+    def similar_users(
+        self,
+        user_id: Optional[int],
+        item_ids: List[int],
+        limit: int = DEFAULT_NEIGHBOURS
+    ) -> Dict[int, float]:
+        """
+        Approximate top `limit` similar users as {user_id: similarity},
+        similarity = common items / len(item_ids) as in
+        find_similar_users (ties by user id).
+        """
+        target = set(item_ids)
+        if not target:
+            return {}
+        with self._lock:
+            common = [
+                (len(target & self._items[other]), other)
+                for other in self.candidates(user_id, target)
+            ]
+        best = heapq.nsmallest(
+            limit,
+            ((-count, other) for count, other in common if count),
+        )
+        return {other: -negative / len(target) for negative, other in best}
+
+
+# ===========================================================================
+# Shared Index
+# ===========================================================================
+#
+# One index per process, built on first use and rebuilt after max_age
+# seconds (picks up orders placed through other processes). Orders placed
+# here update it directly (record_order_items).
+#
+# Only the first build blocks a request. Later rebuilds run on a
+# background thread while requests keep using the current index; orders
+# recorded during a rebuild are replayed into the new index before it is
+# swapped in.
+# ===========================================================================
+
+_options: Dict[str, int] = {
+    "bands": DEFAULT_BANDS,
+    "rows": DEFAULT_ROWS,
+    "max_candidates": DEFAULT_MAX_CANDIDATES,
+}
+_neighbours = DEFAULT_NEIGHBOURS
+_max_age: Optional[float] = DEFAULT_MAX_AGE
+_index: Optional[MinHashLSH] = None
+_index_lock = threading.Lock()
+# Background rebuild in progress: (user_id, item_ids) recorded meanwhile
+_rebuilding = False
+_pending: List[Tuple[int, List[int]]] = []
+
+
+def configure_lsh(
+    bands: int = DEFAULT_BANDS,
+    rows: int = DEFAULT_ROWS,
+    max_candidates: int = DEFAULT_MAX_CANDIDATES,
+    neighbours: int = DEFAULT_NEIGHBOURS,
+    max_age: Optional[float] = DEFAULT_MAX_AGE
+) -> None:
+    """
+    Set index parameters (RECOMMENDATION_LSH_* settings); the next
+    lookup builds a new index.
+    """
+    global _index, _neighbours, _max_age, _rebuilding
+    if bands < 1 or rows < 1:
+        raise ValueError("bands and rows must be positive")
+    with _index_lock:
+        _options.update(
+            bands=bands, rows=rows, max_candidates=max_candidates
+        )
+        _neighbours = neighbours
+        _max_age = max_age
+        _index = None
+        # A rebuild still running for the old options is discarded
+        _rebuilding = False
+        _pending.clear()
+
+
+def get_lsh_index() -> MinHashLSH:
+    """
+    The process-wide index: built from the database on first use,
+    rebuilt in the background once older than max_age (the current
+    index is served until the new one is ready).
+    """
+    global _index, _rebuilding
+    index = _index
+    if index is not None:
+        if (
+            _max_age is not None
+            and time.monotonic() - index.built_at > _max_age
+            and not _rebuilding
+        ):
+            with _index_lock:
+                if _rebuilding or _index is not index:
+                    return _index or index
+                _rebuilding = True
+                options = dict(_options)
+            threading.Thread(
+                target=_rebuild, args=(options,),
+                name="lsh-rebuild", daemon=True,
+            ).start()
+        return index
+
+    with _index_lock:
+        if _index is None:
+            _index = MinHashLSH.load(**_options)
+        return _index
+
+
+def _rebuild(options: Dict[str, int]) -> None:
+    """
+    Background rebuild: load a new index, replay orders recorded while
+    loading, then swap it in.
+    """
+    global _index, _rebuilding
+    try:
+        index = MinHashLSH.load(**options)
+    except Exception:
+        logger.exception("LSH index rebuild failed")
+        with _index_lock:
+            if _options == options:
+                _rebuilding = False
+                _pending.clear()
+        return
+    finally:
+        # Thread-local session of this thread
+        db_session.remove()
+
+    with _index_lock:
+        if not _rebuilding or _options != options:
+            # configure_lsh ran meanwhile
+            return
+        for user_id, item_ids in _pending:
+            index.add_items(user_id, item_ids)
+        _pending.clear()
+        _index = index
+        _rebuilding = False
+
+
+def find_similar_users_lsh(
+    target_user_id: int, target_purchased_items: List[int]
+) -> Dict[int, float]:
+    """
+    Drop-in for find_similar_users: the top RECOMMENDATION_LSH_NEIGHBOURS
+    users among the index candidates.
+    """
+    if not target_purchased_items:
+        return {}
+    return get_lsh_index().similar_users(
+        target_user_id, target_purchased_items, _neighbours
+    )
+
+
+def record_order_items(user_id: int, item_ids: Iterable[int]) -> None:
+    """
+    Add a committed order's items to the index (no-op until it is built).
+    """
+    item_ids = list(item_ids)
+    index = _index
+    if index is not None:
+        index.add_items(user_id, item_ids)
+    if _rebuilding:
+        with _index_lock:
+            if _rebuilding:
+                _pending.append((user_id, item_ids))
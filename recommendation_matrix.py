@@ -0,0 +1,461 @@
+"""
+Sparse user x item matrix engine for batch recommendation scoring
+
+Alternative to the per-user Python loops in recommendation.py
+(find_similar_users / get_candidate_items) for scoring many users at
+once, e.g. batch precomputation.
+
+The purchase graph (distinct (user, item) pairs from orders /
+order_items) is held as a binary matrix A in NumPy arrays:
+- CSR (rows = users): items bought by each user
+- CSC (columns = items): users who bought each item
+
+For a target user u with items T (row u of A):
+- common = A @ A[u]          users' common item counts (u excluded)
+- similarity(v) = common[v] / |T|        (same as find_similar_users)
+- weight = A.T @ common      Σ common[v] over users v who bought X
+- score(X) = weight[X] / |T| for X not in T (same as get_candidate_items)
+
+Since weight = A.T @ (A @ A[u]) = (A.T @ A) @ A[u] (u's own term only
+touches items in T), batch scoring has two vectorized paths:
+- Dense (catalogs up to DENSE_ITEM_LIMIT items, i.e. any real menu):
+  the item x item co-occurrence C = A.T @ A is counted once, then a
+  chunk of users B (binary chunk x items) is scored as B @ C
+- Sparse (larger catalogs): CSC / CSR index ranges are gathered per
+  chunk and summed with np.unique / np.bincount, no n_items² array
+
+Scores use the exact integer weights, so results (and ties, broken by
+item id) are identical to the other engines.
+
+NumPy is imported on first use: the web app does not need it unless
+this module is used.
+
+Time complexity (per user): O(Σ_{t in T} |users(t)| + Σ_v |items(v)|),
+the same pairs the SQL pipeline visits, processed in C loops
+Space complexity: O(P) for P distinct (user, item) pairs
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from auth import db_session, Order, OrderItem
+
+# Users per vectorized pass in batch scoring (bounds the size of the
+# intermediate (user, neighbour) / (user, item) pair arrays)
+DEFAULT_BATCH_SIZE = 512
+# Largest catalog scored with the dense co-occurrence matrix
+# (n_items² float64 values: 4096 items -> 128 MB)
+DENSE_ITEM_LIMIT = 4096
+
+
+def require_numpy():
+    """
+    Import NumPy on first use (optional dependency).
+    """
+    try:
+        import numpy
+    except ImportError as exc:
+        raise ImportError(
+            "recommendation_matrix requires NumPy (pip install numpy)"
+        ) from exc
+    return numpy
+
+
+def _gather_ranges(np, indptr, positions):
+    """
+    Concatenate indptr ranges for the given row / column positions.
+
+    Returns:
+        (flat positions into the index array, length of each range)
+
+    Example: indptr [0, 2, 5], positions [1, 0] -> [2, 3, 4, 0, 1], [3, 2]
+    """
+    starts = indptr[positions]
+    lengths = indptr[positions + 1] - starts
+    total = int(lengths.sum())
+    if total == 0:
+        return np.zeros(0, dtype=np.int64), lengths
+    # Offset of each range start within the output
+    offsets = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+    return offsets + np.arange(total, dtype=np.int64), lengths
+
+
+class UserItemMatrix:
+    """
+    Binary user x item purchase matrix in CSR + CSC form.
+
+    Example:
+        >>> matrix = UserItemMatrix.from_pairs(
+        ...     [(1, 10), (1, 11), (2, 10), (2, 12), (3, 11)]
+        ... )
+        >>> matrix.similar_users(1)
+        {2: 0.5, 3: 0.5}
+        >>> matrix.candidate_scores(1)
+        {12: 0.5}
+    """
+
+    def __init__(self, user_ids, item_ids, user_rows, item_columns):
+        """
+        Args:
+            user_ids / item_ids: Sorted unique IDs (row / column labels)
+            user_rows / item_columns: Row and column positions of every
+                                      distinct pair, sorted by row
+        """
+        np = require_numpy()
+        self.np = np
+        self.user_ids = user_ids
+        self.item_ids = item_ids
+        self.n_users = len(user_ids)
+        self.n_items = len(item_ids)
+
+        # CSR: rows are users
+        self.indices = item_columns
+        self.indptr = np.zeros(self.n_users + 1, dtype=np.int64)
+        np.cumsum(
+            np.bincount(user_rows, minlength=self.n_users),
+            out=self.indptr[1:]
+        )
+
+        # CSC: columns are items
+        order = np.argsort(item_columns, kind="stable")
+        self.col_users = user_rows[order]
+        self.col_indptr = np.zeros(self.n_items + 1, dtype=np.int64)
+        np.cumsum(
+            np.bincount(item_columns, minlength=self.n_items),
+            out=self.col_indptr[1:]
+        )
+
+        # Item x item co-occurrence (dense path), built on first use
+        self._cooccurrence = None
+
+    @property
+    def nnz(self) -> int:
+        """Number of distinct (user, item) pairs."""
+        return len(self.indices)
+
+    # ----------------------------------------------------------------------
+    # Construction
+    # ----------------------------------------------------------------------
+
+    @classmethod
+    def from_pairs(cls, pairs: Iterable[Tuple[int, int]]) -> "UserItemMatrix":
+        """
+        Build from (user_id, menu_item_id) pairs (duplicates allowed).
+
+        Time complexity: O(P log P) (sort / unique)
+        """
+        np = require_numpy()
+        data = np.array(list(pairs), dtype=np.int64).reshape(-1, 2)
+        user_ids, user_rows = np.unique(data[:, 0], return_inverse=True)
+        item_ids, item_columns = np.unique(data[:, 1], return_inverse=True)
+
+        # Deduplicate and sort pairs by (row, column)
+        n_items = max(len(item_ids), 1)
+        keys = np.unique(user_rows.astype(np.int64) * n_items + item_columns)
+        return cls(user_ids, item_ids, keys // n_items, keys % n_items)
+
+    @classmethod
+    def from_arrays(
+        cls, user_ids, item_ids, indptr, indices, col_indptr, col_users,
+        cooccurrence=None
+    ) -> "UserItemMatrix":
+        """
+        Wrap existing CSR / CSC arrays without copying them (e.g. the
+        read-only, memory-mapped arrays of a model snapshot, see
+        recommendation_snapshot.py).
+        """
+        matrix = cls.__new__(cls)
+        matrix.np = require_numpy()
+        matrix.user_ids = user_ids
+        matrix.item_ids = item_ids
+        matrix.n_users = len(user_ids)
+        matrix.n_items = len(item_ids)
+        matrix.indptr = indptr
+        matrix.indices = indices
+        matrix.col_indptr = col_indptr
+        matrix.col_users = col_users
+        matrix._cooccurrence = cooccurrence
+        return matrix
+
+    @classmethod
+    def load(cls) -> "UserItemMatrix":
+        """
+        Build from all orders (one query for the distinct pairs).
+        """
+        db = db_session()
+        try:
+            pairs = (
+                db.query(Order.user_id, OrderItem.menu_item_id)
+                .join(OrderItem, Order.id == OrderItem.order_id)
+                .distinct()
+                .all()
+            )
+        finally:
+            db.close()
+        return cls.from_pairs(pairs)
+
+    # ----------------------------------------------------------------------
+    # Lookups
+    # ----------------------------------------------------------------------
+
+    def _rows(self, user_ids: Sequence[int]):
+        """
+        Matrix rows for user IDs (-1 for users without purchases).
+        """
+        np = self.np
+        wanted = np.asarray(user_ids, dtype=np.int64)
+        rows = np.searchsorted(self.user_ids, wanted)
+        rows[rows >= self.n_users] = 0
+        found = (
+            self.user_ids[rows] == wanted if self.n_users
+            else np.zeros(len(wanted), dtype=bool)
+        )
+        return np.where(found, rows, -1)
+
+    def purchased_items(self, user_id: int) -> List[int]:
+        """
+        Item IDs bought by a user (step 1, get_user_purchase_history).
+        """
+        row = int(self._rows([user_id])[0])
+        if row < 0:
+            return []
+        columns = self.indices[self.indptr[row]:self.indptr[row + 1]]
+        return self.item_ids[columns].tolist()
+
+    def similar_users(self, user_id: int) -> Dict[int, float]:
+        """
+        {user_id: similarity}, same as find_similar_users.
+        """
+        np = self.np
+        row = int(self._rows([user_id])[0])
+        if row < 0:
+            return {}
+        columns = self.indices[self.indptr[row]:self.indptr[row + 1]]
+        positions, _ = _gather_ranges(np, self.col_indptr, columns)
+        common = np.bincount(
+            self.col_users[positions], minlength=self.n_users
+        )
+        common[row] = 0
+        neighbours = np.flatnonzero(common)
+        target_count = len(columns)
+        return dict(zip(
+            self.user_ids[neighbours].tolist(),
+            (common[neighbours] / target_count).tolist()
+        ))
+
+    def candidate_scores(self, user_id: int) -> Dict[int, float]:
+        """
+        {item_id: score}, same as get_candidate_items for the user's
+        similar users.
+        """
+        return self.batch_candidate_scores([user_id]).get(user_id, {})
+
+    # ----------------------------------------------------------------------
+    # Batch scoring
+    # ----------------------------------------------------------------------
+
+    def cooccurrence(self, batch_size: int = DEFAULT_BATCH_SIZE):
+        """
+        Dense item x item matrix C = A.T @ A (float64, exact counts):
+        C[i, j] = number of users who bought both i and j.
+
+        Time complexity: O(Σ |row|²) over users, O(n_items²) space
+        """
+        if self._cooccurrence is not None:
+            return self._cooccurrence
+
+        np = self.np
+        counts = np.zeros(self.n_items * self.n_items, dtype=np.int64)
+        for start in range(0, self.n_users, batch_size):
+            rows = np.arange(start, min(start + batch_size, self.n_users))
+            positions, lengths = _gather_ranges(np, self.indptr, rows)
+            items = self.indices[positions]
+            # Pair every item of a row with every item of the same row
+            owner_rows = np.repeat(rows, lengths)
+            pair_positions, pair_lengths = _gather_ranges(
+                np, self.indptr, owner_rows
+            )
+            counts += np.bincount(
+                np.repeat(items, pair_lengths) * self.n_items
+                + self.indices[pair_positions],
+                minlength=len(counts)
+            )
+        self._cooccurrence = counts.reshape(
+            self.n_items, self.n_items
+        ).astype(np.float64)
+        return self._cooccurrence
+
+    def _score_chunk(self, rows):
+        """
+        Vectorized scoring for a chunk of matrix rows.
+
+        Returns:
+            (chunk positions, item columns, integer weights, |T| per row),
+            one entry per candidate, sorted by (position, -weight, item)
+        """
+        if self.n_items <= DENSE_ITEM_LIMIT:
+            return self._score_chunk_dense(rows)
+        return self._score_chunk_sparse(rows)
+
+    def _score_chunk_dense(self, rows):
+        """
+        _score_chunk as B @ C (see cooccurrence).
+        """
+        np = self.np
+        positions, lengths = _gather_ranges(np, self.indptr, rows)
+        owner = np.repeat(np.arange(len(rows)), lengths)
+        owned = np.zeros((len(rows), self.n_items))
+        owned[owner, self.indices[positions]] = 1.0
+
+        weights = owned @ self.cooccurrence()
+        # Drop items the target user already bought
+        weights[owned > 0] = 0.0
+
+        # Row-major nonzero: sorted by (position, column)
+        positions, columns = np.nonzero(weights)
+        weights = weights[positions, columns].astype(np.int64)
+        order = np.lexsort((columns, -weights, positions))
+        return positions[order], columns[order], weights[order], lengths
+
+    def _score_chunk_sparse(self, rows):
+        """
+        _score_chunk by gathering CSC / CSR ranges (no n_items² array).
+        """
+        np = self.np
+        chunk = len(rows)
+
+        # (position, t) for every item t each target user bought
+        target_positions, target_lengths = _gather_ranges(
+            np, self.indptr, rows
+        )
+        target_owner = np.repeat(np.arange(chunk), target_lengths)
+        target_items = self.indices[target_positions]
+
+        # (position, v) for every user v who bought one of those items;
+        # the count of a pair is common(v)
+        neighbour_positions, neighbour_lengths = _gather_ranges(
+            np, self.col_indptr, target_items
+        )
+        owner = np.repeat(target_owner, neighbour_lengths)
+        neighbour = self.col_users[neighbour_positions]
+        keep = neighbour != rows[owner]
+        pair_keys, common = np.unique(
+            owner[keep] * self.n_users + neighbour[keep],
+            return_counts=True
+        )
+        owner = pair_keys // self.n_users
+        neighbour = pair_keys % self.n_users
+
+        # (position, x, common(v)) for every item x each neighbour bought
+        item_positions, item_lengths = _gather_ranges(
+            np, self.indptr, neighbour
+        )
+        item_keys = (
+            np.repeat(owner, item_lengths) * self.n_items
+            + self.indices[item_positions]
+        )
+        candidate_keys, inverse = np.unique(item_keys, return_inverse=True)
+        weights = np.bincount(
+            inverse, weights=np.repeat(common, item_lengths)
+        ).astype(np.int64)
+
+        # Drop items the target user already bought
+        owned_keys = target_owner * self.n_items + target_items
+        keep = ~np.isin(candidate_keys, owned_keys)
+        candidate_keys = candidate_keys[keep]
+        weights = weights[keep]
+
+        positions = candidate_keys // self.n_items
+        columns = candidate_keys % self.n_items
+        # Item IDs are sorted, so column order is item ID order
+        order = np.lexsort((columns, -weights, positions))
+        return (
+            positions[order], columns[order], weights[order], target_lengths
+        )
+
+    def _iter_chunks(self, user_ids: Sequence[int], batch_size: int):
+        """
+        Yield (user IDs, scored chunk) for users with purchases.
+        """
+        np = self.np
+        user_ids = list(user_ids)
+        rows = self._rows(user_ids)
+        present = np.flatnonzero(rows >= 0)
+        for start in range(0, len(present), batch_size):
+            selected = present[start:start + batch_size]
+            yield (
+                [user_ids[i] for i in selected.tolist()],
+                self._score_chunk(rows[selected]),
+            )
+
+    def batch_candidate_scores(
+        self,
+        user_ids: Sequence[int],
+        batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> Dict[int, Dict[int, float]]:
+        """
+        {user_id: {item_id: score}} for many users.
+
+        Users without purchases map to {} (cold start is handled by
+        the caller, as in compute_recommendations).
+        """
+        result: Dict[int, Dict[int, float]] = {
+            user_id: {} for user_id in user_ids
+        }
+        for chunk_users, scored in self._iter_chunks(user_ids, batch_size):
+            positions, columns, weights, target_counts = scored
+            scores = weights / target_counts[positions]
+            items = self.item_ids[columns].tolist()
+            for position, item_id, score in zip(
+                positions.tolist(), items, scores.tolist()
+            ):
+                result[chunk_users[position]][item_id] = score
+        return result
+
+    def batch_top_k(
+        self,
+        user_ids: Sequence[int],
+        k: int,
+        batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> Dict[int, List[Tuple[int, float]]]:
+        """
+        {user_id: [(item_id, score), ...]} top k candidates per user,
+        by score (descending), ties by item id, the order
+        compute_recommendations ranks candidates in.
+
+        Time complexity: see module docstring, plus
+        O(c log c) per chunk for c candidates
+        """
+        np = self.np
+        result: Dict[int, List[Tuple[int, float]]] = {
+            user_id: [] for user_id in user_ids
+        }
+        for chunk_users, scored in self._iter_chunks(user_ids, batch_size):
+            positions, columns, weights, target_counts = scored
+            if not len(positions):
+                continue
+            # Rank within each user's run of candidates
+            run_starts = np.searchsorted(positions, positions, side="left")
+            rank = np.arange(len(positions)) - run_starts
+            keep = rank < k
+            positions = positions[keep]
+            scores = weights[keep] / target_counts[positions]
+            items = self.item_ids[columns[keep]].tolist()
+            for position, item_id, score in zip(
+                positions.tolist(), items, scores.tolist()
+            ):
+                result[chunk_users[position]].append((item_id, score))
+        return result
+
+
+def score_users(
+    user_ids: Sequence[int],
+    k: int,
+    matrix: Optional[UserItemMatrix] = None
+) -> Dict[int, List[Tuple[int, float]]]:
+    """
+    Top k (item_id, score) candidates for each user
+    (loads the matrix when none is given).
+    """
+    if matrix is None:
+        matrix = UserItemMatrix.load()
+    return matrix.batch_top_k(user_ids, k)
@@ -0,0 +1,436 @@
+"""
+"Frequently bought together" pairings mined from order baskets
+
+Association rules A -> B over orders (one basket = the items of one
+order), for add-on suggestions in the cart (/api/menu/<id>/pairings):
+- support(A, B) = orders containing A and B / all orders
+- confidence(A -> B) = orders containing A and B / orders containing A
+- lift(A -> B) = confidence(A -> B) / (orders containing B / all orders)
+
+Rules are pairs only (one add-on per suggestion), so mining reduces to
+counting item pairs per basket; the candidate explosion FP-growth
+avoids for longer itemsets does not arise.
+
+Job flow (python recommendation_jobs.py mine-pairings):
+1. Read the watermark (last counted order ID) of the newest run
+   (--full: reset the counts and start from the first order), and
+   settle the new one (see Watermark)
+2. Split the newer orders into order ID ranges and count pairs per
+   range in a process pool
+3. Add the counts to item_pair_counts, compute the rules that pass the
+   support / confidence thresholds (top N per item by confidence) from
+   all counts, and write them under a new pairing_runs row, in one
+   transaction (a failed run leaves counts and watermark untouched)
+4. Delete older runs
+
+Watermark: order IDs are allocated at INSERT but become visible at
+COMMIT, so a lower ID can commit after a higher one; with MAX(orders.id)
+as the watermark the next run would skip it for good. A run therefore
+only counts up to just below the first order placed less than
+settle_seconds ago (MAX(id) when there is none): an order transaction
+open longer than that is the only way to be skipped.
+
+Serving: PairingsIndex loads the newest run's rules into a dict once
+per run (checked at most every probe_interval seconds), so a lookup is
+O(1) plus the slice.
+
+Time complexity:
+- Mining: O(Σ basket_size²) over new orders, divided across workers,
+  plus O(pairs) to rebuild the rules
+- Lookup: O(1)
+"""
+
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from itertools import combinations
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, insert
+from sqlalchemy.exc import SQLAlchemyError
+
+from auth import (
+    db_session,
+    ItemPairCount,
+    ItemPairing,
+    Order,
+    OrderItem,
+    PairingRun,
+)
+from recommendation import upsert_increment
+from sort_utils import compound_key, sort_in_place, stable_sort
+
+DEFAULT_CHUNK_SIZE = 20000
+DEFAULT_MIN_SUPPORT = 0.001
+DEFAULT_MIN_CONFIDENCE = 0.05
+DEFAULT_TOP_N = 5
+# Seconds an order must be old before a run counts it (longer than any
+# order transaction)
+DEFAULT_SETTLE_SECONDS = 300
+# (other_item_id, support, confidence, lift): confidence, then lift
+# descending, then other item id
+_RULE_KEY = compound_key(
+    (lambda rule: rule[2], True),
+    (lambda rule: rule[3], True),
+    (lambda rule: rule[0], False),
+)
+
+
+# ===========================================================================
+# Mining
+# ===========================================================================
+
+
+def basket_pair_counts(
+    baskets: Dict[int, set]
+) -> Counter:
+    """
+    Pair counts of baskets: (a, b) with a < b for items bought together,
+    (a, a) for every item (orders containing it).
+
+    Example:
+        >>> sorted(basket_pair_counts({1: {10, 11}, 2: {10}}).items())
+        [((10, 10), 2), ((10, 11), 1), ((11, 11), 1)]
+    """
+    counts: Counter = Counter()
+    for items in baskets.values():
+        ordered = stable_sort(items)
+        for item_id in ordered:
+            counts[(item_id, item_id)] += 1
+        counts.update(combinations(ordered, 2))
+    return counts
+
+
+def _init_worker() -> None:
+    """
+    Process pool initializer: forked workers open their own connections
+    (see recommendation_precompute._init_worker).
+    """
+    import auth
+
+    auth.engine.dispose(close=False)
+    auth.db_session.remove()
+
+
+def _count_range(bounds: Tuple[int, int]) -> Tuple[int, Counter]:
+    """
+    (orders with items, pair counts) for order IDs first..last.
+    """
+    first, last = bounds
+    db = db_session()
+    try:
+        rows = (
+            db.query(OrderItem.order_id, OrderItem.menu_item_id)
+            .filter(OrderItem.order_id.between(first, last))
+            .all()
+        )
+    finally:
+        db.close()
+
+    baskets: Dict[int, set] = defaultdict(set)
+    for order_id, menu_item_id in rows:
+        baskets[order_id].add(menu_item_id)
+    return len(baskets), basket_pair_counts(baskets)
+
+
+def pairing_rules(
+    pair_counts: Dict[Tuple[int, int], int],
+    order_count: int,
+    min_support: float = DEFAULT_MIN_SUPPORT,
+    min_confidence: float = DEFAULT_MIN_CONFIDENCE,
+    top_n: int = DEFAULT_TOP_N
+) -> Dict[int, List[Tuple[int, float, float, float]]]:
+    """
+    Rules from pair counts (see basket_pair_counts).
+
+    Returns:
+        {item_id: [(other_item_id, support, confidence, lift)]}, best
+        first (confidence, then lift descending, then other item id)
+
+    Example:
+        >>> counts = {(1, 1): 4, (2, 2): 2, (1, 2): 2}
+        >>> pairing_rules(counts, 4, min_confidence=0.5)
+        {1: [(2, 0.5, 0.5, 1.0)], 2: [(1, 0.5, 1.0, 1.0)]}
+    """
+    if order_count <= 0:
+        return {}
+    item_counts = {a: n for (a, b), n in pair_counts.items() if a == b}
+
+    rules: Dict[int, List[Tuple[int, float, float, float]]] = defaultdict(
+        list
+    )
+    for (a, b), together in pair_counts.items():
+        if a == b:
+            continue
+        support = together / order_count
+        if support < min_support:
+            continue
+        for source, target in ((a, b), (b, a)):
+            source_count = item_counts.get(source)
+            target_count = item_counts.get(target)
+            if not source_count or not target_count:
+                continue
+            confidence = together / source_count
+            if confidence < min_confidence:
+                continue
+            lift = confidence / (target_count / order_count)
+            rules[source].append((target, support, confidence, lift))
+
+    for candidates in rules.values():
+        sort_in_place(candidates, key=_RULE_KEY)
+        del candidates[top_n:]
+    return dict(rules)
+
+
+def settled_order_id(db, watermark: int, settle_seconds: float) -> int:
+    """
+    Newest order ID a run may count: below the first order after
+    `watermark` placed less than `settle_seconds` ago (see Watermark).
+
+    Time complexity: O(orders after watermark) (primary key range)
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=settle_seconds)
+    first_recent = db.query(func.min(Order.id)).filter(
+        Order.id > watermark, Order.date > cutoff
+    ).scalar()
+    if first_recent is not None:
+        return first_recent - 1
+    return db.query(func.max(Order.id)).scalar() or 0
+
+
+def mine_pairings(
+    workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    min_support: float = DEFAULT_MIN_SUPPORT,
+    min_confidence: float = DEFAULT_MIN_CONFIDENCE,
+    top_n: int = DEFAULT_TOP_N,
+    full: bool = False,
+    settle_seconds: float = DEFAULT_SETTLE_SECONDS
+) -> Dict[str, int]:
+    """
+    Count settled orders newer than the last run and write a new run's
+    rules.
+
+    Args:
+        workers: Worker processes (default: CPU count; 0 runs inline)
+        chunk_size: Order IDs per task
+        min_support / min_confidence: Rule thresholds (fractions)
+        top_n: Rules kept per item
+        full: Recount all orders from scratch
+        settle_seconds: Minimum order age (see Watermark)
+
+    Returns:
+        {"run": id, "new_orders": orders counted now,
+         "orders": orders counted in total, "rules": rules written}
+    """
+    if workers is None:
+        workers = (
+            len(os.sched_getaffinity(0))
+            if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+        )
+
+    started_at = datetime.utcnow()
+    db = db_session()
+    try:
+        previous = (
+            None if full else
+            db.query(PairingRun).order_by(PairingRun.id.desc()).first()
+        )
+        watermark = previous.last_order_id if previous else 0
+        order_count = previous.order_count if previous else 0
+        max_order_id = settled_order_id(db, watermark, settle_seconds)
+        # The job's session stays idle during counting
+        db.rollback()
+
+        ranges = [
+            (first, min(first + chunk_size - 1, max_order_id))
+            for first in range(watermark + 1, max_order_id + 1, chunk_size)
+        ]
+        new_orders = 0
+        increments: Counter = Counter()
+        pool = None
+        if workers == 0 or len(ranges) <= 1:
+            # Inline (debugging, in-memory databases, small increments)
+            results = map(_count_range, ranges)
+        else:
+            pool = ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker
+            )
+            results = pool.map(_count_range, ranges)
+        try:
+            for orders, counts in results:
+                new_orders += orders
+                increments.update(counts)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        # Counts, rules and watermark commit together
+        if full:
+            db.query(ItemPairCount).delete(synchronize_session=False)
+        upsert_increment(
+            db,
+            ItemPairCount.__table__,
+            ("item_id", "other_item_id"),
+            "order_count",
+            [
+                {"item_id": a, "other_item_id": b, "order_count": n}
+                for (a, b), n in increments.items()
+            ],
+        )
+        order_count += new_orders
+
+        pair_counts = {
+            (row.item_id, row.other_item_id): row.order_count
+            for row in db.query(ItemPairCount).all()
+        }
+        rules = pairing_rules(
+            pair_counts, order_count, min_support, min_confidence, top_n
+        )
+
+        run = PairingRun(
+            started_at=started_at,
+            finished_at=datetime.utcnow(),
+            last_order_id=max(max_order_id, watermark),
+            order_count=order_count,
+            rule_count=sum(len(r) for r in rules.values()),
+        )
+        db.add(run)
+        db.flush()
+        run_id = run.id
+        rows = [
+            {
+                "run_id": run_id,
+                "item_id": item_id,
+                "position": position,
+                "other_item_id": other_id,
+                "support": support,
+                "confidence": confidence,
+                "lift": lift,
+            }
+            for item_id, item_rules in rules.items()
+            for position, (other_id, support, confidence, lift)
+            in enumerate(item_rules)
+        ]
+        if rows:
+            db.execute(insert(ItemPairing.__table__), rows)
+
+        # Older runs (explicitly: SQLite does not enforce ON DELETE
+        # CASCADE by default)
+        db.query(ItemPairing).filter(ItemPairing.run_id < run_id).delete(
+            synchronize_session=False
+        )
+        db.query(PairingRun).filter(PairingRun.id < run_id).delete(
+            synchronize_session=False
+        )
+        db.commit()
+        return {
+            "run": run_id,
+            "new_orders": new_orders,
+            "orders": order_count,
+            "rules": len(rows),
+        }
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+# ===========================================================================
+# Serving
+# ===========================================================================
+
+
+class PairingsIndex:
+    """
+    In-memory rules of the newest run: {item_id: ((other_item_id,
+    support, confidence, lift), ...)}.
+
+    A cheap MAX(id) probe on pairing_runs runs at most every
+    `probe_interval` seconds; the rules are reloaded only when a new run
+    exists (same pattern as MenuCatalogCache).
+    """
+
+    def __init__(self, probe_interval: float = 60.0):
+        self.probe_interval = probe_interval
+        self._lock = threading.Lock()
+        self._run_id: Optional[int] = None
+        # item_id -> ((other_item_id, support, confidence, lift), ...)
+        self._rules: Dict[int, tuple] = {}
+        self._next_probe_at = 0.0
+        self.loads = 0
+
+    def get(self, item_id: int, limit: int) -> List[Dict]:
+        """
+        Up to `limit` rules for an item:
+        [{"id", "support", "confidence", "lift"}], best first.
+        """
+        if time.monotonic() >= self._next_probe_at:
+            self._refresh()
+        return [
+            {
+                "id": other_id,
+                "support": support,
+                "confidence": confidence,
+                "lift": lift,
+            }
+            for other_id, support, confidence, lift
+            in self._rules.get(item_id, ())[:limit]
+        ]
+
+    def _refresh(self) -> None:
+        with self._lock:
+            if time.monotonic() < self._next_probe_at:
+                return
+            self._next_probe_at = time.monotonic() + self.probe_interval
+            db = db_session()
+            try:
+                run_id = db.query(func.max(PairingRun.id)).scalar()
+                if run_id == self._run_id:
+                    return
+                rows = (
+                    db.query(ItemPairing)
+                    .filter(ItemPairing.run_id == run_id)
+                    .order_by(ItemPairing.item_id, ItemPairing.position)
+                    .all()
+                )
+            except SQLAlchemyError:
+                # Tables not created yet: no pairings
+                return
+            finally:
+                db.close()
+
+            rules: Dict[int, list] = defaultdict(list)
+            for row in rows:
+                rules[row.item_id].append((
+                    row.other_item_id, row.support, row.confidence, row.lift
+                ))
+            self._rules = {
+                item_id: tuple(item_rules)
+                for item_id, item_rules in rules.items()
+            }
+            self._run_id = run_id
+            self.loads += 1
+
+    def stats(self) -> Dict:
+        return {
+            "run": self._run_id,
+            "items": len(self._rules),
+            "loads": self.loads,
+            "probe_interval": self.probe_interval,
+        }
+
+
+# Shared by all requests in this worker process
+pairings_index = PairingsIndex()
+
+
+def get_pairings(item_id: int, limit: int = 3) -> List[Dict]:
+    """
+    "Frequently bought together" rules for a menu item (see PairingsIndex).
+    """
+    return pairings_index.get(item_id, limit)
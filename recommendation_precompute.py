@@ -0,0 +1,255 @@
+"""
+Batch precompute of "Recommended for You" lists
+
+Moves collaborative filtering off the request path: a command-line job
+(python recommendation_jobs.py precompute) scores every active user in
+parallel and stores each user's top-k ranked candidates in
+user_recommendations under a new generation. get_recommendations
+(recommendation.py, Precomputed Lists) serves those lists and only
+computes online for users missing from the newest generation.
+
+Job flow:
+1. Insert a recommendation_generations row (status "building")
+2. Load the active user IDs (users with orders, optionally only recent)
+3. Partition them into chunks and score the chunks in a process pool:
+   - "user_cf": get_user_purchase_history / find_similar_users /
+     get_candidate_items per user (database bound)
+   - "matrix": UserItemMatrix.batch_top_k (recommendation_matrix.py,
+     needs NumPy); the matrix is loaded once before the workers fork
+4. Write each chunk's rows as it completes (commit per chunk; readers
+   ignore the generation until it is complete)
+5. Mark the generation complete and delete older generations
+
+Both engines rank candidates the same way as compute_recommendations,
+so a precomputed list equals the online result at the time of the run.
+
+Time complexity: the engines' per-user cost divided across workers,
+plus O(users x top_k) rows written
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from itertools import repeat
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import insert
+
+from auth import (
+    db_session,
+    Order,
+    RecommendationGeneration,
+    UserRecommendation,
+)
+from sort_utils import stable_sort
+
+PRECOMPUTE_ENGINES = ("user_cf", "matrix")
+DEFAULT_TOP_K = 10
+DEFAULT_CHUNK_SIZE = 500
+
+# Per-process state of pool workers (set by _init_worker)
+_worker_engine = "user_cf"
+_worker_matrix = None
+
+
+def active_user_ids(active_days: Optional[int] = None) -> List[int]:
+    """
+    IDs of users with at least one order
+    (within the last `active_days` days when given), ascending.
+    """
+    db = db_session()
+    try:
+        query = db.query(Order.user_id).distinct()
+        if active_days is not None:
+            since = datetime.utcnow() - timedelta(days=active_days)
+            query = query.filter(Order.date >= since)
+        return stable_sort([user_id for (user_id,) in query.all()])
+    finally:
+        db.close()
+
+
+def _chunks(items: Sequence[int], size: int) -> List[List[int]]:
+    return [list(items[i:i + size]) for i in range(0, len(items), size)]
+
+
+def _init_worker(engine_name: str) -> None:
+    """
+    Process pool initializer.
+
+    Forked workers inherit the parent's connection pool; dispose of it
+    (without closing the parent's sockets) so each worker opens its own
+    connections. The matrix is inherited from the parent when forked,
+    and loaded here otherwise (spawn start method).
+    """
+    global _worker_engine, _worker_matrix
+    import auth
+
+    auth.engine.dispose(close=False)
+    auth.db_session.remove()
+
+    _worker_engine = engine_name
+    if engine_name == "matrix" and _worker_matrix is None:
+        from recommendation_matrix import UserItemMatrix
+
+        _worker_matrix = UserItemMatrix.load()
+
+
+def _score_chunk(
+    user_ids: List[int], top_k: int
+) -> List[Tuple[int, List[Tuple[int, float]]]]:
+    """
+    [(user_id, [(item_id, score), ...])] for one chunk of users.
+    """
+    if _worker_engine == "matrix":
+        return list(_worker_matrix.batch_top_k(user_ids, top_k).items())
+
+    from recommendation import (
+        find_similar_users,
+        get_candidate_items,
+        get_user_purchase_history,
+        rank_candidates,
+    )
+
+    results = []
+    for user_id in user_ids:
+        purchased = get_user_purchase_history(user_id)
+        similar = find_similar_users(user_id, purchased) if purchased else {}
+        scores = get_candidate_items(purchased, similar) if similar else {}
+        results.append((user_id, rank_candidates(scores, top_k)))
+    return results
+
+
+def precompute_recommendations(
+    workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    top_k: int = DEFAULT_TOP_K,
+    engine: str = "user_cf",
+    active_days: Optional[int] = None
+) -> Dict[str, int]:
+    """
+    Compute and store a new generation of precomputed lists.
+
+    Args:
+        workers: Worker processes (default: CPU count; 0 runs inline)
+        chunk_size: Users per task
+        top_k: Candidates stored per user (serves limit <= top_k)
+        engine: "user_cf" or "matrix"
+        active_days: Only users who ordered within this many days
+
+    Returns:
+        {"generation": id, "users": users with a list, "rows": rows}
+    """
+    global _worker_engine, _worker_matrix
+
+    if engine not in PRECOMPUTE_ENGINES:
+        raise ValueError(
+            f"engine must be one of {PRECOMPUTE_ENGINES}, got {engine!r}"
+        )
+    if workers is None:
+        # CPUs this process may run on (containers / taskset)
+        workers = (
+            len(os.sched_getaffinity(0))
+            if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+        )
+
+    generation_id = None
+    db = db_session()
+    try:
+        # Orders placed after this instant make a user's list stale
+        generation = RecommendationGeneration(
+            started_at=datetime.utcnow(),
+            status="building",
+            top_k=top_k,
+            user_count=0,
+        )
+        db.add(generation)
+        db.commit()
+        generation_id = generation.id
+
+        user_ids = active_user_ids(active_days)
+        chunks = _chunks(user_ids, chunk_size)
+
+        if engine == "matrix":
+            from recommendation_matrix import UserItemMatrix
+
+            # Loaded once; forked workers share it copy-on-write
+            _worker_matrix = UserItemMatrix.load()
+
+        users = 0
+        rows = 0
+        pool = None
+        if workers == 0:
+            # Inline (debugging, in-memory databases)
+            _worker_engine = engine
+            results = map(_score_chunk, chunks, repeat(top_k))
+        else:
+            pool = ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(engine,),
+            )
+            results = pool.map(_score_chunk, chunks, repeat(top_k))
+
+        try:
+            for chunk in results:
+                chunk_rows = [
+                    {
+                        "generation_id": generation_id,
+                        "user_id": user_id,
+                        "position": position,
+                        "menu_item_id": item_id,
+                        "score": score,
+                    }
+                    for user_id, ranked in chunk
+                    for position, (item_id, score) in enumerate(ranked)
+                ]
+                if chunk_rows:
+                    db.execute(
+                        insert(UserRecommendation.__table__), chunk_rows
+                    )
+                    db.commit()
+                users += sum(1 for _, ranked in chunk if ranked)
+                rows += len(chunk_rows)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        # Switch readers to the new generation, then drop older ones
+        # (by query: the scoped session is shared with the user_cf
+        # helpers, whose close() detaches `generation`)
+        db.query(RecommendationGeneration).filter(
+            RecommendationGeneration.id == generation_id
+        ).update({
+            "status": "complete",
+            "finished_at": datetime.utcnow(),
+            "user_count": users,
+        }, synchronize_session=False)
+        db.commit()
+        _delete_generations(db, RecommendationGeneration.id < generation_id)
+
+        return {"generation": generation_id, "users": users, "rows": rows}
+    except Exception:
+        db.rollback()
+        if generation_id is not None:
+            _delete_generations(
+                db, RecommendationGeneration.id == generation_id
+            )
+        raise
+    finally:
+        _worker_matrix = None
+        db.close()
+
+
+def _delete_generations(db, condition) -> None:
+    """
+    Delete generations and their rows (explicitly: SQLite does not
+    enforce ON DELETE CASCADE by default).
+    """
+    stale = db.query(RecommendationGeneration.id).filter(condition)
+    db.query(UserRecommendation).filter(
+        UserRecommendation.generation_id.in_(stale.subquery().select())
+    ).delete(synchronize_session=False)
+    db.query(RecommendationGeneration).filter(condition).delete(
+        synchronize_session=False
+    )
+    db.commit()
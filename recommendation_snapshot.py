@@ -0,0 +1,415 @@
+"""
+Memory-mapped binary snapshot of the recommendation model
+
+Every worker process of the web app would otherwise build its own copy
+of the purchase graph (UserItemMatrix: CSR / CSC arrays, and the dense
+item x item co-occurrence for menu-sized catalogs). A job
+(python recommendation_jobs.py write-snapshot) writes that derived data
+once to a versioned binary file; workers map the file read-only and
+wrap NumPy arrays around the mapping without copying, so all workers
+share one physical copy through the page cache.
+
+File layout (little-endian):
+- MAGIC (8 bytes), format version (uint32), header length (uint32)
+- Header: JSON {"created_at", "last_order_id", "arrays":
+  {name: {"dtype", "shape", "offset"}}}, offsets relative to the data
+  section
+- Data section (starts on a 64-byte boundary): the arrays, each
+  starting on a 64-byte boundary
+  - user_ids, item_ids: matrix row / column labels
+  - indptr, indices: CSR (items bought by each user)
+  - col_indptr, col_users: CSC (users who bought each item)
+  - cooccurrence: n_items x n_items float64 (catalogs up to
+    DENSE_ITEM_LIMIT items only)
+  - sales_items, sales_units: popularity vector, best-selling first
+    (units sold descending, ties by item id)
+
+Swapping: the job writes a temporary file in the same directory and
+renames it over the snapshot (os.replace, atomic). SnapshotReader
+checks the file's identity at most every check_interval seconds and
+maps the new file when it changed; requests still holding the old
+snapshot keep using it (the old mapping is released with its last
+reference), so workers never restart and never see a half-written file.
+
+Freshness: a snapshot covers orders up to last_order_id. The
+"snapshot" engine (recommendation.py) only answers for users without
+newer orders; everybody else goes through user_cf. last_order_id is
+settled like the pairings watermark (recommendation_pairings.py,
+Watermark): a lower order ID can commit after MAX(id) was read, and a
+user whose order the snapshot missed that way would still look covered.
+
+NumPy is imported on first use (see recommendation_matrix.py).
+
+Time complexity:
+- Write: UserItemMatrix.from_pairs plus cooccurrence, O(P log P)
+- Open: O(header) (no array is read or copied)
+- Lookup: as UserItemMatrix.candidate_scores
+"""
+
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func
+
+from auth import db_session, Order, OrderItem
+from recommendation_matrix import (
+    DENSE_ITEM_LIMIT,
+    require_numpy,
+    UserItemMatrix,
+)
+
+MAGIC = b"RECMODEL"
+FORMAT_VERSION = 1
+# MAGIC, format version, header length
+_PREAMBLE = struct.Struct("<8sII")
+_ALIGNMENT = 64
+
+DEFAULT_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "data", "recommendation_model.bin"
+)
+DEFAULT_CHECK_INTERVAL = 5.0
+
+logger = logging.getLogger(__name__)
+
+
+def _aligned(offset: int) -> int:
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+
+# ===========================================================================
+# Writing
+# ===========================================================================
+
+
+def write_snapshot(
+    path: str = DEFAULT_PATH,
+    settle_seconds: Optional[float] = None
+) -> Dict:
+    """
+    Build the model from all settled orders and atomically replace the
+    snapshot at `path`.
+
+    Args:
+        settle_seconds: Minimum order age (default: the pairings job's
+                        DEFAULT_SETTLE_SECONDS)
+
+    Returns:
+        {"path", "last_order_id", "users", "items", "pairs", "bytes"}
+    """
+    # recommendation_pairings imports recommendation, which imports
+    # this module
+    from recommendation_pairings import (
+        DEFAULT_SETTLE_SECONDS,
+        settled_order_id,
+    )
+
+    if settle_seconds is None:
+        settle_seconds = DEFAULT_SETTLE_SECONDS
+    np = require_numpy()
+    db = db_session()
+    try:
+        last_order_id = settled_order_id(db, 0, settle_seconds)
+        pairs = (
+            db.query(Order.user_id, OrderItem.menu_item_id)
+            .join(OrderItem, Order.id == OrderItem.order_id)
+            .filter(Order.id <= last_order_id)
+            .distinct()
+            .all()
+        )
+        units = func.sum(OrderItem.quantity)
+        sales = (
+            db.query(OrderItem.menu_item_id, units)
+            .filter(OrderItem.order_id <= last_order_id)
+            .group_by(OrderItem.menu_item_id)
+            .having(units > 0)
+            .order_by(units.desc(), OrderItem.menu_item_id.asc())
+            .all()
+        )
+    finally:
+        db.close()
+
+    matrix = UserItemMatrix.from_pairs(pairs)
+    arrays = {
+        "user_ids": matrix.user_ids,
+        "item_ids": matrix.item_ids,
+        "indptr": matrix.indptr,
+        "indices": matrix.indices,
+        "col_indptr": matrix.col_indptr,
+        "col_users": matrix.col_users,
+        "sales_items": np.array(
+            [item_id for item_id, _ in sales], dtype=np.int64
+        ),
+        "sales_units": np.array(
+            [int(total) for _, total in sales], dtype=np.int64
+        ),
+    }
+    if matrix.n_items <= DENSE_ITEM_LIMIT:
+        arrays["cooccurrence"] = matrix.cooccurrence()
+
+    size = _write_file(path, {
+        "created_at": datetime.utcnow().isoformat(),
+        "last_order_id": last_order_id,
+    }, arrays)
+    return {
+        "path": path,
+        "last_order_id": last_order_id,
+        "users": matrix.n_users,
+        "items": matrix.n_items,
+        "pairs": matrix.nnz,
+        "bytes": size,
+    }
+
+
+def _write_file(path: str, header: Dict, arrays: Dict) -> int:
+    """
+    Write header + arrays to a temporary file and rename it over `path`.
+
+    Returns:
+        File size in bytes
+    """
+    np = require_numpy()
+    data = {}
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        dtype = "<f8" if array.dtype.kind == "f" else "<i8"
+        array = np.ascontiguousarray(array, dtype=dtype)
+        data[name] = (offset, array)
+        layout[name] = {
+            "dtype": dtype, "shape": list(array.shape), "offset": offset
+        }
+        offset = _aligned(offset + array.nbytes)
+    header_bytes = json.dumps(
+        dict(header, arrays=layout), separators=(",", ":")
+    ).encode("utf-8")
+    data_start = _aligned(_PREAMBLE.size + len(header_bytes))
+    size = data_start + offset
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(
+        dir=directory, prefix=".recommendation_model."
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_PREAMBLE.pack(MAGIC, FORMAT_VERSION, len(header_bytes)))
+            f.write(header_bytes)
+            for array_offset, array in data.values():
+                f.seek(data_start + array_offset)
+                f.write(array.tobytes())
+            f.truncate(size)
+            f.flush()
+            os.fsync(f.fileno())
+        # Readers open either the old or the new file, never a partial one
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+    return size
+
+
+# ===========================================================================
+# Reading
+# ===========================================================================
+
+
+class ModelSnapshot:
+    """
+    Read-only view of a snapshot file: every array is a zero-copy NumPy
+    view of a shared memory mapping.
+
+    Attributes:
+        matrix: UserItemMatrix over the mapped arrays
+        last_order_id: Newest order the snapshot covers
+        created_at: ISO timestamp of the job run
+    """
+
+    def __init__(self, path: str):
+        np = require_numpy()
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            # The mapping outlives the file descriptor (and a later
+            # rename over the path)
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if stat.st_size < _PREAMBLE.size:
+            raise ValueError(f"{path}: not a recommendation model snapshot")
+        magic, version, header_length = _PREAMBLE.unpack_from(self._mmap)
+        if magic != MAGIC:
+            raise ValueError(f"{path}: not a recommendation model snapshot")
+        if version != FORMAT_VERSION:
+            raise ValueError(
+                f"{path}: snapshot format {version}, "
+                f"expected {FORMAT_VERSION}"
+            )
+        header = json.loads(
+            self._mmap[_PREAMBLE.size:_PREAMBLE.size + header_length]
+        )
+        data_start = _aligned(_PREAMBLE.size + header_length)
+
+        arrays = {}
+        for name, spec in header["arrays"].items():
+            count = 1
+            for dimension in spec["shape"]:
+                count *= dimension
+            arrays[name] = np.frombuffer(
+                self._mmap,
+                dtype=spec["dtype"],
+                count=count,
+                offset=data_start + spec["offset"],
+            ).reshape(spec["shape"])
+
+        self.path = path
+        self.identity = (stat.st_dev, stat.st_ino, stat.st_mtime_ns)
+        self.size = stat.st_size
+        self.created_at = header["created_at"]
+        self.last_order_id = header["last_order_id"]
+        self.sales_items = arrays["sales_items"]
+        self.sales_units = arrays["sales_units"]
+        self.matrix = UserItemMatrix.from_arrays(
+            arrays["user_ids"],
+            arrays["item_ids"],
+            arrays["indptr"],
+            arrays["indices"],
+            arrays["col_indptr"],
+            arrays["col_users"],
+            cooccurrence=arrays.get("cooccurrence"),
+        )
+
+    def top_selling(self, limit: int) -> List[Tuple[int, int]]:
+        """
+        [(menu_item_id, units_sold)] best-selling first, as
+        recommendation.get_top_selling at the time of the snapshot.
+
+        Time complexity: O(limit)
+        """
+        return list(zip(
+            self.sales_items[:limit].tolist(),
+            self.sales_units[:limit].tolist(),
+        ))
+
+    def stats(self) -> Dict:
+        return {
+            "created_at": self.created_at,
+            "last_order_id": self.last_order_id,
+            "users": self.matrix.n_users,
+            "items": self.matrix.n_items,
+            "pairs": self.matrix.nnz,
+            "bytes": self.size,
+        }
+
+
+class SnapshotReader:
+    """
+    The current snapshot of a path for this worker process.
+
+    The file's identity (device, inode, mtime) is compared at most every
+    `check_interval` seconds (one stat call); a changed file is mapped
+    and replaces the current snapshot (same pattern as MenuCatalogCache).
+    A missing or unreadable file keeps the current snapshot (None before
+    the first successful load).
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = DEFAULT_PATH,
+        check_interval: float = DEFAULT_CHECK_INTERVAL
+    ):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._snapshot: Optional[ModelSnapshot] = None
+        # Identity of a file that failed to load (not retried)
+        self._failed: Optional[tuple] = None
+        self._next_check_at = 0.0
+        self.loads = 0
+        self.load_errors = 0
+
+    def get(self) -> Optional[ModelSnapshot]:
+        if self.path and time.monotonic() >= self._next_check_at:
+            self._refresh()
+        return self._snapshot
+
+    def _refresh(self) -> None:
+        with self._lock:
+            if time.monotonic() < self._next_check_at:
+                return
+            self._next_check_at = time.monotonic() + self.check_interval
+            try:
+                stat = os.stat(self.path)
+            except OSError:
+                # No snapshot written yet (or removed): keep the current one
+                return
+            identity = (stat.st_dev, stat.st_ino, stat.st_mtime_ns)
+            current = self._snapshot
+            if identity == self._failed or (
+                current is not None and current.identity == identity
+            ):
+                return
+            try:
+                snapshot = ModelSnapshot(self.path)
+            except (ImportError, OSError, ValueError, KeyError):
+                self.load_errors += 1
+                self._failed = identity
+                logger.exception(
+                    "Could not load recommendation snapshot %s", self.path
+                )
+                return
+            # Requests holding the old snapshot finish with it
+            self._snapshot = snapshot
+            self.loads += 1
+
+    def stats(self) -> Dict:
+        snapshot = self._snapshot
+        return {
+            "path": self.path,
+            "snapshot": snapshot.stats() if snapshot is not None else None,
+            "loads": self.loads,
+            "load_errors": self.load_errors,
+            "check_interval": self.check_interval,
+        }
+
+
+# ===========================================================================
+# Shared Reader
+# ===========================================================================
+
+snapshot_reader = SnapshotReader()
+
+
+def configure_snapshot(
+    path: Optional[str] = DEFAULT_PATH,
+    check_interval: float = DEFAULT_CHECK_INTERVAL
+) -> None:
+    """
+    Replace the shared reader (RECOMMENDATION_SNAPSHOT /
+    RECOMMENDATION_SNAPSHOT_CHECK_SECONDS settings; path None: disabled).
+    """
+    global snapshot_reader
+    snapshot_reader = SnapshotReader(path, check_interval)
+
+
+def get_model_snapshot() -> Optional[ModelSnapshot]:
+    """
+    The current snapshot of the shared reader, or None.
+    """
+    return snapshot_reader.get()
+
+
+def snapshot_stats() -> Dict:
+    """
+    stats() of the shared reader.
+    """
+    return snapshot_reader.stats()
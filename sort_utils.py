@@ -0,0 +1,251 @@
+"""
+Sort engine module
+
+Shared, manually implemented sorting used by menu_utils.py and
+recommendation.py (does not use Python's built-in .sort() / sorted()).
+
+Algorithm: iterative bottom-up merge sort
+1. Compute every element's sort key exactly once (decorate)
+2. Sort short runs (RUN_SIZE elements) with insertion sort
+3. Merge neighbouring runs of doubling width until one run remains;
+   a merge is skipped (block copy) when the two runs are already in order
+4. Return elements in the final order (undecorate)
+
+Properties:
+- Stable: equal keys keep their input order
+- Worst case O(n log n) comparisons, on any input
+  (including many duplicate keys, sorted or reverse-sorted input)
+- O(n) extra space, no recursion (no Python stack depth limit)
+- Compound keys with a direction per field, e.g. rating desc, price asc:
+      stable_sort(items, key=compound_key(
+          (lambda i: i["rating"], True),
+          (lambda i: i["price"], False),
+      ))
+"""
+
+from numbers import Number
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+# Runs shorter than this are sorted with insertion sort before merging
+RUN_SIZE = 32
+
+KeyFunc = Callable[[Any], Any]
+
+
+# ==============================================================================
+# Compound Keys
+# ==============================================================================
+
+
+class _Descending:
+    """
+    Wrapper that inverts ordering of a non-numeric key (e.g. a string),
+    so it can be sorted descending inside an otherwise ascending tuple.
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+    def __lt__(self, other: "_Descending") -> bool:
+        return other.value < self.value
+
+    def __gt__(self, other: "_Descending") -> bool:
+        return self.value < other.value
+
+    def __eq__(self, other: object) -> bool:
+        return (isinstance(other, _Descending) and
+                self.value == other.value)
+
+    def __le__(self, other: "_Descending") -> bool:
+        return not self.value < other.value
+
+    def __ge__(self, other: "_Descending") -> bool:
+        return not other.value < self.value
+
+    __hash__ = None  # only used for ordering, never as a dict key
+
+
+def compound_key(*fields: Tuple[KeyFunc, bool]) -> KeyFunc:
+    """
+    Build one ascending key function from several (key_func, descending)
+    fields, compared left to right.
+
+    Numeric descending fields are negated; other descending fields are
+    wrapped so their comparison is inverted.
+
+    Example:
+        >>> key = compound_key(
+        ...     (lambda i: i["rating"], True),   # rating high to low
+        ...     (lambda i: i["price"], False),   # then price low to high
+        ... )
+    """
+    def key_func(item: Any) -> tuple:
+        parts = []
+        for func, descending in fields:
+            value = func(item)
+            if descending:
+                if isinstance(value, Number) and not isinstance(value, bool):
+                    value = -value
+                else:
+                    value = _Descending(value)
+            parts.append(value)
+        return tuple(parts)
+    return key_func
+
+
+# ==============================================================================
+# Merge Sort Engine
+# ==============================================================================
+
+
+def _insertion_sort_runs(
+    keys: List[Any], values: List[Any], reverse: bool
+) -> None:
+    """
+    Sort each block of RUN_SIZE elements in place (stable).
+
+    Time complexity: O(n * RUN_SIZE) worst case, O(n) on sorted input
+    """
+    n = len(keys)
+    for start in range(0, n, RUN_SIZE):
+        end = min(start + RUN_SIZE, n)
+        for i in range(start + 1, end):
+            key = keys[i]
+            value = values[i]
+            j = i - 1
+            if reverse:
+                while j >= start and keys[j] < key:
+                    keys[j + 1] = keys[j]
+                    values[j + 1] = values[j]
+                    j -= 1
+            else:
+                while j >= start and key < keys[j]:
+                    keys[j + 1] = keys[j]
+                    values[j + 1] = values[j]
+                    j -= 1
+            keys[j + 1] = key
+            values[j + 1] = value
+
+
+def _merge_pass(
+    src_keys: List[Any],
+    src_values: List[Any],
+    dst_keys: List[Any],
+    dst_values: List[Any],
+    width: int,
+    reverse: bool
+) -> None:
+    """
+    Merge neighbouring sorted runs of `width` elements from src into dst.
+
+    Stability: on equal keys the element from the left run is taken first.
+    Time complexity: O(n) per pass
+    """
+    n = len(src_keys)
+    for lo in range(0, n, 2 * width):
+        mid = min(lo + width, n)
+        hi = min(lo + 2 * width, n)
+
+        # Single run, or the two runs are already in order: block copy
+        if mid >= hi or (
+            not (src_keys[mid - 1] < src_keys[mid]) if reverse
+            else not (src_keys[mid] < src_keys[mid - 1])
+        ):
+            dst_keys[lo:hi] = src_keys[lo:hi]
+            dst_values[lo:hi] = src_values[lo:hi]
+            continue
+
+        i, j, k = lo, mid, lo
+        left_key = src_keys[i]
+        right_key = src_keys[j]
+        while True:
+            # Take from the right run only when strictly before
+            if (left_key < right_key) if reverse else (right_key < left_key):
+                dst_keys[k] = right_key
+                dst_values[k] = src_values[j]
+                k += 1
+                j += 1
+                if j == hi:
+                    break
+                right_key = src_keys[j]
+            else:
+                dst_keys[k] = left_key
+                dst_values[k] = src_values[i]
+                k += 1
+                i += 1
+                if i == mid:
+                    break
+                left_key = src_keys[i]
+
+        # Copy whatever remains of the unfinished run
+        if i < mid:
+            dst_keys[k:hi] = src_keys[i:mid]
+            dst_values[k:hi] = src_values[i:mid]
+        else:
+            dst_keys[k:hi] = src_keys[j:hi]
+            dst_values[k:hi] = src_values[j:hi]
+
+
+def stable_sort(
+    items: Sequence[Any],
+    key: Optional[KeyFunc] = None,
+    reverse: bool = False
+) -> List[Any]:
+    """
+    Return a new list with items in sorted order (stable).
+
+    Args:
+        items: Items to sort (not modified)
+        key: Key function, called exactly once per item
+             (None sorts by the items themselves)
+        reverse: True for descending order; equal keys still keep
+                 their input order
+
+    Returns:
+        New sorted list
+
+    Time complexity: O(n log n) worst case
+    Space complexity: O(n)
+
+    Example:
+        >>> stable_sort([3, 1, 2])
+        [1, 2, 3]
+    """
+    values = list(items)
+    n = len(values)
+    if n < 2:
+        return values
+
+    keys = [key(v) for v in values] if key is not None else list(values)
+
+    _insertion_sort_runs(keys, values, reverse)
+
+    if n > RUN_SIZE:
+        src_keys, src_values = keys, values
+        dst_keys: List[Any] = [None] * n
+        dst_values: List[Any] = [None] * n
+        width = RUN_SIZE
+        while width < n:
+            _merge_pass(
+                src_keys, src_values, dst_keys, dst_values, width, reverse
+            )
+            src_keys, dst_keys = dst_keys, src_keys
+            src_values, dst_values = dst_values, src_values
+            width *= 2
+        values = src_values
+
+    return values
+
+
+def sort_in_place(
+    items: List[Any],
+    key: Optional[KeyFunc] = None,
+    reverse: bool = False
+) -> List[Any]:
+    """
+    Sort a list in place with stable_sort and return it.
+    """
+    items[:] = stable_sort(items, key=key, reverse=reverse)
+    return items
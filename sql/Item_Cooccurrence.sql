@@ -0,0 +1,16 @@
+-- Item-to-item co-purchase index for recommendations (see recommendation.py)
+-- user_count = number of distinct users who bought both items.
+-- Each pair is stored in both directions so the neighbours of an item are
+-- one primary key range scan.
+-- Maintained incrementally when an order is placed; backfill with:
+--     python recommendation_jobs.py rebuild-cooccurrence
+CREATE TABLE item_cooccurrence (
+    item_id INT NOT NULL,
+    other_item_id INT NOT NULL,
+    user_count INT NOT NULL DEFAULT 0,
+
+    PRIMARY KEY (item_id, other_item_id),
+
+    FOREIGN KEY (item_id) REFERENCES menu_items(id) ON DELETE CASCADE,
+    FOREIGN KEY (other_item_id) REFERENCES menu_items(id) ON DELETE CASCADE
+);
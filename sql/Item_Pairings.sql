@@ -0,0 +1,41 @@
+-- "Frequently bought together" pairings (see recommendation_pairings.py)
+-- Written by:
+--     python recommendation_jobs.py mine-pairings [--workers N] [--full]
+-- item_pair_counts is updated incrementally with orders after the last
+-- run's watermark; item_pairings holds the rules of the newest run
+-- (older runs are deleted after the switch).
+CREATE TABLE item_pair_counts (
+    item_id INT NOT NULL,
+    other_item_id INT NOT NULL,
+    order_count INT NOT NULL DEFAULT 0,
+
+    PRIMARY KEY (item_id, other_item_id),
+
+    FOREIGN KEY (item_id) REFERENCES menu_items(id) ON DELETE CASCADE,
+    FOREIGN KEY (other_item_id) REFERENCES menu_items(id) ON DELETE CASCADE
+);
+
+CREATE TABLE pairing_runs (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    started_at DATETIME NOT NULL,
+    finished_at DATETIME NOT NULL,
+    last_order_id INT NOT NULL,
+    order_count INT NOT NULL,
+    rule_count INT NOT NULL DEFAULT 0
+);
+
+CREATE TABLE item_pairings (
+    run_id INT NOT NULL,
+    item_id INT NOT NULL,
+    position INT NOT NULL,
+    other_item_id INT NOT NULL,
+    support FLOAT NOT NULL,
+    confidence FLOAT NOT NULL,
+    lift FLOAT NOT NULL,
+
+    PRIMARY KEY (run_id, item_id, position),
+
+    FOREIGN KEY (run_id) REFERENCES pairing_runs(id) ON DELETE CASCADE,
+    FOREIGN KEY (item_id) REFERENCES menu_items(id) ON DELETE CASCADE,
+    FOREIGN KEY (other_item_id) REFERENCES menu_items(id) ON DELETE CASCADE
+);
@@ -0,0 +1,13 @@
+-- Materialized sales counters for popular items (see recommendation.py)
+-- units_sold = SUM(order_items.quantity) for the menu item.
+-- Incremented when an order is placed; backfill / reconcile with:
+--     python recommendation_jobs.py rebuild-sales
+CREATE TABLE item_sales (
+    menu_item_id INT NOT NULL PRIMARY KEY,
+    units_sold INT NOT NULL DEFAULT 0,
+
+    FOREIGN KEY (menu_item_id) REFERENCES menu_items(id) ON DELETE CASCADE
+);
+
+-- Top-k read: ORDER BY units_sold DESC LIMIT k
+CREATE INDEX ix_item_sales_units_sold ON item_sales (units_sold);
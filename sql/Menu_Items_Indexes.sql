@@ -0,0 +1,21 @@
+-- Indexes for the SQL menu engine (MENU_QUERY_ENGINE=sql, see menu_sql.py)
+-- Run once after Menu_Items.sql; InnoDB secondary indexes also store the
+-- primary key, so "ORDER BY price, id" is served by ix_menu_items_price.
+
+-- WHERE category = ? [AND price BETWEEN ? AND ?] ORDER BY price
+CREATE INDEX ix_menu_items_category_price ON menu_items (category, price);
+
+-- WHERE category = ? ORDER BY rating
+CREATE INDEX ix_menu_items_category_rating ON menu_items (category, rating);
+
+-- Unfiltered / price-range-only listings ORDER BY price or rating
+CREATE INDEX ix_menu_items_price ON menu_items (price);
+CREATE INDEX ix_menu_items_rating ON menu_items (rating);
+
+-- Word-prefix search: MATCH (...) AGAINST ('+tok*' IN BOOLEAN MODE).
+-- MATCH needs a FULLTEXT index on exactly its column list: both columns
+-- for the WHERE filter, each alone for the relevance score.
+CREATE FULLTEXT INDEX ft_menu_items_name_description
+    ON menu_items (name, description);
+CREATE FULLTEXT INDEX ft_menu_items_name ON menu_items (name);
+CREATE FULLTEXT INDEX ft_menu_items_description ON menu_items (description);
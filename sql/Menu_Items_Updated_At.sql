@@ -0,0 +1,18 @@
+-- Change stamp on menu_items (run once after Menu_Items.sql)
+-- Workers detect catalog edits with a probe served by indexes alone
+-- (menu_catalog.py):
+--     SELECT COUNT(*), MAX(id), MAX(updated_at) FROM menu_items
+-- Inserts and deletes move COUNT / MAX(id); every update moves
+-- MAX(updated_at).
+
+ALTER TABLE menu_items ADD COLUMN updated_at DATETIME(6) NULL;
+UPDATE menu_items SET updated_at = UTC_TIMESTAMP(6);
+CREATE INDEX ix_menu_items_updated_at ON menu_items (updated_at);
+
+-- Stamp every update on the database clock, including edits made
+-- directly in SQL (the application's own stamp is overridden, so all
+-- stamps come from one clock)
+CREATE TRIGGER menu_items_stamp_insert BEFORE INSERT ON menu_items
+FOR EACH ROW SET NEW.updated_at = UTC_TIMESTAMP(6);
+CREATE TRIGGER menu_items_stamp_update BEFORE UPDATE ON menu_items
+FOR EACH ROW SET NEW.updated_at = UTC_TIMESTAMP(6);
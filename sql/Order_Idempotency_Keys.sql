@@ -0,0 +1,17 @@
+-- Idempotency-Key store for POST /api/orders (see order_routes.py)
+-- Written in the same transaction as the order, so a retried request
+-- (double click, network retry) returns the order created the first
+-- time. Keys expire after ORDER_IDEMPOTENCY_TTL seconds and are deleted
+-- when the same user places a later order.
+CREATE TABLE order_idempotency_keys (
+    user_id INT NOT NULL,
+    idempotency_key VARCHAR(255) NOT NULL,
+    request_hash CHAR(64) NOT NULL,
+    order_id INT NOT NULL,
+    created_at DATETIME NOT NULL,
+
+    PRIMARY KEY (user_id, idempotency_key),
+
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+    FOREIGN KEY (order_id) REFERENCES orders(id) ON DELETE CASCADE
+);
@@ -0,0 +1,16 @@
+-- Indexes on orders (run once after Orders.sql)
+
+-- Order history pages (GET /api/orders?limit=N&cursor=..., see
+-- order_routes.py), keyset-paginated on (date, id):
+--     WHERE user_id = ? AND (date < ? OR (date = ? AND id < ?)
+--                            OR date IS NULL)
+--     ORDER BY date DESC, id DESC LIMIT N + 1
+-- The WHERE, ORDER BY and keyset columns are all in the index, so a
+-- page reads N + 1 index entries however long the history is.
+-- Also serves "has the user ordered since ...?" checks
+-- (precomputed recommendations, sql/User_Recommendations.sql).
+CREATE INDEX ix_orders_user_date_id ON orders (user_id, date, id);
+
+-- Databases set up before this file have ix_orders_user_date
+-- (user_id, date), a prefix of the index above; drop it afterwards:
+--     DROP INDEX ix_orders_user_date ON orders;
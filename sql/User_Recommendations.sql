@@ -0,0 +1,31 @@
+-- Precomputed "Recommended for You" lists (see recommendation_precompute.py)
+-- Written by:
+--     python recommendation_jobs.py precompute [--workers N]
+-- Each run writes a new generation; get_recommendations reads the newest
+-- complete one and older generations are deleted after the switch.
+CREATE TABLE recommendation_generations (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    started_at DATETIME NOT NULL,
+    finished_at DATETIME NULL,
+    status VARCHAR(20) NOT NULL,
+    top_k INT NOT NULL,
+    user_count INT NOT NULL DEFAULT 0
+);
+
+CREATE TABLE user_recommendations (
+    generation_id INT NOT NULL,
+    user_id INT NOT NULL,
+    position INT NOT NULL,
+    menu_item_id INT NOT NULL,
+    score FLOAT NOT NULL,
+
+    PRIMARY KEY (generation_id, user_id, position),
+
+    FOREIGN KEY (generation_id) REFERENCES recommendation_generations(id)
+        ON DELETE CASCADE,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
+    FOREIGN KEY (menu_item_id) REFERENCES menu_items(id) ON DELETE CASCADE
+);
+
+-- "Has the user ordered since the generation started?" check:
+-- served by ix_orders_user_date_id (sql/Orders_Indexes.sql)
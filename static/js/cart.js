@@ -64,6 +64,12 @@ const Toast = {
 // ==================== Shopping Cart Object ====================
 const Cart = {
   orderHistory: [],
+  // Menu item id -> pairings fetched from /api/menu/<id>/pairings
+  pairingsCache: {},
+  // Idempotency-Key of the checkout in progress and the order body it
+  // was created for (a retry of the same cart reuses the key)
+  checkoutKey: null,
+  checkoutBody: null,
   // Read cart data from localStorage
   get: function() {
     const cartData = localStorage.getItem('cart');
@@ -236,6 +242,100 @@ const Cart = {
     // Update total price
     const total = this.getTotal();
     cartTotalPrice.textContent = total.toFixed(2);
+
+    this.renderPairings(cartItems);
+  },
+
+  // Idempotency-Key for placing an order with this request body:
+  // unchanged until the order succeeds or the cart changes, so a retry
+  // after a lost response returns the first order instead of a new one
+  idempotencyKey: function(body) {
+    if (!this.checkoutKey || this.checkoutBody !== body) {
+      this.checkoutKey = (window.crypto && typeof crypto.randomUUID === 'function')
+        ? crypto.randomUUID()
+        : Date.now().toString(36) + '-' + Math.random().toString(36).slice(2);
+      this.checkoutBody = body;
+    }
+    return this.checkoutKey;
+  },
+
+  // Forget the key once its order is placed
+  clearIdempotencyKey: function() {
+    this.checkoutKey = null;
+    this.checkoutBody = null;
+  },
+
+  // Fetch pairings for one item (cached per page load)
+  fetchPairings: function(itemId) {
+    if (this.pairingsCache[itemId]) {
+      return Promise.resolve(this.pairingsCache[itemId]);
+    }
+    return fetch(`/api/menu/${itemId}/pairings?limit=3`, { credentials: 'same-origin' })
+      .then(res => (res.ok ? res.json() : { pairings: [] }))
+      .then(data => {
+        this.pairingsCache[itemId] = data.pairings || [];
+        return this.pairingsCache[itemId];
+      })
+      .catch(() => []);
+  },
+
+  // Show "Goes well with" add-ons for the items in the cart
+  renderPairings: function(cartItems) {
+    const container = document.getElementById('cartPairings');
+    if (!container) return;
+    const list = container.querySelector('.cart-pairings-list');
+
+    if (cartItems.length === 0) {
+      container.hidden = true;
+      return;
+    }
+
+    const inCart = new Set(cartItems.map(item => item.id));
+    Promise.all(cartItems.slice(0, 5).map(item => this.fetchPairings(item.id)))
+      .then(results => {
+        // Best-ranked suggestion first, skipping items already in the cart
+        const suggestions = [];
+        const seen = new Set();
+        const longest = Math.max(0, ...results.map(r => r.length));
+        for (let rank = 0; rank < longest; rank++) {
+          results.forEach(pairings => {
+            const pairing = pairings[rank];
+            if (pairing && !inCart.has(pairing.id) && !seen.has(pairing.id)) {
+              seen.add(pairing.id);
+              suggestions.push(pairing);
+            }
+          });
+        }
+
+        if (suggestions.length === 0) {
+          container.hidden = true;
+          return;
+        }
+        list.innerHTML = '';
+        suggestions.slice(0, 3).forEach(pairing => {
+          const row = document.createElement('div');
+          row.className = 'cart-item';
+          row.innerHTML = `
+            <img src="${pairing.image_url}" alt="${pairing.name}" class="cart-item-image">
+            <div class="cart-item-info">
+              <div class="cart-item-name">${pairing.name}</div>
+              <div class="cart-item-price">$${pairing.price.toFixed(2)}</div>
+            </div>
+            <button class="quantity-btn" type="button" aria-label="Add ${pairing.name}">+</button>
+          `;
+          row.querySelector('button').addEventListener('click', () => {
+            this.add(pairing.id, {
+              id: pairing.id,
+              name: pairing.name,
+              price: pairing.price,
+              image: pairing.image_url
+            });
+            this.renderCartModal();
+          });
+          list.appendChild(row);
+        });
+        container.hidden = false;
+      });
   },
 
   // Show cart modal
@@ -186,6 +186,110 @@ if (typeof(Storage) === "undefined") {
   // Expose for other scripts (profile.js)
   window.UserMenu = UserMenu;
 
+  // ==================== Recommended Items ====================
+  // Pages ship with an empty #recommendations-section; the list is loaded
+  // from /api/recommendations after render so collaborative filtering
+  // does not delay the page
+  const Recommendations = {
+    escapeHtml: function(text) {
+      const div = document.createElement('div');
+      div.textContent = text == null ? '' : String(text);
+      return div.innerHTML;
+    },
+
+    // Same mapping as the templates: relative paths live under /static
+    imageUrl: function(url) {
+      if (!url) return '/static/images/blank.png';
+      return url.startsWith('/') ? url : '/static/' + url.replace(/\.\.\//g, '');
+    },
+
+    renderStars: function(rating) {
+      let stars = '';
+      for (let i = 1; i <= 5; i++) {
+        stars += rating >= i ? '⭐' : '☆';
+      }
+      return stars;
+    },
+
+    renderCard: function(item) {
+      const esc = this.escapeHtml;
+      const image = this.imageUrl(item.image_url);
+      const rating = parseFloat(item.rating || 0);
+      const price = parseFloat(item.price || 0).toFixed(2);
+      return `
+        <div class="col-12 col-md-4">
+          <div class="category-card bbc-style-card">
+            <div class="category-image-wrapper" style="position: relative;">
+              <img src="${esc(image)}" alt="${esc(item.name)}" class="category-image" loading="lazy">
+              <span style="position: absolute; top: 10px; left: 10px; background: linear-gradient(135deg, #9C5959, #693434); color: #f5f0e0; padding: 4px 10px; border-radius: 15px; font-size: 0.7rem; font-weight: 600; text-transform: uppercase; letter-spacing: 0.5px; box-shadow: 0 2px 6px rgba(105, 52, 52, 0.3);">
+                ${esc(item.recommendation_reason)}
+              </span>
+            </div>
+            <div class="category-content">
+              <h3 class="category-title">${esc(item.name)}</h3>
+              <div class="category-metadata">
+                <div class="metadata-left">
+                  <span class="rating-stars">${this.renderStars(rating)}</span>
+                  <span class="rating-text">${rating.toFixed(1)}</span>
+                </div>
+                <div class="metadata-right">
+                  <span class="delivery-time" style="color: #9c5959; font-weight: 700;">$${price}</span>
+                </div>
+              </div>
+              <p class="category-description">${esc(item.description)}</p>
+              <a
+                class="category-button"
+                href="#"
+                data-pizza-type="${esc(item.name)}"
+                data-item-id="${esc(item.id)}"
+                data-item-price="${esc(item.price)}"
+                data-item-image="${esc(image)}"
+              >Order Now</a>
+            </div>
+          </div>
+        </div>
+      `;
+    },
+
+    render: function(section, data) {
+      const items = (data && data.items) || [];
+      if (items.length === 0) return;
+
+      const title = section.querySelector('.recommendations-title');
+      const subtitle = section.querySelector('.recommendations-subtitle');
+      const list = section.querySelector('.recommendations-list');
+      if (title) title.textContent = data.type || '';
+      if (subtitle) {
+        const subtitles = {
+          'Recommended for You': 'Based on your purchase history and similar users\' preferences',
+          'Trending Now': 'What our guests are ordering right now'
+        };
+        subtitle.textContent = subtitles[data.type] || 'Our most popular dishes loved by customers';
+      }
+      list.innerHTML = items.map(item => this.renderCard(item)).join('');
+      list.querySelectorAll('[data-pizza-type]').forEach(button => {
+        button.addEventListener('click', handleOrderClick);
+      });
+      section.hidden = false;
+    },
+
+    // Load and show recommendations (no-op on pages without the section)
+    init: function() {
+      const section = document.getElementById('recommendations-section');
+      if (!section) return;
+
+      const limit = parseInt(section.dataset.limit, 10) || 3;
+      fetch(`/api/recommendations?limit=${limit}`, { credentials: 'same-origin' })
+        .then(res => (res.ok ? res.json() : null))
+        .then(data => {
+          if (data) this.render(section, data);
+        })
+        .catch(() => {
+          // Optional section: leave it hidden
+        });
+    }
+  };
+
   // ==================== Global Keyboard Shortcuts ====================
   function initHotkeys() {
     const currentUser = (window.UserMenu && typeof UserMenu.getCurrentUser === 'function')
@@ -422,6 +526,10 @@ if (typeof(Storage) === "undefined") {
           Toast.show('Your cart is empty');
           return;
         }
+        // Ignore clicks while the order is being placed
+        if (checkoutBtn.disabled) {
+          return;
+        }
 
         // Construct order data to send to backend
         const payload = {
@@ -431,11 +539,17 @@ if (typeof(Storage) === "undefined") {
           }))
         };
 
+        const body = JSON.stringify(payload);
+        checkoutBtn.disabled = true;
+
         fetch('/api/orders', {
           method: 'POST',
-          headers: { 'Content-Type': 'application/json' },
+          headers: {
+            'Content-Type': 'application/json',
+            'Idempotency-Key': Cart.idempotencyKey(body)
+          },
           credentials: 'same-origin',
-          body: JSON.stringify(payload)
+          body: body
         })
           .then(res => res.json().then(data => ({ ok: res.ok, data })))
           .then(result => {
@@ -446,6 +560,7 @@ if (typeof(Storage) === "undefined") {
             }
 
             // Order successful: clear cart, local storage, and show success message
+            Cart.clearIdempotencyKey();
             localStorage.removeItem('cart');
             Cart.updateCartUI();
             Cart.renderCartModal();
@@ -456,6 +571,9 @@ if (typeof(Storage) === "undefined") {
           })
           .catch(() => {
             Toast.show('Network error, please try again later.');
+          })
+          .finally(() => {
+            checkoutBtn.disabled = false;
           });
       });
     }
@@ -482,6 +600,9 @@ if (typeof(Storage) === "undefined") {
     // Initialize user menu
     UserMenu.init();
 
+    // Load recommended items (index / menu pages)
+    Recommendations.init();
+
     // Initialize menu controller (if on menu page)
     if (document.querySelector('.menu-page') || document.getElementById('menu-container')) {
       if (typeof MenuController !== 'undefined') {
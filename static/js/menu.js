@@ -8,6 +8,10 @@ const MenuController = {
   itemsPerPage: 4,
   searchKeyword: '',
   filteredData: [],
+  // Total matching items (all pages)
+  totalItems: 0,
+  // True when filteredData holds only the current page from the API
+  serverPaged: false,
   
   // Filter and sort state
   filters: {
@@ -21,6 +25,8 @@ const MenuController = {
   // Available categories and price range (fetched from API)
   availableCategories: [],
   priceRange: { min: 0, max: 100 },
+  // Facet counts under the other active filters (see /api/menu "facets")
+  facets: null,
   
   // Whether to use API (backend filtering and sorting)
   useApi: true,
@@ -66,17 +72,17 @@ const MenuController = {
       prevBtn.addEventListener('click', () => {
         if (this.currentPage > 1) {
           this.currentPage--;
-          this.renderMenu();
+          this.changePage();
         }
       });
     }
 
     if (nextBtn) {
       nextBtn.addEventListener('click', () => {
-        const totalPages = Math.ceil(this.filteredData.length / this.itemsPerPage);
+        const totalPages = Math.ceil(this.totalItems / this.itemsPerPage);
         if (this.currentPage < totalPages) {
           this.currentPage++;
-          this.renderMenu();
+          this.changePage();
         }
       });
     }
@@ -114,6 +120,15 @@ const MenuController = {
     this.loadMenuFromApi();
   },
   
+  // Show current page (fetch it from the API when server-paged)
+  changePage: function() {
+    if (this.serverPaged) {
+      this.loadMenuFromApi();
+    } else {
+      this.renderMenu();
+    }
+  },
+
   // Initialize filter panel expand/collapse
   initFilterToggle: function() {
     const toggleBtn = document.getElementById('filterToggleBtn');
@@ -158,6 +173,9 @@ const MenuController = {
       }
       params.append('sort_by', this.filters.sortBy);
       params.append('sort_order', this.filters.sortOrder);
+      // Only fetch the page being shown
+      params.append('limit', this.itemsPerPage);
+      params.append('offset', (this.currentPage - 1) * this.itemsPerPage);
       
       const url = `/api/menu?${params.toString()}`;
       console.log('[MenuController] Loading from API:', url);
@@ -173,10 +191,13 @@ const MenuController = {
       const data = await response.json();
       console.log('[MenuController] API response:', data);
       
-      // Update data
+      // Update data (current page only; total covers all pages)
       this.filteredData = data.items || [];
+      this.totalItems = data.total || 0;
+      this.serverPaged = true;
       this.availableCategories = data.categories || [];
       this.priceRange = data.price_range || { min: 0, max: 100 };
+      this.facets = data.facets || null;
       
       // Update category dropdown
       this.updateCategorySelect();
@@ -198,6 +219,8 @@ const MenuController = {
   useLocalData: function() {
     console.log('[MenuController] Falling back to local data');
     this.filteredData = MENU_DATABASE || [];
+    this.totalItems = this.filteredData.length;
+    this.serverPaged = false;
     this.renderMenu();
   },
   
@@ -209,13 +232,23 @@ const MenuController = {
     // Preserve current selected value
     const currentValue = categorySelect.value;
     
+    // Item count per category (other filters applied), when available
+    const counts = {};
+    if (this.facets && this.facets.categories) {
+      this.facets.categories.forEach(facet => {
+        counts[facet.name] = facet.count;
+      });
+    }
+    
     // Clear and repopulate
     categorySelect.innerHTML = '<option value="">All Categories</option>';
     
     this.availableCategories.forEach(category => {
       const option = document.createElement('option');
       option.value = category;
-      option.textContent = category;
+      option.textContent = category in counts
+        ? `${category} (${counts[category]})`
+        : category;
       if (category === currentValue) {
         option.selected = true;
       }
@@ -305,13 +338,13 @@ const MenuController = {
     }
     
     if (sortApplied) {
-      const sortByName = sortApplied.sort_by === 'price' ? 'Price' : 'Rating';
+      const sortByName = { price: 'Price', rating: 'Rating', relevance: 'Best Match' }[sortApplied.sort_by] || 'Price';
       const sortOrderName = sortApplied.sort_order === 'asc' ? '↑' : '↓';
       parts.push(`Sort: ${sortByName} ${sortOrderName}`);
     }
     
     if (parts.length > 0) {
-      statusText.textContent = `Showing ${this.filteredData.length} items | ${parts.join(' | ')}`;
+      statusText.textContent = `Showing ${this.totalItems} items | ${parts.join(' | ')}`;
       statusDiv.style.display = 'flex';
     } else {
       statusDiv.style.display = 'none';
@@ -342,10 +375,13 @@ const MenuController = {
     const container = document.getElementById('menu-container');
     if (!container) return;
 
-    const totalPages = Math.ceil(this.filteredData.length / this.itemsPerPage);
-    const startIndex = (this.currentPage - 1) * this.itemsPerPage;
-    const endIndex = startIndex + this.itemsPerPage;
-    const currentItems = this.filteredData.slice(startIndex, endIndex);
+    const totalPages = Math.ceil(this.totalItems / this.itemsPerPage);
+    let currentItems = this.filteredData;
+    if (!this.serverPaged) {
+      const startIndex = (this.currentPage - 1) * this.itemsPerPage;
+      const endIndex = startIndex + this.itemsPerPage;
+      currentItems = this.filteredData.slice(startIndex, endIndex);
+    }
 
     // Generate HTML
     let menuHtml = '';
@@ -394,7 +430,7 @@ const MenuController = {
     // Update pagination info
     const pageInfo = document.getElementById('pageInfo');
     if (pageInfo) {
-      if (this.filteredData.length === 0) {
+      if (this.totalItems === 0) {
         pageInfo.textContent = 'No items found';
       } else {
         pageInfo.textContent = `Page ${this.currentPage} of ${totalPages}`;
@@ -412,9 +448,9 @@ const MenuController = {
     }
 
     if (nextBtn) {
-      nextBtn.disabled = this.currentPage >= totalPages || this.filteredData.length === 0;
-      nextBtn.style.opacity = (this.currentPage >= totalPages || this.filteredData.length === 0) ? '0.5' : '1';
-      nextBtn.style.cursor = (this.currentPage >= totalPages || this.filteredData.length === 0) ? 'not-allowed' : 'pointer';
+      nextBtn.disabled = this.currentPage >= totalPages || this.totalItems === 0;
+      nextBtn.style.opacity = (this.currentPage >= totalPages || this.totalItems === 0) ? '0.5' : '1';
+      nextBtn.style.cursor = (this.currentPage >= totalPages || this.totalItems === 0) ? 'not-allowed' : 'pointer';
     }
 
     // Re-bind Order Now button events
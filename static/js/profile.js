@@ -129,27 +129,46 @@ async function uploadAvatar(file) {
 }
 
 // ==================== Load Order History ====================
-async function loadOrderHistory() {
-  try {
-    const response = await fetch('/api/orders', {
-      credentials: 'same-origin'
-    });
+// Pages are fetched one at a time (limit + keyset cursor from the
+// X-Next-Cursor header) and kept, so Previous never refetches
+async function fetchOrderPage(cursor) {
+  const params = new URLSearchParams({ limit: ordersPerPage });
+  if (cursor) {
+    params.set('cursor', cursor);
+  }
+  const response = await fetch(`/api/orders?${params}`, {
+    credentials: 'same-origin'
+  });
 
-    if (!response.ok) {
-      throw new Error('Failed to load orders');
-    }
+  if (!response.ok) {
+    throw new Error('Failed to load orders');
+  }
 
-    allOrders = await response.json();
+  const orders = await response.json();
+  return { orders, nextCursor: response.headers.get('X-Next-Cursor') };
+}
+
+async function loadOrderHistory() {
+  try {
+    const page = await fetchOrderPage(null);
+    allOrders = page.orders;
+    nextOrderCursor = page.nextCursor;
     currentOrderPage = 1; // Reset to first page
 
     renderOrderHistory();
   } catch (error) {
     console.error('Error loading orders:', error);
     allOrders = [];
+    nextOrderCursor = null;
     renderOrderHistory();
   }
 }
 
+// Number of order pages loaded so far
+function loadedOrderPages() {
+  return Math.ceil(allOrders.length / ordersPerPage);
+}
+
 // ==================== Render Order History ====================
 function renderOrderHistory() {
   const tbody = document.getElementById('orderHistoryTableBody');
@@ -164,12 +183,11 @@ function renderOrderHistory() {
 
   if (allOrders.length === 0) {
     tbody.innerHTML = '<tr><td colspan="5" style="text-align: center; padding: 20px;">No orders yet</td></tr>';
-    updateOrderPagination(0);
+    updateOrderPagination();
     return;
   }
 
   // Calculate pagination
-  const totalPages = Math.ceil(allOrders.length / ordersPerPage);
   const startIndex = (currentOrderPage - 1) * ordersPerPage;
   const endIndex = startIndex + ordersPerPage;
   const currentPageOrders = allOrders.slice(startIndex, endIndex);
@@ -279,11 +297,11 @@ function renderOrderHistory() {
   });
 
   // Update pagination controls
-  updateOrderPagination(totalPages);
+  updateOrderPagination();
 }
 
 // ==================== Update Order Pagination Controls ====================
-function updateOrderPagination(totalPages) {
+function updateOrderPagination() {
   const pagination = document.getElementById('orderPagination');
   const prevBtn = document.getElementById('prevOrderPageBtn');
   const nextBtn = document.getElementById('nextOrderPageBtn');
@@ -291,7 +309,10 @@ function updateOrderPagination(totalPages) {
 
   if (!pagination || !prevBtn || !nextBtn || !infoSpan) return;
 
-  if (totalPages <= 1) {
+  // The total is only known once the last page has been loaded
+  const loadedPages = loadedOrderPages();
+  const hasMore = Boolean(nextOrderCursor);
+  if (loadedPages <= 1 && !hasMore) {
     pagination.style.display = 'none';
     return;
   }
@@ -300,10 +321,12 @@ function updateOrderPagination(totalPages) {
 
   // Update button states
   prevBtn.disabled = currentOrderPage === 1;
-  nextBtn.disabled = currentOrderPage === totalPages;
+  nextBtn.disabled = currentOrderPage >= loadedPages && !hasMore;
 
   // Update pagination info
-  infoSpan.textContent = `Page ${currentOrderPage} of ${totalPages}`;
+  infoSpan.textContent = hasMore
+    ? `Page ${currentOrderPage}`
+    : `Page ${currentOrderPage} of ${loadedPages}`;
 }
 
 // ==================== Order Previous Page ====================
@@ -320,17 +343,36 @@ function goToPreviousOrderPage() {
 }
 
 // ==================== Order Next Page ====================
-function goToNextOrderPage() {
-  const totalPages = Math.ceil(allOrders.length / ordersPerPage);
-  if (currentOrderPage < totalPages) {
-    currentOrderPage++;
-    renderOrderHistory();
-    // Scroll to top
-    const tbody = document.getElementById('orderHistoryTableBody');
-    if (tbody) {
-      tbody.scrollIntoView({ behavior: 'smooth', block: 'start' });
+async function goToNextOrderPage() {
+  if (currentOrderPage >= loadedOrderPages()) {
+    // Fetch the next page from the server
+    if (!nextOrderCursor || loadingOrderPage) {
+      return;
+    }
+    loadingOrderPage = true;
+    try {
+      const page = await fetchOrderPage(nextOrderCursor);
+      allOrders = allOrders.concat(page.orders);
+      nextOrderCursor = page.nextCursor;
+    } catch (error) {
+      console.error('Error loading orders:', error);
+      return;
+    } finally {
+      loadingOrderPage = false;
+    }
+    if (currentOrderPage >= loadedOrderPages()) {
+      updateOrderPagination();
+      return;
     }
   }
+
+  currentOrderPage++;
+  renderOrderHistory();
+  // Scroll to top
+  const tbody = document.getElementById('orderHistoryTableBody');
+  if (tbody) {
+    tbody.scrollIntoView({ behavior: 'smooth', block: 'start' });
+  }
 }
 
 // ==================== Address Pagination State ====================
@@ -342,6 +384,9 @@ const addressesPerPage = 4;
 let allOrders = [];
 let currentOrderPage = 1;
 const ordersPerPage = 4;
+// X-Next-Cursor of the last loaded page (null: no more orders)
+let nextOrderCursor = null;
+let loadingOrderPage = false;
 
 // ==================== Load Addresses ====================
 async function loadAddresses() {
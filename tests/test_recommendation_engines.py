@@ -0,0 +1,183 @@
+"""
+The recommendation engines documented as exact ("item_cf", "sql",
+"snapshot", and UserItemMatrix for batch scoring) against the reference
+"user_cf" pipeline (find_similar_users + get_candidate_items), on a
+fixed order history in a SQLite database file.
+"""
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, insert
+
+import auth
+import recommendation
+from recommendation import (
+    compute_recommendations,
+    find_similar_users,
+    get_candidate_items,
+    get_user_purchase_history,
+    rebuild_item_cooccurrence,
+    rebuild_item_sales,
+    set_precomputed_recommendations,
+    set_recommendation_engine,
+)
+from recommendation_matrix import UserItemMatrix
+from recommendation_snapshot import configure_snapshot, write_snapshot
+
+N_USERS = 60
+N_ITEMS = 25
+LIMIT = 5
+
+
+def _history(seed=15):
+    """
+    Deterministic (menu items, orders, order items): skewed item
+    popularity, 0-4 orders per user, so there are cold-start users,
+    score ties and users without candidates.
+    """
+    rng = random.Random(seed)
+    weights = [1.0 / (i + 1) for i in range(N_ITEMS)]
+    items = [
+        {
+            "id": item_id,
+            "name": f"Dish {item_id}",
+            "price": 8 + item_id % 20,
+            "description": "",
+            "image_url": "/static/images/blank.png",
+            "category": "Main Course",
+            "rating": 4.0,
+        }
+        for item_id in range(1, N_ITEMS + 1)
+    ]
+    orders, lines = [], []
+    start = datetime(2024, 1, 1)
+    for user_id in range(1, N_USERS + 1):
+        for _ in range(rng.randint(0, 4)):
+            order_id = len(orders) + 1
+            orders.append({
+                "id": order_id,
+                "user_id": user_id,
+                "date": start + timedelta(hours=order_id),
+                "total_amount": 0,
+            })
+            for item_id in set(rng.choices(
+                range(1, N_ITEMS + 1), weights, k=rng.randint(1, 4)
+            )):
+                lines.append({
+                    "order_id": order_id,
+                    "menu_item_id": item_id,
+                    "quantity": rng.randint(1, 3),
+                    "price_at_purchase": 10,
+                })
+    return items, orders, lines
+
+
+@pytest.fixture(scope="module")
+def database(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("recommendation")
+    engine = create_engine(
+        f"sqlite:///{directory / 'orders.db'}",
+        connect_args={"check_same_thread": False},
+    )
+    previous_engine = auth.engine
+    auth.engine = engine
+    auth.SessionLocal.configure(bind=engine)
+    auth.db_session.remove()
+    auth.Base.metadata.create_all(engine)
+
+    items, orders, lines = _history()
+    with engine.begin() as conn:
+        conn.execute(insert(auth.MenuItem.__table__), items)
+        conn.execute(insert(auth.Order.__table__), orders)
+        conn.execute(insert(auth.OrderItem.__table__), lines)
+    rebuild_item_sales()
+    rebuild_item_cooccurrence()
+    snapshot_path = str(directory / "model.bin")
+    write_snapshot(snapshot_path)
+    configure_snapshot(snapshot_path, check_interval=0)
+    set_precomputed_recommendations(False)
+    yield engine
+
+    set_recommendation_engine("user_cf")
+    set_precomputed_recommendations(True)
+    configure_snapshot()
+    auth.db_session.remove()
+    auth.engine = previous_engine
+    auth.SessionLocal.configure(bind=previous_engine)
+    engine.dispose()
+
+
+def _comparable(result):
+    items, recommendation_type = result
+    return recommendation_type, [
+        (item["id"], item["recommendation_reason"],
+         pytest.approx(item.get("score")))
+        for item in items
+    ]
+
+
+@pytest.fixture(scope="module")
+def reference(database):
+    """
+    {user_id: user_cf result} for every user (and a user without orders).
+    """
+    set_recommendation_engine("user_cf")
+    return {
+        user_id: _comparable(compute_recommendations(user_id, LIMIT))
+        for user_id in range(1, N_USERS + 2)
+    }
+
+
+def test_fixture_covers_personal_and_fallback_results(reference):
+    kinds = {kind for kind, _ in reference.values()}
+    assert kinds == {"Recommended for You", "Popular Items"}
+
+
+def test_matrix_matches_find_similar_users_and_get_candidate_items(database):
+    matrix = UserItemMatrix.load()
+    batch = matrix.batch_candidate_scores(list(range(1, N_USERS + 2)))
+    for user_id in range(1, N_USERS + 2):
+        purchased = get_user_purchase_history(user_id)
+        assert sorted(matrix.purchased_items(user_id)) == sorted(purchased)
+        if not purchased:
+            assert matrix.candidate_scores(user_id) == {}
+            continue
+
+        similar = find_similar_users(user_id, purchased)
+        assert matrix.similar_users(user_id) == pytest.approx(similar)
+        expected = get_candidate_items(purchased, similar) if similar else {}
+        assert matrix.candidate_scores(user_id) == pytest.approx(expected)
+        assert batch.get(user_id, {}) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("engine", ["item_cf", "sql", "snapshot"])
+def test_engine_matches_user_cf(database, reference, engine):
+    set_recommendation_engine(engine)
+    try:
+        for user_id, expected in reference.items():
+            assert _comparable(
+                compute_recommendations(user_id, LIMIT)
+            ) == expected, f"user {user_id}"
+    finally:
+        set_recommendation_engine("user_cf")
+
+
+def test_snapshot_engine_serves_from_the_snapshot(reference, monkeypatch):
+    user_id = next(
+        user_id for user_id, (kind, _) in reference.items()
+        if kind == "Recommended for You"
+    )
+    set_recommendation_engine("snapshot")
+    calls = []
+    monkeypatch.setattr(
+        recommendation, "find_similar_users",
+        lambda *args: calls.append(args) or {},
+    )
+    try:
+        result = compute_recommendations(user_id, LIMIT)
+    finally:
+        set_recommendation_engine("user_cf")
+    assert calls == []
+    assert _comparable(result) == reference[user_id]
@@ -0,0 +1,394 @@
+"""
+"Trending now": time-decayed per-item order counts
+
+get_popular_items ranks by all-time units sold, which barely moves.
+TrendingItems keeps exponentially decayed counts per menu item for a
+few windows (default: "hour" and "day"):
+
+    score_w(item, t) = Σ quantity x exp(-(t - t_order) / window_seconds)
+
+so an order counts 1.0 when placed, ~0.37 one window later, and is
+effectively gone after a few windows.
+
+Updates are O(1) with forward decay: between syncs every score is
+stored relative to a landmark time L (the last sync), and an order at
+time t adds quantity x exp((t - L) / window). All items decay at the
+same rate, so ordering by the stored values is ordering by score.
+
+Sync (every sync_interval seconds on a background thread, and at
+exit) merges this process's pending increments into a shared SQLite
+file (data/trending.sqlite3 by default) and reads the merged scores
+back. Every worker process writes its own increments and reads
+everybody's, so all workers converge within one interval, and a
+restart resumes from the file. Stored scores carry their own update
+time and decay on read, so a sync only writes the items it has
+increments for and deletes the ones that faded. The ranking read by
+top() is rebuilt at each sync, so top(window, k) is an O(k) slice;
+requests never wait for the store (except a process's very first
+top(), which loads it).
+
+Time complexity:
+- record: O(windows)
+- top: O(k)
+- sync: O(n log n) in the background, n = items with a score in the
+  store, writing O(p) rows, p = items with pending increments
+"""
+
+import atexit
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sort_utils import compound_key, stable_sort
+
+# Window name -> decay time constant in seconds
+DEFAULT_WINDOWS = {"hour": 3600.0, "day": 86400.0}
+DEFAULT_SYNC_INTERVAL = 10.0
+DEFAULT_STORE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "data", "trending.sqlite3"
+)
+# Scores below this are dropped from the store
+MIN_SCORE = 1e-3
+# (item_id, score): score descending, ties by item id
+_RANKING_KEY = compound_key(
+    (lambda kv: kv[1], True),
+    (lambda kv: kv[0], False),
+)
+
+logger = logging.getLogger(__name__)
+
+
+class TrendingItems:
+    """
+    Decayed per-item counts for several windows, optionally shared
+    through a SQLite file.
+
+    Example:
+        >>> trending = TrendingItems(path=None, clock=lambda: 0.0)
+        >>> trending.record(7, 2)
+        >>> trending.record(3)
+        >>> trending.sync()
+        >>> trending.top("hour", 2)
+        [(7, 2.0), (3, 1.0)]
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = DEFAULT_STORE,
+        windows: Optional[Dict[str, float]] = None,
+        sync_interval: float = DEFAULT_SYNC_INTERVAL,
+        clock=time.time
+    ):
+        """
+        Args:
+            path: Shared SQLite file (None: this process only)
+            windows: {name: decay time constant in seconds}
+            sync_interval: Seconds between syncs with the store
+            clock: Wall-clock time source (shared across processes)
+        """
+        self.path = path
+        self.windows = dict(windows or DEFAULT_WINDOWS)
+        self.sync_interval = sync_interval
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        # One sync at a time (background thread, flush)
+        self._sync_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._syncer: Optional[threading.Thread] = None
+        self._syncer_pid: Optional[int] = None
+        self._landmark = clock()
+        self._last_sync: Optional[float] = None
+        # Window -> item -> merged score at the landmark
+        self._scores: Dict[str, Dict[int, float]] = {
+            name: {} for name in self.windows
+        }
+        # Window -> item -> this process's unsynced increments,
+        # forward-decayed to the landmark
+        self._pending: Dict[str, Dict[int, float]] = {
+            name: {} for name in self.windows
+        }
+        # Window -> [(item, score at the last sync)], best first
+        self._ranking: Dict[str, List[Tuple[int, float]]] = {
+            name: [] for name in self.windows
+        }
+        self.syncs = 0
+        self.sync_errors = 0
+
+    # ----------------------------------------------------------------------
+    # Updates / reads
+    # ----------------------------------------------------------------------
+
+    def record(self, item_id: int, quantity: int = 1) -> None:
+        """
+        Count `quantity` units of an item ordered now.
+        """
+        now = self.clock()
+        with self._lock:
+            for name, seconds in self.windows.items():
+                pending = self._pending[name]
+                pending[item_id] = pending.get(item_id, 0.0) + (
+                    quantity * math.exp((now - self._landmark) / seconds)
+                )
+        self._start_syncer()
+
+    def top(self, window: str, k: int) -> List[Tuple[int, float]]:
+        """
+        Up to k (item_id, score) by decayed score as of the last sync
+        (descending, ties by item id).
+        """
+        self._start_syncer()
+        if self._last_sync is None:
+            # First read in this process: load the store once
+            self.sync()
+        return self._ranking[window][:k]
+
+    # ----------------------------------------------------------------------
+    # Sync
+    # ----------------------------------------------------------------------
+
+    def _start_syncer(self) -> None:
+        """
+        Start the background sync thread of this process (again after a
+        fork: threads do not survive it).
+        """
+        pid = os.getpid()
+        if self._syncer_pid == pid or self._stop.is_set():
+            return
+        with self._lock:
+            if self._syncer_pid == pid:
+                return
+            self._syncer_pid = pid
+            self._syncer = threading.Thread(
+                target=self._run_syncer, name="trending-sync", daemon=True
+            )
+            self._syncer.start()
+
+    def _run_syncer(self) -> None:
+        while not self._stop.wait(self.sync_interval):
+            try:
+                self.sync()
+            except Exception:
+                logger.exception("Trending sync failed")
+
+    def sync(self) -> None:
+        """
+        Merge pending increments into the store, reload the merged
+        scores and rebuild the rankings. On store errors the increments
+        stay pending (retried at the next sync) and local scores are used.
+
+        Store I/O runs outside the lock record() / top() use: increments
+        recorded meanwhile go to the next sync.
+        """
+        with self._sync_lock:
+            with self._lock:
+                now = self.clock()
+                self._last_sync = now
+                # Decay pending increments and local scores to `now`,
+                # the new landmark; later increments start afresh
+                pending = {}
+                local = {}
+                for name, seconds in self.windows.items():
+                    factor = math.exp(-(now - self._landmark) / seconds)
+                    pending[name] = {
+                        item_id: value * factor
+                        for item_id, value in self._pending[name].items()
+                    }
+                    local[name] = {
+                        item_id: value * factor
+                        for item_id, value in self._scores[name].items()
+                    }
+                self._landmark = now
+                self._scores = local
+                self._pending = {name: {} for name in self.windows}
+
+            merged = None
+            failed = False
+            if self.path is not None:
+                try:
+                    merged = self._merge_store(pending, now)
+                except (OSError, sqlite3.Error):
+                    failed = True
+                    self.sync_errors += 1
+                    logger.exception("Trending store sync failed")
+            if merged is None:
+                merged = {name: dict(s) for name, s in local.items()}
+                if self.path is None:
+                    for name, values in pending.items():
+                        scores = merged[name]
+                        for item_id, value in values.items():
+                            scores[item_id] = scores.get(item_id, 0.0) + value
+
+            scores = {
+                name: {
+                    item_id: value for item_id, value in window.items()
+                    if value >= MIN_SCORE
+                }
+                for name, window in merged.items()
+            }
+            ranking = {
+                name: stable_sort(window.items(), key=_RANKING_KEY)
+                for name, window in scores.items()
+            }
+
+            with self._lock:
+                if failed:
+                    # Keep the increments (as of the landmark `now`)
+                    for name, values in pending.items():
+                        current = self._pending[name]
+                        for item_id, value in values.items():
+                            current[item_id] = (
+                                current.get(item_id, 0.0) + value
+                            )
+                self._scores = scores
+                self._ranking = ranking
+                self.syncs += 1
+
+    def _merge_store(
+        self, pending: Dict[str, Dict[int, float]], now: float
+    ) -> Dict[str, Dict[int, float]]:
+        """
+        Add increments (decayed to `now`) to the store in one write
+        transaction and return all scores decayed to `now`.
+
+        Only items with increments are written (score and updated_at
+        as of `now`); other rows keep their own updated_at and decay on
+        read, except faded ones, which are deleted.
+        """
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5.0)
+        try:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS trending_scores ("
+                " window_name TEXT NOT NULL,"
+                " item_id INTEGER NOT NULL,"
+                " score REAL NOT NULL,"
+                " updated_at REAL NOT NULL,"
+                " PRIMARY KEY (window_name, item_id))"
+            )
+            # Write lock first: concurrent workers merge one at a time
+            conn.execute("BEGIN IMMEDIATE")
+            merged: Dict[str, Dict[int, float]] = {
+                name: {} for name in self.windows
+            }
+            rows = conn.execute(
+                "SELECT window_name, item_id, score, updated_at "
+                "FROM trending_scores"
+            ).fetchall()
+            for name, item_id, score, updated_at in rows:
+                seconds = self.windows.get(name)
+                if seconds is None:
+                    continue
+                merged[name][item_id] = score * math.exp(
+                    -max(now - updated_at, 0.0) / seconds
+                )
+            changed = []
+            for name, values in pending.items():
+                scores = merged[name]
+                for item_id, value in values.items():
+                    scores[item_id] = scores.get(item_id, 0.0) + value
+                    changed.append((name, item_id, scores[item_id], now))
+            faded = [
+                (name, item_id)
+                for name, scores in merged.items()
+                for item_id, score in scores.items()
+                if score < MIN_SCORE
+            ]
+
+            conn.executemany(
+                "INSERT INTO trending_scores "
+                "(window_name, item_id, score, updated_at) "
+                "VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (window_name, item_id) DO UPDATE SET "
+                "score = excluded.score, updated_at = excluded.updated_at",
+                changed,
+            )
+            conn.executemany(
+                "DELETE FROM trending_scores "
+                "WHERE window_name = ? AND item_id = ?",
+                faded,
+            )
+            conn.commit()
+            return merged
+        finally:
+            conn.close()
+
+    def flush(self) -> None:
+        """
+        Sync now if there are unsynced increments.
+        """
+        if any(self._pending.values()):
+            self.sync()
+
+    def close(self) -> None:
+        """
+        Stop the background sync and flush (shutdown / reconfigure).
+        """
+        self._stop.set()
+        syncer = self._syncer
+        if syncer is not None and self._syncer_pid == os.getpid():
+            syncer.join(timeout=self.sync_interval + 5.0)
+        self.flush()
+
+    def stats(self) -> Dict:
+        """
+        Counters for the admin metrics endpoint.
+        """
+        return {
+            "path": self.path,
+            "windows": dict(self.windows),
+            "items": {name: len(s) for name, s in self._scores.items()},
+            "pending": {name: len(p) for name, p in self._pending.items()},
+            "syncs": self.syncs,
+            "sync_errors": self.sync_errors,
+            "sync_interval": self.sync_interval,
+        }
+
+
+# ===========================================================================
+# Shared Instance
+# ===========================================================================
+
+trending = TrendingItems()
+atexit.register(lambda: trending.close())
+
+
+def configure_trending(
+    path: Optional[str] = DEFAULT_STORE,
+    sync_interval: float = DEFAULT_SYNC_INTERVAL
+) -> None:
+    """
+    Replace the shared instance (TRENDING_STORE / TRENDING_SYNC_SECONDS
+    settings); the old one stops syncing after its pending increments.
+    """
+    global trending
+    trending.close()
+    trending = TrendingItems(path=path, sync_interval=sync_interval)
+
+
+def record_trending(lines: Iterable[Tuple[int, int]]) -> None:
+    """
+    Count a committed order's (menu_item_id, quantity) lines.
+    """
+    for item_id, quantity in lines:
+        trending.record(item_id, quantity)
+
+
+def trending_stats() -> Dict:
+    """
+    stats() of the shared instance.
+    """
+    return trending.stats()
+
+
+def get_trending(window: str, k: int) -> List[Tuple[int, float]]:
+    """
+    Top k (item_id, score) of the shared instance for a window.
+    """
+    return trending.top(window, k)